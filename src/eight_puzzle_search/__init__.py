@@ -7,26 +7,102 @@ author: Vincent SHI | 史文朔
 blog: https://blog.vincent1230.top/
 --------------------------------------------
 """
+import cProfile
+import pstats
+import sys
 import warnings
+from array import array
 from functools import wraps
-from time import process_time
+from heapq import heapify, heappop, heappush
+from itertools import chain, count
+from math import inf
+from time import perf_counter, process_time
 from typing import *
 
 
+# 九宫格的紧凑编码: 第 i 格的数字存放于整数的第 i * bits 位起 | compact encoding: tile of cell i is kept from bit i * bits
+def _bits(size: int) -> int:
+    """每格占用的位数, 3x3 与 4x4 为 4 位 | bits per cell, 4 for 3x3 and 4x4"""
+    return max(4, (size * size - 1).bit_length())
+
+
+def _pack(value: List[int], bits: int = 4) -> int:
+    state = 0
+    for i, tile in enumerate(value):
+        state |= tile << (i * bits)
+    return state
+
+
+def _unpack(state: int, size: int = 3) -> List[int]:
+    bits = _bits(size)
+    mask = (1 << bits) - 1
+    return [(state >> (i * bits)) & mask for i in range(size * size)]
+
+
+_MOVE_TABLES = {}
+
+
+def _moves(size: int) -> Tuple[Tuple[Tuple[str, int], ...], ...]:
+    """空格位于各位置时可用的移动方向及空格的新位置 | available moves and new blank position for each blank position"""
+    table = _MOVE_TABLES.get(size)
+    if table is None:
+        cells = size * size
+        table = _MOVE_TABLES[size] = tuple(tuple((move, target) for move, target, able in (
+            ('U', zero + size, zero < cells - size),
+            ('D', zero - size, zero >= size),
+            ('L', zero + 1, zero % size != size - 1),
+            ('R', zero - 1, zero % size != 0)) if able) for zero in range(cells))
+    return table
+
+
+_MOVES = _moves(3)
+
+
+def _check(value: List[int]) -> int:
+    """校验九宫格的值并返回边长 | validate value and return board size"""
+    size = int(len(value) ** 0.5 + 0.5)
+    if size < 2 or size * size != len(value) or set(value) != set(range(len(value))):
+        if len(value) == 9:
+            raise ValueError(
+                '输入值必须是由 0-8 组成的 9 位整数列表 | value must be a list of 9 int in 0-8')
+        raise ValueError(
+            '输入值必须是由 0 至 n*n-1 组成的 n*n 位整数列表 | value must be a list of n*n int in 0 to n*n-1')
+    return size
+
+
+def _slide(state: int, zero: int, target: int, bits: int = 4) -> int:
+    """将 target 处的数字移入空格 zero 处 | move the tile at target into the blank at zero"""
+    tile = (state >> (target * bits)) & ((1 << bits) - 1)
+    return state - (tile << (target * bits)) + (tile << (zero * bits))
+
+
+# 移动历史以 (父节点历史, 移动) 的不可变链表存储, 根节点为字符串 | move history is an immutable linked list of
+# (parent history, move) pairs rooted at a string, so a child costs one pair instead of a copy of the whole string
+def _walk(history: Union[str, tuple]) -> str:
+    moves = []
+    while history.__class__ is tuple:
+        history, move = history
+        moves.append(move)
+    moves.reverse()
+    return history + ''.join(moves)
+
+
 class Box:
     """
     Box(value: List[int], history: str = '') -> 'Box'
 
     八数码问题处理的九宫格对象 | Box object for 8-puzzle problem
+    边长由 value 的长度决定, 9 位为八数码, 16 位为十五数码, 依此类推.
+    board size follows the length of value: 9 for 8-puzzle, 16 for 15-puzzle and so on.
     >> value: 九宫格对象的值 | value of Box object
     >> history: 九宫格对象的移动历史 | history of Box object
     << 实例化新的九宫格对象 | new Box object
     """
 
+    __slots__ = ('_state', '_zero', '_history', '_size')
+
     def __init__(self, value: List[int], history: str = '') -> None:
-        if len(value) != 9 or set(value) != {0, 1, 2, 3, 4, 5, 6, 7, 8}:
-            raise ValueError(
-                '输入值必须是由 0-8 组成的 9 位整数列表 | value must be a list of 9 int in 0-8')
+        size = _check(value)
         if history[:3] == '-> ':
             history = history[3:]
         elif history[:2] == '->':
@@ -34,14 +110,28 @@ class Box:
         if set(history) - {'U', 'D', 'L', 'R'}:
             raise ValueError(
                 "历史记录只能含有 'U', 'D', 'L' 和 'R' | history can only contain 'U', 'D', 'L' and 'R'")
-        self._value = value
+        self._state = _pack(value, _bits(size))
         self._history = history
-        self._zero = self._value.index(0)
+        self._zero = value.index(0)
+        self._size = size
+
+    @classmethod
+    def _make(cls, state: int, zero: int, history: Union[str, tuple], size: int = 3) -> 'Box':
+        # 内部构造: 跳过校验 | internal constructor: skip validation
+        box = cls.__new__(cls)
+        box._state = state
+        box._zero = zero
+        box._history = history
+        box._size = size
+        return box
 
     def __repr__(self):
         """九宫格对象的格式化输出 | formatted output of Box object"""
-        return 'moved via -> {}:\n[ {} {} {}\n  {} {} {}\n  {} {} {} ]\n'.format(
-            self._history, *[i if i != 0 else '*' for i in self._value])
+        size = self._size
+        cells = [str(i) if i != 0 else '*' for i in self.value]
+        width = max(len(i) for i in cells)
+        rows = [' '.join(i.rjust(width) for i in cells[r:r + size]) for r in range(0, size * size, size)]
+        return 'moved via -> {}:\n[ {} ]\n'.format(self.history, '\n  '.join(rows))
 
     @property
     def value(self) -> List[int]:
@@ -50,7 +140,25 @@ class Box:
 
         九宫格对象的值 | value of Box object
         """
-        return self._value
+        return _unpack(self._state, self._size)
+
+    @property
+    def size(self) -> int:
+        """
+        'Box'.size -> int
+
+        九宫格对象的边长 | board size of Box object
+        """
+        return self._size
+
+    @property
+    def state(self) -> int:
+        """
+        'Box'.state -> int
+
+        九宫格对象的紧凑编码 | compact encoding of Box object
+        """
+        return self._state
 
     def set_value(self, value: List[int]) -> None:
         """
@@ -59,11 +167,10 @@ class Box:
         修改当前九宫格对象的值而不改变其历史记录 | change value of Box object without change history
         >> value: 新的值 | new value
         """
-        if len(value) != 9 or set(value) != {0, 1, 2, 3, 4, 5, 6, 7, 8}:
-            raise ValueError(
-                '输入值必须是由 0-8 组成的 9 位整数列表 | value must be a list of 9 int in 0-8')
-        self._value = value
-        self._zero = self._value.index(0)
+        if _check(value) != self._size:
+            raise ValueError('不能改变九宫格对象的边长 | cannot change board size of Box object')
+        self._state = _pack(value, _bits(self._size))
+        self._zero = value.index(0)
         # 警告: set_value 方法不会改变历史记录 | Warning: set_value method will not change history
         warnings.warn(
             'set_value 方法不会改变历史记录 | set_value method will not change history', SyntaxWarning)
@@ -75,7 +182,7 @@ class Box:
 
         九宫格对象的移动历史 | history of Box object
         """
-        return self._history
+        return _walk(self._history)
 
     def add_history(self, history: str) -> None:
         """
@@ -87,7 +194,7 @@ class Box:
         if set(history) - {'U', 'D', 'L', 'R'}:
             raise ValueError(
                 "历史记录只能含有 'U', 'D', 'L' 和 'R' | history can only contain 'U', 'D', 'L' and 'R'")
-        self._history += history
+        self._history = _walk(self._history) + history
         # 警告: add_history 方法不会改变九宫格对象的值 | Warning: add_history method will not change value of Box object
         warnings.warn(
             'add_history 方法不会改变九宫格对象的值 | add_history method will not change value of Box object',
@@ -103,6 +210,7 @@ class Box:
         """
         if length < 1:
             raise ValueError('length 必须大于 0 | length must be greater than 0')
+        self._history = _walk(self._history)
         if length > len(self._history):
             raise ValueError(
                 'length 不能大于历史记录长度 | length cannot be greater than length of history')
@@ -121,7 +229,14 @@ class Box:
         复制当前的九宫格对象 | copy Box object
         << 返回复制后的九宫格对象拷贝 | return copied Box object
         """
-        return Box(self._value.copy(), self._history)
+        return Box._make(self._state, self._zero, self._history, self._size)
+
+    def _target(self, move: str) -> int:
+        for able, target in _moves(self._size)[self._zero]:
+            if able == move:
+                return target
+        raise ValueError({'U': '不能向上移牌 | cannot move up', 'D': '不能向下移牌 | cannot move down',
+                          'L': '不能向左移牌 | cannot move left', 'R': '不能向右移牌 | cannot move right'}[move])
 
     def up(self) -> None:
         """
@@ -129,12 +244,10 @@ class Box:
 
         在当前的九宫格对象内向上移牌 | move up in current Box object
         """
-        if self._zero in (6, 7, 8):
-            raise ValueError('不能向上移牌 | cannot move up')
-        self._value[self._zero], self._value[self._zero +
-                                             3] = self._value[self._zero + 3], self._value[self._zero]
-        self._zero += 3
-        self._history += 'U'
+        target = self._target('U')
+        self._state = _slide(self._state, self._zero, target, _bits(self._size))
+        self._zero = target
+        self._history = (self._history, 'U')
 
     @property
     def upped(self) -> 'Box':
@@ -143,12 +256,9 @@ class Box:
 
         返回向上移牌后的九宫格对象 | return Box object after move up
         """
-        if self._zero in (6, 7, 8):
-            raise ValueError('不能向上移牌 | cannot move up')
-        value = self._value.copy()
-        value[self._zero], value[self._zero +
-                                 3] = value[self._zero + 3], value[self._zero]
-        return Box(value, self._history + 'U')
+        target = self._target('U')
+        return Box._make(_slide(self._state, self._zero, target, _bits(self._size)), target,
+                         (self._history, 'U'), self._size)
 
     def down(self) -> None:
         """
@@ -156,12 +266,10 @@ class Box:
 
         在当前的九宫格对象内向下移牌 | move down in current Box object
         """
-        if self._zero in (0, 1, 2):
-            raise ValueError('不能向下移牌 | cannot move down')
-        self._value[self._zero], self._value[self._zero -
-                                             3] = self._value[self._zero - 3], self._value[self._zero]
-        self._zero -= 3
-        self._history += 'D'
+        target = self._target('D')
+        self._state = _slide(self._state, self._zero, target, _bits(self._size))
+        self._zero = target
+        self._history = (self._history, 'D')
 
     @property
     def downed(self) -> 'Box':
@@ -170,12 +278,9 @@ class Box:
 
         返回向下移牌后的九宫格对象 | return Box object after move down
         """
-        if self._zero in (0, 1, 2):
-            raise ValueError('不能向下移牌 | cannot move down')
-        value = self._value.copy()
-        value[self._zero], value[self._zero -
-                                 3] = value[self._zero - 3], value[self._zero]
-        return Box(value, self._history + 'D')
+        target = self._target('D')
+        return Box._make(_slide(self._state, self._zero, target, _bits(self._size)), target,
+                         (self._history, 'D'), self._size)
 
     def left(self) -> None:
         """
@@ -183,12 +288,10 @@ class Box:
 
         在当前的九宫格对象内向左移牌 | move left in current Box object
         """
-        if self._zero in (2, 5, 8):
-            raise ValueError('不能向左移牌 | cannot move left')
-        self._value[self._zero], self._value[self._zero +
-                                             1] = self._value[self._zero + 1], self._value[self._zero]
-        self._zero += 1
-        self._history += 'L'
+        target = self._target('L')
+        self._state = _slide(self._state, self._zero, target, _bits(self._size))
+        self._zero = target
+        self._history = (self._history, 'L')
 
     @property
     def lefter(self) -> 'Box':
@@ -197,12 +300,9 @@ class Box:
 
         返回向左移牌后的九宫格对象 | return Box object after move left
         """
-        if self._zero in (2, 5, 8):
-            raise ValueError('不能向左移牌 | cannot move left')
-        value = self._value.copy()
-        value[self._zero], value[self._zero +
-                                 1] = value[self._zero + 1], value[self._zero]
-        return Box(value, self._history + 'L')
+        target = self._target('L')
+        return Box._make(_slide(self._state, self._zero, target, _bits(self._size)), target,
+                         (self._history, 'L'), self._size)
 
     def right(self) -> None:
         """
@@ -210,12 +310,10 @@ class Box:
 
         在当前的九宫格对象内向右移牌 | move right in current Box object
         """
-        if self._zero in (0, 3, 6):
-            raise ValueError('不能向右移牌 | cannot move right')
-        self._value[self._zero], self._value[self._zero -
-                                             1] = self._value[self._zero - 1], self._value[self._zero]
-        self._zero -= 1
-        self._history += 'R'
+        target = self._target('R')
+        self._state = _slide(self._state, self._zero, target, _bits(self._size))
+        self._zero = target
+        self._history = (self._history, 'R')
 
     @property
     def righter(self) -> 'Box':
@@ -224,12 +322,9 @@ class Box:
 
         返回向右移牌后的九宫格对象 | return Box object after move right
         """
-        if self._zero in (0, 3, 6):
-            raise ValueError('不能向右移牌 | cannot move right')
-        value = self._value.copy()
-        value[self._zero], value[self._zero -
-                                 1] = value[self._zero - 1], value[self._zero]
-        return Box(value, self._history + 'R')
+        target = self._target('R')
+        return Box._make(_slide(self._state, self._zero, target, _bits(self._size)), target,
+                         (self._history, 'R'), self._size)
 
     @property
     def able(self) -> Set[str]:
@@ -238,16 +333,7 @@ class Box:
 
         查询并返回可用的移动方向 | query and return available move direction
         """
-        able = set()
-        if self._zero not in (6, 7, 8):
-            able.add('U')
-        if self._zero not in (0, 1, 2):
-            able.add('D')
-        if self._zero not in (2, 5, 8):
-            able.add('L')
-        if self._zero not in (0, 3, 6):
-            able.add('R')
-        return able
+        return {move for move, _ in _moves(self._size)[self._zero]}
 
     def expand(self) -> List['Box']:
         """
@@ -256,16 +342,50 @@ class Box:
         拓展下一层 | expand next layer
         << 返回新的九宫格对象列表 | return list of new Box object
         """
-        new = []
-        if self._zero not in (6, 7, 8):
-            new.append(self.upped)
-        if self._zero not in (0, 1, 2):
-            new.append(self.downed)
-        if self._zero not in (2, 5, 8):
-            new.append(self.lefter)
-        if self._zero not in (0, 3, 6):
-            new.append(self.righter)
-        return new
+        state, zero, history, size = self._state, self._zero, self._history, self._size
+        bits = _bits(size)
+        return [Box._make(_slide(state, zero, target, bits), target, (history, move), size)
+                for move, target in _moves(size)[zero]]
+
+
+def _match(start: 'Box', end: 'Box') -> None:
+    if start.size != end.size:
+        raise ValueError('起点与目标的边长不同 | start and end have different board sizes')
+
+
+def _parity(value: List[int], size: int) -> int:
+    """
+    移动中保持不变的奇偶性: 数字序列的逆序数, 偶数边长时再加上空格所在行
+    parity invariant under moves: inversions of the tile sequence, plus the blank row when size is even
+    逆序数的奇偶性等于 (长度 - 置换环数) 的奇偶性, 只需 O(n) | inversion parity equals (length - cycles) parity, O(n)
+    """
+    tiles = [i for i in value if i]
+    place = sorted(tiles)
+    place = {tile: i for i, tile in enumerate(place)}
+    visited, cycles = [False] * len(tiles), 0
+    for i in range(len(tiles)):
+        if not visited[i]:
+            cycles += 1
+            while not visited[i]:
+                visited[i] = True
+                i = place[tiles[i]]
+    parity = len(tiles) - cycles
+    if size % 2 == 0:
+        parity += value.index(0) // size
+    return parity & 1
+
+
+def is_solvable(start: 'Box', end: 'Box') -> bool:
+    """
+    is_solvable(start: 'Box', end: 'Box') -> bool
+
+    判断起点能否到达目标 | check whether start can reach end
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    << 可解时返回 True | return True when solvable
+    """
+    _match(start, end)
+    return _parity(start.value, start.size) == _parity(end.value, end.size)
 
 
 def input_box(prompt: str = '') -> 'Box':
@@ -312,9 +432,223 @@ def input_box(prompt: str = '') -> 'Box':
     return Box(value)
 
 
-def search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int]) -> None:
+class _Task(dict):
+    """仅在估价函数读取时才还原历史记录的 task 字典 | task dict that rebuilds history only when fn reads it"""
+
+    box = None
+
+    def __missing__(self, key: str) -> str:
+        if key != 'history':
+            raise KeyError(key)
+        self['history'] = history = self.box.history
+        return history
+
+
+class SearchResult:
+    """
+    SearchResult(box: Optional['Box'], path: Optional[str], expanded: int, generated: int, frontier: int,
+                 elapsed: float, stats: Optional[Dict[str, Any]] = None) -> 'SearchResult'
+
+    搜索函数返回的结果对象 | result object returned by search functions
+    >> box: 到达目标的九宫格对象, 无解时为 None | Box object reaching the goal, None when not solved
+    >> path: 从起点到目标的移动序列, 无解时为 None | moves from start to goal, None when not solved
+    >> expanded: 拓展的节点数 | number of nodes expanded
+    >> generated: 生成的节点数 | number of nodes generated
+    >> frontier: 前沿的最大规模 | peak frontier size
+    >> elapsed: 用时 (秒) | elapsed time in seconds
+    >> stats: 其他计数 | other counters
+    >> >> - stats['duplicates']: 因重复而剪去的节点数 | number of nodes pruned as duplicates
+    >> >> - stats['evaluations']: 估价函数的调用次数 | number of heuristic calls
+    >> >> - stats['phases']: search(timing=True) 时各阶段的用时 | time per phase with search(timing=True)
+    >> >> - stats['cancelled']: progress 回调取消了搜索 | search cancelled by the progress callback
+    >> >> - stats['exhausted']: 用尽的预算, 'nodes' 或 'seconds' | budget used up, 'nodes' or 'seconds'
+    >> >> - stats['partial']: 停止时已知最好的部分路径 | best partial path known when stopped
+    """
+
+    __slots__ = ('box', 'path', 'expanded', 'generated', 'frontier', 'elapsed', 'stats')
+
+    def __init__(self, box: Optional['Box'], path: Optional[str], expanded: int, generated: int, frontier: int,
+                 elapsed: float, stats: Optional[Dict[str, Any]] = None) -> None:
+        self.box = box
+        self.path = path
+        self.expanded = expanded
+        self.generated = generated
+        self.frontier = frontier
+        self.elapsed = elapsed
+        self.stats = {} if stats is None else stats
+
+    def __bool__(self) -> bool:
+        return self.path is not None
+
+    def __repr__(self):
+        """搜索结果的格式化输出 | formatted output of SearchResult object"""
+        stats = 'expanded: {}, generated: {}, frontier: {}, time: {:.7f}s\n'.format(
+            self.expanded, self.generated, self.frontier, self.elapsed)
+        if self.path is None:
+            return '未能找到解 | cannot find solution\n' + stats
+        return 'solved in {} steps via -> {}\n'.format(self.depth, self.path) + stats + repr(self.box)
+
+    @property
+    def solved(self) -> bool:
+        """
+        'SearchResult'.solved -> bool
+
+        是否找到解 | whether a solution was found
+        """
+        return self.path is not None
+
+    @property
+    def depth(self) -> Optional[int]:
+        """
+        'SearchResult'.depth -> Optional[int]
+
+        解的步数 | number of steps of the solution
+        """
+        return None if self.path is None else len(self.path)
+
+
+def print_trace(event: str, data: Any) -> None:
+    """
+    print_trace(event: str, data: Any) -> None
+
+    逐个打印搜索事件的事件接收器, 即旧版本的默认输出 | event sink printing every search event, the old default output
+    >> event: 事件名 | event name
+    >> >> - 'start' / 'generate': 起点 / 新生成的节点 | start / newly generated node
+    >> >> - 'forward' / 'reverse': 双向搜索中正向 / 反向生成的节点 | node generated forward / backward in dbfs
+    >> >> - 'bound': ida() 的新一轮阈值 | new bound of ida()
+    >> >> - 'solved' / 'failed': 找到解 / 未能找到解 | solution found / not found
+    >> data: 事件数据 | event data
+    """
+    if event in ('start', 'generate'):
+        print('->', data.history)
+    elif event in ('forward', 'reverse'):
+        print(event, '->', data.history)
+    elif event == 'bound':
+        print('-> 阈值 | bound:', data)
+    elif event == 'solved':
+        print(data)
+    elif event == 'failed':
+        print('未能找到解 | cannot find solution')
+
+
+def _prologue(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]],
+              check: bool = True) -> Optional['SearchResult']:
+    """公共的开场检查, 起点即目标或无解时直接返回结果 | common checks returning early when start is end or unsolvable"""
+    _match(start, end)
+    if trace is not None:
+        trace('start', start)
+    if start.state == end.state:
+        if trace is not None:
+            trace('solved', start)
+        return SearchResult(start, '', 0, 0, 1, 0.0)
+    if check and not is_solvable(start, end):
+        if trace is not None:
+            trace('failed', None)
+        return SearchResult(None, None, 0, 0, 0, 0.0)
+    return None
+
+
+def _finish(start: 'Box', box: Optional['Box'], expanded: int, generated: int, frontier: int, began: float,
+            trace: Optional[Callable[[str, Any], None]], stats: Optional[Dict[str, Any]] = None) -> 'SearchResult':
+    path = None if box is None else box.history[len(start.history):]
+    if trace is not None and box is None:
+        trace('failed', None)
+    elif trace is not None:
+        trace('solved', box)
+    return SearchResult(box, path, expanded, generated, frontier, perf_counter() - began, stats)
+
+
+def _timed(func: Callable, phases: Dict[str, float], phase: str) -> Callable:
+    """将 func 的用时累加到 phases[phase], 仅在计时时替换原函数 | add time of func into phases[phase], swapped in
+    only when timing"""
+
+    def timed(*args):
+        tick = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            phases[phase] += perf_counter() - tick
+
+    return timed
+
+
+class _Cancelled(Exception):
+    """progress 回调取消了搜索或预算用尽 | search cancelled by the progress callback or out of budget"""
+
+
+class _Progress:
+    """
+    按时间间隔调用 progress 回调, 回调返回 False 时取消搜索, 同时检查节点与时间预算. 搜索函数每拓展 1024 个节点才检查一次,
+    未传入回调与预算时几乎没有开销.
+    calls the progress callback at time intervals and cancels the search when it returns False, checking the node and
+    time budgets as well. search functions only check once every 1024 expansions, so there is next to no cost without
+    a callback or budget.
+    """
+
+    __slots__ = ('callback', 'interval', 'began', 'due', 'nodes', 'deadline', 'exhausted')
+
+    def __init__(self, callback: Optional[Callable[[Dict[str, Any]], Optional[bool]]], interval: float, began: float,
+                 max_nodes: Optional[int] = None, max_seconds: Optional[float] = None) -> None:
+        self.callback = callback
+        self.interval = interval
+        self.began = began
+        self.due = began + interval if callback is not None else inf
+        self.nodes = inf if max_nodes is None else max_nodes
+        self.deadline = inf if max_seconds is None else began + max_seconds
+        self.exhausted = None
+
+    def __call__(self, expanded: int, generated: int, frontier: int, duplicates: int = 0,
+                 evaluations: int = 0) -> bool:
+        now = perf_counter()
+        if expanded >= self.nodes:
+            self.exhausted = 'nodes'
+            return True
+        if now >= self.deadline:
+            self.exhausted = 'seconds'
+            return True
+        if now < self.due:
+            return False
+        self.due = now + self.interval
+        return self.callback({'expanded': expanded, 'generated': generated, 'frontier': frontier,
+                              'duplicates': duplicates, 'evaluations': evaluations,
+                              'elapsed': now - self.began}) is False
+
+    def stop(self, stats: Dict[str, Any], partial: Optional[str] = None) -> None:
+        """记录停止的原因与已知最好的部分路径 | record why the search stopped and the best partial path known"""
+        if self.exhausted is None:
+            stats['cancelled'] = True
+        else:
+            stats['exhausted'] = self.exhausted
+        if partial is not None:
+            stats['partial'] = partial
+
+
+def _monitor(progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]], interval: float, began: float,
+             max_nodes: Optional[int], max_seconds: Optional[float]) -> Optional['_Progress']:
+    """没有回调与预算时返回 None | None without a callback or budget"""
+    if progress is None and max_nodes is None and max_seconds is None:
+        return None
+    return _Progress(progress, interval, began, max_nodes, max_seconds)
+
+
+def _closest(start: 'Box', end: 'Box', boxes: Iterable['Box']) -> str:
+    """前沿中曼哈顿距离最小的节点的移动序列 | moves of the frontier node nearest to end by manhattan distance"""
+    evaluate = _Manhattan(start, end).evaluate
+    box = min(boxes, key=lambda box: (evaluate(box.state), len(box.history)), default=start)
+    return box.history[len(start.history):]
+
+
+def search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int],
+           trace: Optional[Callable[[str, Any], None]] = None, sample: int = 1,
+           progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None, interval: float = 1.0,
+           timing: bool = False, workers: Optional[int] = None, max_nodes: Optional[int] = None,
+           max_seconds: Optional[float] = None, w: float = 1.0) -> 'SearchResult':
     """
-    search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int]) -> None
+    search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int],
+           trace: Optional[Callable[[str, Any], None]] = None, sample: int = 1,
+           progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None, interval: float = 1.0,
+           timing: bool = False, workers: Optional[int] = None, max_nodes: Optional[int] = None,
+           max_seconds: Optional[float] = None, w: float = 1.0) -> 'SearchResult'
 
     通用启发式搜索函数 | universal heuristic search function
     >> start: 起始九宫格对象 | start Box object
@@ -326,70 +660,330 @@ def search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int]) -> Non
     >> >> - task['now']: 需评价的当前节点的值 | current node value to be evaluated
     >> >> - task['history']: 当前节点的历史记录 | current node history
     >> << 评估得出的搜索代价 | evaluation result of search cost
+    >> >> fn.fast: 可选的快速接口, 见 FastHeuristic | optional fast interface, see FastHeuristic
+    >> trace: 事件接收器, 如 print_trace, 默认不输出 | event sink such as print_trace, silent by default
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 每隔 interval 秒以计数字典调用一次, 返回 False 时取消搜索 | called with a dict of counters every
+    >> interval seconds, returning False cancels the search
+    >> interval: progress 的调用间隔 (秒) | seconds between progress calls
+    >> timing: 是否记录拓展, 估价和开放表维护各阶段的用时 | whether to time the expand, heuristic and frontier phases
+    >> workers: 给出时改用 parallel_search() 在多个进程中搜索 | search in several processes by parallel_search() when given
+    >> max_nodes: 拓展节点数的预算, 用尽时停止搜索 | budget of expanded nodes, the search stops once it is used up
+    >> max_seconds: 用时的预算 (秒), 用尽时停止搜索 | budget of seconds, the search stops once it is used up
+    >> 预算与 progress 一同每拓展 1024 个节点检查一次, 用尽时 stats 中记有 'exhausted' 与 'partial'
+    >> budgets are checked along with progress every 1024 expansions, 'exhausted' and 'partial' are set in stats
+    >> when one is used up
+    >> w: 启发值的权重, 大于 1 时为加权 A*, 解的步数不超过最优解的 w 倍, 需要计入已走步数且支持快速接口的估价函数
+    >> weight of the heuristic value, weighted A* when above 1 with solutions at most w times the optimum, needs a
+    >> heuristic counting the steps taken with the fast interface
+    << 返回搜索结果 | return SearchResult object
     """
-    goal = end.value
-    print('->', start.history)
-    if start.value == goal:
-        print('起点已在目标状态 | start Box is already in target state')
-        print(start)
-        return
+    if w < 1:
+        raise ValueError('权重不能小于 1 | weight cannot be less than 1')
+    if w != 1:
+        if getattr(fn, 'fast', None) is None:
+            raise ValueError(
+                '加权搜索需要支持快速接口的估价函数 | weighted search needs a heuristic with the fast interface')
+        _match(start, end)
+        # 不计已走步数时 (贪心搜索) 权重没有意义, 次优界也不成立 | without the steps taken (greedy search) a weight
+        # means nothing and the suboptimality bound does not hold
+        if fn.fast(start, end).g == 0:
+            raise ValueError('加权搜索需要计入已走步数的估价函数, 如 combine(ls, mhd) | weighted search needs a '
+                             'heuristic counting the steps taken, e.g. combine(ls, mhd)')
+    if workers is not None:
+        if w != 1:
+            raise ValueError('并行搜索不支持加权 | parallel search does not support weights')
+        return parallel_search(start, end, fn, workers, trace=trace, progress=progress, interval=interval,
+                               max_nodes=max_nodes, max_seconds=max_seconds)
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, goal = perf_counter(), end.state
+    begin, target = start.value, end.value
+    size = start.size
+    bits, moves = _bits(size), _moves(size)
+    mask = (1 << bits) - 1
+    fast = getattr(fn, 'fast', None)
+    if fast is not None:
+        # 快速接口: 由父节点的启发值增量更新 | fast interface: update incrementally from the parent value
+        heuristic = fast(start, end)
+        weight, update = heuristic.g, heuristic.update
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
 
     def _key(now: 'Box') -> int:
-        task = {
-            'start': start.value,
-            'end': goal,
-            'now': now.value,
-            'history': now.history
-        }
+        task = _Task(start=begin, end=target, now=now.value)
+        task.box = now
         return fn(task)
 
-    front = [start]
+    # 计时时才以计时版本替换, 不计时没有额外开销 | timed versions are swapped in only when timing, so no cost otherwise
+    push, pop, phases = heappush, heappop, {'expand': 0.0, 'heuristic': 0.0, 'frontier': 0.0}
+    if timing:
+        push, pop = _timed(heappush, phases, 'frontier'), _timed(heappop, phases, 'frontier')
+        _key = _timed(_key, phases, 'heuristic')
+        if fast is not None:
+            update = _timed(update, phases, 'heuristic')
+
+    # 二叉堆开放表 + 惰性删除, 以状态为键记录最小代价 | binary heap open list with lazy deletion, best cost keyed by state
+    order = count()
+    h = 0 if fast is None else heuristic.evaluate(start.state)
+    front = [(_key(start) if fast is None else w * h, next(order), 0, h, start)]
+    best = {start.state: 0}
+    expanded = generated = peak = duplicates = 0
+    evaluations, cancelled = 1, False
     while front:
-        front.sort(key=_key)
-        for check in front.pop(0).expand():
-            print('->', check.history)
-            if check.value == goal:
-                print(check)
-                return
-            front.append(check)
-
-
-def breadth_first_search(start: 'Box', end: 'Box') -> None:
+        if len(front) > peak:
+            peak = len(front)
+        _, _, step, h, now = pop(front)
+        state, zero, history = now._state, now._zero, now._history
+        if best[state] < step:
+            continue
+        if state == goal:
+            break
+        expanded += 1
+        if monitor is not None and expanded & 1023 == 0 and monitor(
+                expanded, generated, len(front), duplicates, evaluations):
+            cancelled = True
+            break
+        step += 1
+        for move, to in moves[zero]:
+            generated += 1
+            child = _slide(state, zero, to, bits)
+            if child in best and best[child] <= step:
+                duplicates += 1
+                continue
+            best[child] = step
+            check = Box._make(child, to, (history, move), size)
+            if trace is not None and generated % sample == 0:
+                trace('generate', check)
+            evaluations += 1
+            if fast is None:
+                key, value = _key(check), 0
+            else:
+                value = update(h, child, (state >> (to * bits)) & mask, to, zero)
+                key = weight * step + w * value
+            push(front, (key, next(order), step, value, check))
+    else:
+        now = None
+    stats = {'duplicates': duplicates, 'evaluations': evaluations}
+    if timing:
+        # 其余时间均计入拓展 | the remaining time all counts as expansion
+        phases['expand'] = perf_counter() - began - phases['heuristic'] - phases['frontier']
+        stats['phases'] = phases
+    if cancelled:
+        monitor.stop(stats, _closest(start, end, [now] + [entry[4] for entry in front]))
+        now = None
+    return _finish(start, now, expanded, generated, peak, began, trace, stats)
+
+
+def breadth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None,
+                         sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                         interval: float = 1.0, max_nodes: Optional[int] = None,
+                         max_seconds: Optional[float] = None) -> 'SearchResult':
     """
-    breadth_first_search(start: 'Box', end: 'Box') -> None
+    breadth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None,
+                         sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                         interval: float = 1.0, max_nodes: Optional[int] = None,
+                         max_seconds: Optional[float] = None) -> 'SearchResult'
 
     宽度优先搜索 | breadth first search
     >> start: 起始九宫格对象 | start Box object
     >> end: 目标九宫格对象 | end Box object
+    >> trace: 事件接收器, 如 print_trace, 默认不输出 | event sink such as print_trace, silent by default
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    << 返回搜索结果 | return SearchResult object
     """
-    goal = end.value
-    print('->', start.history)
-    if start.value == goal:
-        print('起点已在目标状态 | start Box is already in target state')
-        print(start)
-        return
-
-    def _bfs(layer: List['Box']) -> None:
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, goal = perf_counter(), end.state
+    expanded = generated = peak = 0
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    stats = {'duplicates': 0, 'evaluations': 0}
+
+    layer = [start]
+    while layer:
+        if len(layer) > peak:
+            peak = len(layer)
         next_layer = []
         for now in layer:
+            expanded += 1
+            if monitor is not None and expanded & 1023 == 0 and monitor(
+                    expanded, generated, len(layer) + len(next_layer)):
+                monitor.stop(stats, _closest(start, end, layer + next_layer))
+                return _finish(start, None, expanded, generated, peak, began, trace, stats)
             for check in now.expand():
-                print('->', check.history)
-                if check.value == goal:
-                    print(check)
-                    return
+                generated += 1
+                if trace is not None and generated % sample == 0:
+                    trace('generate', check)
+                if check.state == goal:
+                    return _finish(start, check, expanded, generated, peak, began, trace, stats)
                 next_layer.append(check)
-        _bfs(next_layer)
+        layer = next_layer
+    return _finish(start, None, expanded, generated, peak, began, trace, stats)
 
-    _bfs([start])
 
+class _Transpositions:
+    """
+    定长置换表: 记录每个状态出现过的最浅深度及所在的轮次, 跨迭代加深的各轮复用. 每个桶有两格, 第一格保留较浅的条目,
+    第二格总是被替换, 表满后内存不再增长.
+    fixed size transposition table keeping the shallowest depth each state was seen at and the iteration it was seen
+    in, reused across the iterations of deepening. every bucket has two slots, the first keeps the shallower entry and
+    the second is always replaced, so memory stays flat once the table is full.
+    """
+
+    __slots__ = ('shift', 'keys', 'depths', 'rounds', 'replaced')
 
-def depth_first_search(start: 'Box', end: 'Box') -> None:
+    def __init__(self, size: int, entries: int) -> None:
+        buckets = 1 << max(entries // 2 - 1, 1).bit_length()
+        self.shift = 65 - buckets.bit_length()
+        # 至多 4x4 时编码不超过 64 位, 可存入紧凑数组 | encodings fit in 64 bits up to 4x4, so a compact array works
+        self.keys = array('Q', bytes(16 * buckets)) if size * size * _bits(size) <= 64 else [0] * (2 * buckets)
+        self.depths = array('I', bytes(8 * buckets))
+        self.rounds = array('I', bytes(8 * buckets))
+        self.replaced = 0
+
+    def visit(self, state: int, depth: int, iteration: int) -> bool:
+        """
+        记录 state 出现在第 iteration 轮的 depth 深度, 已在更浅处或本轮同一深度出现过时返回 True 以剪枝
+        record state at depth in the given iteration, returning True to prune when it was seen shallower or at the
+        same depth in this iteration
+        """
+        slot = ((state * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self.shift << 1
+        keys, depths, rounds = self.keys, self.depths, self.rounds
+        for index in (slot, slot + 1):
+            if keys[index] == state:
+                seen = depths[index]
+                if seen < depth or seen == depth and rounds[index] == iteration:
+                    return True
+                depths[index], rounds[index] = depth, iteration
+                return False
+        # 空槽的键为 0, 任何状态的编码都不为 0 | empty slots hold key 0, which no state encodes to
+        if keys[slot] and keys[slot + 1]:
+            self.replaced += 1
+        if keys[slot] and depths[slot] >= depth:
+            # 较浅的新条目占据第一格, 原条目移入第二格 | the shallower newcomer takes the first slot, pushing the old
+            # entry into the second
+            keys[slot + 1], depths[slot + 1], rounds[slot + 1] = keys[slot], depths[slot], rounds[slot]
+        elif keys[slot]:
+            slot += 1
+        keys[slot], depths[slot], rounds[slot] = state, depth, iteration
+        return False
+
+
+def _descend(start: 'Box', end: 'Box', bounds: Iterable[float], table: Optional['_Transpositions'],
+             trace: Optional[Callable[[str, Any], None]], sample: int, monitor: Optional['_Progress'],
+             counter: List[int]) -> Optional[str]:
+    """
+    显式栈的深度优先搜索核心: 对 bounds 中的每个深度限制搜索一轮, 剪去撤销上一步的移动, 返回移动序列, 计数写入
+    counter, monitor 取消时抛出 _Cancelled
+    core of explicit stack depth first search: one pass for every depth limit in bounds, pruning the move undoing
+    the previous one, returns the moves, writes counters into counter and raises _Cancelled when monitor cancels
     """
-    depth_first_search(start: 'Box', end: 'Box') -> None
+    size = start.size
+    bits, moves, goal = _bits(size), _moves(size), end.state
+    mask = (1 << bits) - 1
+    reverse = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+    expanded, generated, deepest, duplicates, transpositions = counter
+    for iteration, bound in enumerate(bounds, 1):
+        if bound < 1:
+            continue
+        if table is not None:
+            table.visit(start.state, 0, iteration)
+        # 每层: 状态, 空格位置, 下一个移动的序号, 撤销上一步的移动 | per frame: state, blank, next move index, undoing move
+        stack, path = [[start.state, start._zero, 0, '']], []
+        expanded += 1
+        deepest = max(deepest, 1)
+        while stack:
+            frame = stack[-1]
+            state, zero, index, back = frame
+            if index == len(moves[zero]):
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+            frame[2] = index + 1
+            move, to = moves[zero][index]
+            if move == back:
+                duplicates += 1
+                continue
+            generated += 1
+            tile = (state >> (to * bits)) & mask
+            child = state - (tile << (to * bits)) + (tile << (zero * bits))
+            if trace is not None and generated % sample == 0:
+                trace('generate', Box._make(child, to, start.history + ''.join(path) + move, size))
+            if child == goal:
+                path.append(move)
+                counter[:] = expanded, generated, deepest, duplicates, transpositions
+                return ''.join(path)
+            depth = len(stack)
+            if depth >= bound:
+                continue
+            if table is not None and table.visit(child, depth, iteration):
+                duplicates += 1
+                transpositions += 1
+                continue
+            stack.append([child, to, 0, reverse[move]])
+            path.append(move)
+            expanded += 1
+            if depth + 1 > deepest:
+                deepest = depth + 1
+            if monitor is not None and expanded & 1023 == 0 and monitor(expanded, generated, depth + 1, duplicates):
+                counter[:] = expanded, generated, deepest, duplicates, transpositions
+                raise _Cancelled(''.join(path))
+    counter[:] = expanded, generated, deepest, duplicates, transpositions
+    return None
+
+
+def _stacked(start: 'Box', end: 'Box', bounds: Iterable[float], table_size: int,
+             trace: Optional[Callable[[str, Any], None]], sample: int,
+             progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]], interval: float,
+             max_nodes: Optional[int], max_seconds: Optional[float]) -> 'SearchResult':
+    """dfs(), dls() 与 iddfs() 的公共部分 | shared part of dfs(), dls() and iddfs()"""
+    if table_size < 0:
+        raise ValueError('置换表大小不能小于 0 | table size cannot be less than 0')
+    began = perf_counter()
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    table = _Transpositions(start.size, table_size) if table_size else None
+    counter = [0, 0, 0, 0, 0]  # expanded, generated, deepest, duplicates, transpositions
+    stats = {}
+    try:
+        path = _descend(start, end, bounds, table, trace, sample, monitor, counter)
+    except _Cancelled as stopped:
+        path = None
+        monitor.stop(stats, stopped.args[0])
+    box = None if path is None else Box._make(end.state, end._zero, start.history + path, start.size)
+    expanded, generated, deepest, stats['duplicates'], stats['transpositions'] = counter
+    stats['evaluations'] = 0
+    if table is not None:
+        stats['replaced'] = table.replaced
+    return _finish(start, box, expanded, generated, deepest, began, trace, stats)
+
+
+def depth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None,
+                       sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                       interval: float = 1.0, max_nodes: Optional[int] = None,
+                       max_seconds: Optional[float] = None, table_size: int = 1 << 20) -> Optional['SearchResult']:
+    """
+    depth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None,
+                       sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                       interval: float = 1.0, max_nodes: Optional[int] = None,
+                       max_seconds: Optional[float] = None, table_size: int = 1 << 20) -> Optional['SearchResult']
 
     深度优先搜索 (不可用于求解) | depth first search (cannot be used for search)
     >> start: 起始九宫格对象 | start Box object
     >> end: 目标九宫格对象 | end Box object
+    >> trace: 事件接收器, 如 print_trace, 默认不输出 | event sink such as print_trace, silent by default
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    >> table_size: 见 iddfs() | see iddfs()
+    << 返回搜索结果, 取消时返回 None | return SearchResult object, None when cancelled
     """
     # 警告: 典型的深度优先搜索是不完备的搜索算法, 在八数码问题中具有严重缺陷, 本函数仅供展示, 不可用于求解.
     # Warning: The typical depth-first search is an incomplete search algorithm, which has serious defects here.
@@ -398,99 +992,826 @@ def depth_first_search(start: 'Box', end: 'Box') -> None:
                   'The typical depth-first search is an incomplete search algorithm, which has serious defects here.\n'
                   'This function is only for demonstration and cannot be used for search.', SyntaxWarning)
     if input('\n是否仍要继续? (y/n) | continue? (y/n): ') not in ('y', 'Y', 'yes', 'Yes', 'YES', '是', '是的', '', ' '):
-        return
-    goal = end.value
-    print('->', start.history)
-    if start.value == goal:
-        print('起点已在目标状态 | start Box is already in target state')
-        print(start)
-        return
-
-    def _dfs(now: 'Box') -> None:
-        for next_layer in now.expand():
-            print('->', next_layer.history)
-            if next_layer.value == goal:
-                print(next_layer)
-                return
-            _dfs(next_layer)
-
-    _dfs(start)
+        return None
+    result = _prologue(start, end, trace, check=False)
+    if result is not None:
+        return result
+    return _stacked(start, end, (inf,), table_size, trace, sample, progress, interval, max_nodes, max_seconds)
 
 
-def depth_limited_search(start: 'Box', end: 'Box', limit: int) -> None:
+def depth_limited_search(start: 'Box', end: 'Box', limit: int, trace: Optional[Callable[[str, Any], None]] = None,
+                         sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                         interval: float = 1.0, max_nodes: Optional[int] = None,
+                         max_seconds: Optional[float] = None, table_size: int = 1 << 20) -> 'SearchResult':
     """
-    depth_limited_search(start: 'Box', end: 'Box', limit: int) -> None
+    depth_limited_search(start: 'Box', end: 'Box', limit: int, trace: Optional[Callable[[str, Any], None]] = None,
+                         sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                         interval: float = 1.0, max_nodes: Optional[int] = None,
+                         max_seconds: Optional[float] = None, table_size: int = 1 << 20) -> 'SearchResult'
 
     有限深度优先搜索 | depth limited search
     >> start: 起始九宫格对象 | start Box object
     >> end: 目标九宫格对象 | end Box object
     >> limit: 搜索深度限制 | search depth limit
+    >> trace: 事件接收器, 如 print_trace, 默认不输出 | event sink such as print_trace, silent by default
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    >> table_size: 见 iddfs() | see iddfs()
+    << 返回搜索结果 | return SearchResult object
     """
     # 警告: 有限深度优先搜索是不完备的搜索算法 | Warning: depth limited search is an incomplete search algorithm
     warnings.warn(
         '有限深度优先搜索是不完备的搜索算法 | depth limited search is an incomplete search algorithm', SyntaxWarning)
     if limit < 0:
         raise ValueError('深度限制不能小于 0 | depth limit cannot be less than 0')
-    goal = end.value
-    print('->', start.history)
-    if start.value == goal:
-        print('起点已在目标状态 | start Box is already in target state')
-        print(start)
-        return
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    return _stacked(start, end, (limit,), table_size, trace, sample, progress, interval, max_nodes, max_seconds)
 
-    def _dls(now: 'Box', depth: int) -> bool:
-        if depth == limit:
-            return False
-        for next_layer in now.expand():
-            print('->', next_layer.history)
-            if next_layer.value == goal:
-                print(next_layer)
-                return True
-            if _dls(next_layer, depth + 1):
-                return True
-        return False
 
-    if not _dls(start, 0):
-        print('未能在限定深度内找到解 | cannot find solution within the depth limit')
+def iterative_deepening_search(start: 'Box', end: 'Box', limit: Optional[int] = None,
+                               trace: Optional[Callable[[str, Any], None]] = None, sample: int = 1,
+                               progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                               interval: float = 1.0, max_nodes: Optional[int] = None,
+                               max_seconds: Optional[float] = None, table_size: int = 1 << 20) -> 'SearchResult':
+    """
+    iterative_deepening_search(start: 'Box', end: 'Box', limit: Optional[int] = None,
+                               trace: Optional[Callable[[str, Any], None]] = None, sample: int = 1,
+                               progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                               interval: float = 1.0, max_nodes: Optional[int] = None,
+                               max_seconds: Optional[float] = None, table_size: int = 1 << 20) -> 'SearchResult'
+
+    迭代加深深度优先搜索 | iterative deepening depth first search
+    以显式栈代替递归, 剪去撤销上一步的移动, 并以定长置换表记录每个状态出现过的最浅深度, 在各轮之间复用: 比最浅深度更深,
+    或在本轮同一深度再次出现的状态不再展开. 内存只有栈和置换表, 所得解为最优解.
+    uses an explicit stack instead of recursion, prunes the move undoing the previous one and keeps the shallowest
+    depth each state was seen at in a fixed size transposition table reused across iterations: a state deeper than
+    that, or seen again at the same depth in this iteration, is not expanded. memory is only the stack and the table,
+    and solutions are optimal.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> limit: 最大深度限制, 默认不限 | deepest limit, unlimited by default
+    >> trace: 事件接收器, 每轮报告一次深度限制 | event sink, reports the depth limit of every iteration
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    >> table_size: 置换表的条目数, 每条 16 字节, 0 为不使用 | entries of the transposition table, 16 bytes each,
+    >> 0 to disable
+    << 返回搜索结果, stats 中另有置换表剪去的节点数 'transpositions' 与被替换的条目数 'replaced'
+    << return SearchResult object, stats also hold 'transpositions', the nodes pruned by the table, and 'replaced',
+    << the entries replaced
+    """
+    if limit is not None and limit < 0:
+        raise ValueError('深度限制不能小于 0 | depth limit cannot be less than 0')
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    bounds = count(1) if limit is None else range(1, limit + 1)
+    if trace is not None:
+        bounds = (trace('bound', bound) or bound for bound in bounds)
+    return _stacked(start, end, bounds, table_size, trace, sample, progress, interval, max_nodes, max_seconds)
 
 
-def double_breadth_first_search(start: 'Box', end: 'Box') -> None:
+def double_breadth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None,
+                                sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                                interval: float = 1.0, max_nodes: Optional[int] = None,
+                                max_seconds: Optional[float] = None) -> 'SearchResult':
     """
-    double_breadth_first_search(start: 'Box', end: 'Box') -> None
+    double_breadth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None,
+                                sample: int = 1, progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                                interval: float = 1.0, max_nodes: Optional[int] = None,
+                                max_seconds: Optional[float] = None) -> 'SearchResult'
 
     双向宽度优先搜索 | double breadth first search
     >> start: 起始九宫格对象 | start Box object
     >> end: 目标九宫格对象 | end Box object
+    >> trace: 事件接收器, 如 print_trace, 默认不输出 | event sink such as print_trace, silent by default
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    << 返回搜索结果 | return SearchResult object
     """
-    goal = end.value
-    print('start ->', start.history)
-    if start.value == goal:
-        print('起点已在目标状态 | start Box is already in target state')
-        print(start)
-        return
-
-    def _dbfs(push: List['Box'], wait: List['Box'], forward: bool) -> None:
-        next_layer = []
-        for now in push:
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began = perf_counter()
+    expanded = generated = peak = duplicates = 0
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+
+    # 两个方向的前沿与已访问集合均以状态为键 | frontiers and visited sets of both directions are keyed by state
+    layers = {True: {start.state: start}, False: {end.state: end}}
+    seen = {True: dict(layers[True]), False: dict(layers[False])}
+    while layers[True] and layers[False]:
+        peak = max(peak, len(layers[True]) + len(layers[False]))
+        # 总是拓展较小的前沿 | always expand the smaller frontier
+        forward = len(layers[True]) <= len(layers[False])
+        push, wait = seen[forward], seen[not forward]
+        next_layer, meet = {}, None
+        for now in layers[forward].values():
+            expanded += 1
+            if monitor is not None and expanded & 1023 == 0 and monitor(
+                    expanded, generated, len(layers[True]) + len(layers[False]), duplicates):
+                stats = {'duplicates': duplicates, 'evaluations': 0}
+                monitor.stop(stats, _closest(start, end, layers[True].values()))
+                return _finish(start, None, expanded, generated, peak, began, trace, stats)
             for check in now.expand():
-                print('forward' if forward else 'reverse', '->', check.history)
-                for box in wait:
-                    if check.value == box.value:
-                        if not forward:
-                            check, box = box, check
-                        print('forward', check)
-                        print('reverse', box)
-                        reverse_replace = {
-                            'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
-                        reverse_history = ''.join(
-                            [reverse_replace[i] for i in box.history[::-1]])
-                        print('totally', Box(
-                            goal, check.history + reverse_history))
-                        return
-                next_layer.append(check)
-        _dbfs(wait, next_layer, not forward)
+                generated += 1
+                state = check.state
+                if state in push:
+                    duplicates += 1
+                    continue
+                if trace is not None and generated % sample == 0:
+                    trace('forward' if forward else 'reverse', check)
+                if state in wait:
+                    box = wait[state]
+                    length = len(check.history) + len(box.history)
+                    if meet is None or length < meet[0]:
+                        meet = (length, check, box)
+                push[state] = next_layer[state] = check
+        if meet is not None:
+            _, check, box = meet
+            if not forward:
+                check, box = box, check
+            reverse_replace = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+            reverse_history = ''.join(
+                [reverse_replace[i] for i in box.history[::-1]])
+            return _finish(start, Box(end.value, check.history + reverse_history), expanded, generated, peak,
+                           began, trace, {'duplicates': duplicates, 'evaluations': 0})
+        layers[forward] = next_layer
+    return _finish(start, None, expanded, generated, peak, began, trace, {'duplicates': duplicates, 'evaluations': 0})
+
+
+class _Buckets:
+    """小整数的计数桶, 支持增删和取最小值 | counting buckets of small ints supporting add, remove and least"""
+
+    __slots__ = ('counts', 'low')
+
+    def __init__(self) -> None:
+        self.counts = []
+        self.low = 0
+
+    def add(self, value: int) -> None:
+        if value >= len(self.counts):
+            self.counts.extend([0] * (value + 1 - len(self.counts)))
+        self.counts[value] += 1
+        if value < self.low:
+            self.low = value
+
+    def remove(self, value: int) -> None:
+        self.counts[value] -= 1
+
+    def least(self) -> float:
+        counts, low = self.counts, self.low
+        while low < len(counts) and not counts[low]:
+            low += 1
+        self.low = low
+        return low if low < len(counts) else inf
+
+
+def bidirectional_search(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                         trace: Optional[Callable[[str, Any], None]] = None, sample: int = 1,
+                         progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                         interval: float = 1.0, max_nodes: Optional[int] = None,
+                         max_seconds: Optional[float] = None) -> 'SearchResult':
+    """
+    bidirectional_search(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                         trace: Optional[Callable[[str, Any], None]] = None, sample: int = 1,
+                         progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                         interval: float = 1.0, max_nodes: Optional[int] = None,
+                         max_seconds: Optional[float] = None) -> 'SearchResult'
+
+    双向启发式搜索 (MM 算法) | bidirectional heuristic search (MM algorithm)
+    正向从 start, 反向从 end 出发, 各自以到对方根节点的启发值估价, 总是拓展优先级 max(f, 2g) 较小的一侧,
+    保证在中间相遇, 并在已知最短路径不超过下界时停止, 所得解为最优解.
+    searches forward from start and backward from end, each estimating toward the opposite root, always expands the
+    side with the smaller priority max(f, 2g) so the searches meet in the middle, and stops once the best known path
+    is no longer than the lower bound, so the solution is optimal.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> fn: 启发函数, 只估计剩余步数, 默认为曼哈顿距离 | heuristic function estimating remaining steps only,
+    >> manhattan distance by default
+    >> trace: 事件接收器, 正向与反向生成的节点分别报告为 'forward' 与 'reverse' | event sink, nodes generated
+    >> forward and backward are reported as 'forward' and 'reverse'
+    >> sample: 每生成 sample 个节点报告一次 | report one of every sample generated nodes
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    << 返回搜索结果 | return SearchResult object
+    """
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, size = perf_counter(), start.size
+    bits, moves = _bits(size), _moves(size)
+    mask = (1 << bits) - 1
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    fast = _Manhattan if fn is None else getattr(fn, 'fast', None)
+
+    def _heuristic(root: 'Box', goal: 'Box') -> Tuple[Callable[[int], int], Callable[..., int]]:
+        # 每个方向的启发值都指向对方的根节点 | heuristic of each direction points to the opposite root
+        if fast is not None:
+            heuristic = fast(root, goal)
+            return heuristic.evaluate, heuristic.update
+        begin, target = root.value, goal.value
+
+        def _evaluate(state: int) -> int:
+            return fn({'start': begin, 'end': target, 'now': _unpack(state, size), 'history': ''})
+
+        return _evaluate, lambda h, state, tile, src, dst: _evaluate(state)
+
+    # 每个方向: nodes 状态 -> (g, h, Box), opened 开放状态, 按 max(f, 2g) 排序的惰性删除堆, 以及开放节点的 f 与 g 计数
+    # per direction: nodes state -> (g, h, Box), opened open states, a lazy heap ordered by max(f, 2g), and counts of
+    # f and g over open nodes
+    sides = {}
+    for forward, root, goal in ((True, start, end), (False, end, start)):
+        evaluate, update = _heuristic(root, goal)
+        h = evaluate(root.state)
+        sides[forward] = {'nodes': {root.state: (0, h, root)}, 'opened': {root.state}, 'update': update,
+                          'pr': [(h, 0, root.state)], 'f': _Buckets(), 'g': _Buckets()}
+        sides[forward]['f'].add(h)
+        sides[forward]['g'].add(0)
+
+    def _head(side: dict) -> float:
+        # 弹出已失效的堆顶后返回最小优先级 | drop stale tops and return the least priority
+        queue, nodes, opened = side['pr'], side['nodes'], side['opened']
+        while queue:
+            _, g, state = queue[0]
+            if state in opened and nodes[state][0] == g:
+                return queue[0][0]
+            heappop(queue)
+        return inf
+
+    best, meet = inf, None
+    expanded = generated = peak = duplicates = 0
+    evaluations, cancelled = 2, False
+    while sides[True]['opened'] and sides[False]['opened']:
+        peak = max(peak, len(sides[True]['opened']) + len(sides[False]['opened']))
+        head = {True: _head(sides[True]), False: _head(sides[False])}
+        # 最优性条件: 已知最短路径不超过任一下界即可停止 | optimality condition: stop once no lower bound beats best
+        bound = max(min(head.values()), sides[True]['f'].least(), sides[False]['f'].least(),
+                    sides[True]['g'].least() + sides[False]['g'].least() + 1)
+        if best <= bound:
+            break
+        if head[True] != head[False]:
+            forward = head[True] < head[False]
+        else:
+            forward = len(sides[True]['opened']) <= len(sides[False]['opened'])
+        side, other = sides[forward], sides[not forward]
+        nodes, opened, update = side['nodes'], side['opened'], side['update']
+        state = heappop(side['pr'])[2]
+        opened.discard(state)
+        g, h, now = nodes[state]
+        side['f'].remove(g + h)
+        side['g'].remove(g)
+        zero, history = now._zero, now._history
+        expanded += 1
+        if monitor is not None and expanded & 1023 == 0 and monitor(
+                expanded, generated, len(sides[True]['opened']) + len(sides[False]['opened']), duplicates,
+                evaluations):
+            cancelled = True
+            break
+        g += 1
+        for move, to in moves[zero]:
+            generated += 1
+            child = _slide(state, zero, to, bits)
+            if child in nodes and nodes[child][0] <= g:
+                duplicates += 1
+                continue
+            if child in opened:
+                old = nodes[child]
+                side['f'].remove(old[0] + old[1])
+                side['g'].remove(old[0])
+            check = Box._make(child, to, (history, move), size)
+            if trace is not None and generated % sample == 0:
+                trace('forward' if forward else 'reverse', check)
+            evaluations += 1
+            value = update(h, child, (state >> (to * bits)) & mask, to, zero)
+            nodes[child] = (g, value, check)
+            opened.add(child)
+            heappush(side['pr'], (max(g + value, 2 * g), g, child))
+            side['f'].add(g + value)
+            side['g'].add(g)
+            if child in other['nodes'] and g + other['nodes'][child][0] < best:
+                best = g + other['nodes'][child][0]
+                meet = (check, other['nodes'][child][2]) if forward else (other['nodes'][child][2], check)
+    stats = {'duplicates': duplicates, 'evaluations': evaluations}
+    if cancelled:
+        forward = sides[True]['nodes']
+        monitor.stop(stats, _closest(start, end, (forward[state][2] for state in sides[True]['opened'])))
+    if meet is None or cancelled:
+        return _finish(start, None, expanded, generated, peak, began, trace, stats)
+    check, box = meet
+    reverse_replace = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+    reverse_history = ''.join([reverse_replace[i] for i in box.history[len(end.history):][::-1]])
+    return _finish(start, Box(end.value, check.history + reverse_history), expanded, generated, peak, began, trace,
+                   stats)
+
+
+def iterative_deepening_a_star(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                               trace: Optional[Callable[[str, Any], None]] = None,
+                               progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                               interval: float = 1.0, max_nodes: Optional[int] = None,
+                               max_seconds: Optional[float] = None) -> 'SearchResult':
+    """
+    iterative_deepening_a_star(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                               trace: Optional[Callable[[str, Any], None]] = None,
+                               progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                               interval: float = 1.0, max_nodes: Optional[int] = None,
+                               max_seconds: Optional[float] = None) -> 'SearchResult'
+
+    迭代加深 A* 搜索 | iterative deepening A* search
+    仅占用线性内存, 用显式栈代替递归, 对同一个棋盘编码加减增量来原地移牌和撤销, 并剪去撤销上一步的移动,
+    适用于十五数码和二十四数码.
+    uses linear memory, runs on an explicit stack instead of recursion, makes and unmakes moves in place by adding and
+    subtracting a delta on one board encoding and prunes the move undoing the previous one, suitable for 15-puzzle and
+    24-puzzle.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> fn: 启发函数, 只估计剩余步数, 默认为增量计算的曼哈顿距离 | heuristic function estimating remaining steps only,
+    >> incremental manhattan distance by default
+    >> trace: 事件接收器, 每轮报告一次阈值 | event sink, reports the bound of every iteration
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    << 返回搜索结果 | return SearchResult object
+    """
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, stats = perf_counter(), {}
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    deepening = _deepen(start, end, fn, stats, monitor)
+    try:
+        while True:
+            bound = next(deepening)
+            if trace is not None:
+                trace('bound', bound)
+    except StopIteration as solved:
+        box = Box(end.value, start.history + solved.value)
+    except _Cancelled:
+        box = None
+        monitor.stop(stats, stats.pop('partial'))
+    counters = {key: value for key, value in stats.items() if key not in ('expanded', 'generated', 'frontier')}
+    return _finish(start, box, stats['expanded'], stats['generated'], stats['frontier'], began, trace, counters)
+
+
+def _deepen(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]],
+            stats: Optional[Dict[str, int]] = None,
+            monitor: Optional['_Progress'] = None) -> Generator[int, None, str]:
+    """
+    迭代加深 A* 的核心: 逐轮产出阈值, 最终返回移动序列, 计数写入 stats, monitor 取消时抛出 _Cancelled
+    core of IDA*: yields each bound, returns the moves, writes counters into stats and raises _Cancelled when
+    monitor cancels
+    """
+    size = start.size
+    bits, moves, goal = _bits(size), _moves(size), end.state
+    mask = (1 << bits) - 1
+    reverse = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+    path = []
+    counter = [0, 0, 0]  # expanded, generated, duplicates
+    stats = {} if stats is None else stats
+    fast = _Manhattan if fn is None else getattr(fn, 'fast', None)
+    if fast is not None:
+        heuristic = fast(start, end)
+        _h = heuristic.update
+        h = heuristic.evaluate(start.state)
+    else:
+        begin, target, history = start.value, end.value, start.history
+
+        def _h(h: int, state: int, tile: int, src: int, dst: int) -> int:
+            return fn({'start': begin, 'end': target, 'now': _unpack(state, size),
+                       'history': history + ''.join(path)})
+
+        h = _h(0, start.state, 0, 0, 0)
+
+    def _ida(bound: int) -> int:
+        # 返回 -1 表示找到解, 否则返回超出阈值的最小 f 值 | -1 when solved, otherwise the least f beyond bound
+        if h > bound:
+            return h
+        state = start.state
+        if state == goal:
+            return -1
+        expanded, generated, duplicates = counter
+        expanded += 1
+        # 显式栈, 按深度预先分配: 空格位置, 启发值, 下一个移动的序号, 撤销上一步的移动, 进入该层时编码的增量
+        # explicit stack preallocated by depth: blank, heuristic value, next move index, undoing move and delta of
+        # the encoding when entering the frame
+        height = bound + 2
+        zeros, values, indices, backs, deltas = [start._zero] * height, [h] * height, [0] * height, [''] * height, \
+            [0] * height
+        del path[:]
+        path.extend([''] * height)
+        depth, least = 0, inf
+        try:
+            while True:
+                zero, index = zeros[depth], indices[depth]
+                options = moves[zero]
+                if index == len(options):
+                    if depth == 0:
+                        return least
+                    # 撤销进入该层时的移动, 清空的路径项在拼接时不占位置 | unmake the move entering this frame, cleared
+                    # path entries join as nothing
+                    state -= deltas[depth]
+                    path[depth] = ''
+                    depth -= 1
+                    continue
+                indices[depth] = index + 1
+                move, to = options[index]
+                if move == backs[depth]:
+                    duplicates += 1
+                    continue
+                generated += 1
+                # 原地移牌: 只对同一个编码加上增量 | make the move in place by adding a delta to the one encoding
+                tile = (state >> (to * bits)) & mask
+                delta = (tile << (zero * bits)) - (tile << (to * bits))
+                state += delta
+                path[depth] = move
+                value = _h(values[depth], state, tile, to, zero)
+                f = depth + 1 + value
+                if f > bound:
+                    if f < least:
+                        least = f
+                    state -= delta
+                    continue
+                depth += 1
+                if state == goal:
+                    del path[depth:]
+                    return -1
+                expanded += 1
+                if monitor is not None and expanded & 1023 == 0 and monitor(
+                        expanded, generated, depth + 1, duplicates, generated + 1):
+                    stats.update(expanded=expanded, generated=generated, frontier=depth + 1,
+                                 partial=''.join(path[:depth]))
+                    raise _Cancelled
+                zeros[depth], values[depth], indices[depth], backs[depth], deltas[depth] = \
+                    to, value, 0, reverse[move], delta
+        finally:
+            counter[:] = expanded, generated, duplicates
+
+    bound = h
+    while True:
+        stats.update(expanded=counter[0], generated=counter[1], frontier=bound + 1, duplicates=counter[2],
+                     evaluations=counter[1] + 1)
+        yield bound
+        bound = _ida(bound)
+        if bound < 0:
+            stats.update(expanded=counter[0], generated=counter[1], frontier=len(path) + 1, duplicates=counter[2],
+                         evaluations=counter[1] + 1)
+            return ''.join(path)
+
+
+class _Node:
+    """内存受限搜索的节点 | node of memory bounded search"""
+
+    __slots__ = ('state', 'zero', 'g', 'h', 'f', 'parent', 'move', 'children', 'forgotten', 'version')
+
+    def __init__(self, state: int, zero: int, g: int, h: int, f: float, parent: Optional['_Node'],
+                 move: str) -> None:
+        self.state = state
+        self.zero = zero
+        self.g = g
+        self.h = h
+        self.f = f
+        self.parent = parent
+        self.move = move
+        self.children = {}  # 移动 -> 仍在内存中的子节点 | move -> child still in memory
+        self.forgotten = inf  # 已丢弃子节点的最小 f 值 | least f of dropped children
+        self.version = 0  # 不在开放表中时为偶数 | even while not open
+
+
+def memory_bounded_search(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                          memory: int = 100000, memory_bytes: Optional[int] = None,
+                          trace: Optional[Callable[[str, Any], None]] = None,
+                          progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                          interval: float = 1.0, max_nodes: Optional[int] = None,
+                          max_seconds: Optional[float] = None) -> 'SearchResult':
+    """
+    memory_bounded_search(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                          memory: int = 100000, memory_bytes: Optional[int] = None,
+                          trace: Optional[Callable[[str, Any], None]] = None,
+                          progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                          interval: float = 1.0, max_nodes: Optional[int] = None,
+                          max_seconds: Optional[float] = None) -> 'SearchResult'
+
+    内存受限的最佳优先搜索 (SMA* 算法) | memory bounded best first search (SMA* algorithm)
+    内存中的节点数达到上限时丢弃 f 值最大且最浅的叶节点, 并把它的 f 值记在父节点上, 父节点重新进入开放表,
+    需要时再重新生成被丢弃的子节点. 启发函数可采纳且内存能容纳最优路径时所得解为最优解; 开放表中最小的 f 值
+    达到 memory 时内存已装不下任何解, 搜索停止且 stats['exhausted'] 为 'memory'. memory 只略大于解的步数时,
+    搜索可能要反复丢弃和重新生成大量较短的路径才能停止, 宜同时给出 max_nodes 或 max_seconds.
+    once the nodes in memory reach the limit, the shallowest leaf with the largest f is dropped and its f is kept on
+    the parent, which goes back into the open list and regenerates the dropped children when needed. the solution
+    is optimal when the heuristic is admissible and memory holds the optimal path; once the least f in the open list
+    reaches memory no solution fits in memory, so the search stops with stats['exhausted'] set to 'memory'. when
+    memory is only a little above the solution depth, the search may drop and regenerate many shorter paths before
+    it stops, so pass max_nodes or max_seconds as well.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> fn: 启发函数, 只估计剩余步数, 默认为增量计算的曼哈顿距离 | heuristic function estimating remaining steps only,
+    >> incremental manhattan distance by default
+    >> memory: 内存中最多保存的节点数 | most nodes kept in memory
+    >> memory_bytes: 给出时按每个节点的估计大小换算为 memory | converted into memory by the estimated size of a node
+    >> when given
+    >> trace: 事件接收器, 仅报告开始与结束 | event sink, reports start and finish only
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search() | see search()
+    >> max_seconds: 见 search() | see search()
+    << 返回搜索结果, stats 中另有 'pruned' 与 'memory' | return SearchResult object with 'pruned' and 'memory' in stats
+    """
+    if memory_bytes is not None:
+        # 节点本身, 子节点字典, 状态整数, 以及两个堆中的条目 | the node, its children dict, the state int, and the
+        # entries in both heaps
+        sample = _Node(start.state, 0, 0, 0, 0, None, '')
+        memory = memory_bytes // (sys.getsizeof(sample) + sys.getsizeof(sample.children) +
+                                  sys.getsizeof(start.state) + 2 * sys.getsizeof((0, 0, 0, 0, sample)))
+    if memory < 2:
+        raise ValueError('内存上限至少为 2 个节点 | memory must hold at least 2 nodes')
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, size, goal = perf_counter(), start.size, end.state
+    bits, moves = _bits(size), _moves(size)
+    mask = (1 << bits) - 1
+    reverse = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L', '': ''}
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    fast = _Manhattan if fn is None else getattr(fn, 'fast', None)
+    if fast is not None:
+        heuristic = fast(start, end)
+        evaluate, update = heuristic.evaluate, heuristic.update
+    else:
+        begin, target = start.value, end.value
+
+        def evaluate(state: int) -> int:
+            return fn({'start': begin, 'end': target, 'now': _unpack(state, size), 'history': ''})
+
+        def update(h: int, state: int, tile: int, src: int, dst: int) -> int:
+            return evaluate(state)
+
+    # 两个惰性删除堆: best 取 f 最小且最深的节点, worst 取 f 最大且最浅的节点; 条目的版本号过期即失效
+    # two lazy heaps: best yields the deepest node with the least f, worst the shallowest with the largest f;
+    # entries with a stale version are void
+    best, worst, order = [], [], count()
+
+    def _open(node: '_Node', key: float) -> None:
+        node.version += 1 if node.version & 1 == 0 else 2
+        heappush(best, (key, -node.g, next(order), node.version, node))
+        heappush(worst, (-key, node.g, next(order), node.version, node))
+
+    def _close(node: '_Node') -> None:
+        node.version += 1 if node.version & 1 else 0
+
+    def _compact() -> None:
+        # 过期条目过多时重建两个堆, 使其大小与内存中的节点数成正比 | rebuild both heaps once stale entries pile up,
+        # keeping them proportional to the nodes in memory
+        for heap in (best, worst):
+            heap[:] = [entry for entry in heap if entry[3] == entry[4].version]
+            heapify(heap)
+
+    def _path(node: '_Node') -> str:
+        path = []
+        while node.parent is not None:
+            path.append(node.move)
+            node = node.parent
+        return ''.join(reversed(path))
+
+    h = evaluate(start.state)
+    root = _Node(start.state, start._zero, 0, h, h, None, '')
+    _open(root, h)
+    used = peak = 1
+    expanded = generated = duplicates = pruned = 0
+    evaluations, found, stopped, short = 1, None, False, False
+    while best:
+        key, _, _, version, node = heappop(best)
+        if version != node.version:
+            continue
+        # 启发函数可采纳时, 任何解至少有 key 步, 需要 key + 1 个节点, 内存装不下则不必再搜
+        # with an admissible heuristic every solution takes at least key moves and key + 1 nodes, so stop once
+        # memory cannot hold that
+        if key >= memory:
+            short = True
+            _open(node, key)
+            break
+        if node.state == goal:
+            found = node
+            break
+        _close(node)
+        expanded += 1
+        if monitor is not None and expanded & 1023 == 0 and monitor(expanded, generated, used, duplicates,
+                                                                    evaluations):
+            stopped = True
+            _open(node, key)
+            break
+        # 生成所有不在内存中的子节点, 子节点的 f 值不小于父节点 (pathmax) | generate every child not in memory, with
+        # f no less than the parent's (pathmax)
+        state, zero, g = node.state, node.zero, node.g + 1
+        back = reverse[node.move]
+        for move, to in moves[zero]:
+            if move == back:
+                duplicates += 1
+                continue
+            if move in node.children:
+                continue
+            generated += 1
+            evaluations += 1
+            tile = (state >> (to * bits)) & mask
+            child = state - (tile << (to * bits)) + (tile << (zero * bits))
+            value = update(node.h, child, tile, to, zero)
+            # 内存装不下更深的路径 | memory cannot hold any deeper path
+            f = inf if g >= memory - 1 and child != goal else max(g + value, node.f)
+            node.children[move] = check = _Node(child, to, g, value, f, node, move)
+            _open(check, f)
+            used += 1
+        node.forgotten = inf
+        # 将子节点的最小 f 值回传给祖先 | back the least f of the children up to the ancestors
+        while node is not None:
+            f = min([child.f for child in node.children.values()] + [node.forgotten])
+            if f == node.f:
+                break
+            node.f, node = f, node.parent
+        peak = max(peak, used)
+        while used > memory and worst:
+            _, _, _, version, leaf = heappop(worst)
+            if version != leaf.version or leaf.children or leaf.parent is None:
+                continue
+            _close(leaf)
+            parent = leaf.parent
+            del parent.children[leaf.move]
+            parent.forgotten = min(parent.forgotten, leaf.f)
+            _open(parent, parent.forgotten)
+            used -= 1
+            pruned += 1
+        if len(best) > 4 * used + 64:
+            _compact()
+    stats = {'duplicates': duplicates, 'evaluations': evaluations, 'pruned': pruned, 'memory': memory}
+    if stopped or short:
+        leaves = [entry[4] for entry in best if entry[3] == entry[4].version]
+        partial = _path(min(leaves, key=lambda leaf: (leaf.h, leaf.g)))
+        if stopped:
+            monitor.stop(stats, partial)
+        else:
+            stats.update(exhausted='memory', partial=partial)
+    box = None if found is None else Box(end.value, start.history + _path(found))
+    return _finish(start, box, expanded, generated, peak, began, trace, stats)
 
-    _dbfs([start], [end], True)
+
+def anytime_search(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None, w: float = 3.0,
+                   decrease: float = 0.5, trace: Optional[Callable[[str, Any], None]] = None,
+                   progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None, interval: float = 1.0,
+                   max_nodes: Optional[int] = None,
+                   max_seconds: Optional[float] = None) -> Generator['SearchResult', None, None]:
+    """
+    anytime_search(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None, w: float = 3.0,
+                   decrease: float = 0.5, trace: Optional[Callable[[str, Any], None]] = None,
+                   progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None, interval: float = 1.0,
+                   max_nodes: Optional[int] = None,
+                   max_seconds: Optional[float] = None) -> Generator['SearchResult', None, None]
+
+    随时可停的加权 A* 搜索 (ARA* 算法) | anytime weighted A* search (ARA* algorithm)
+    先以权重 w 快速求出一个解, 之后每轮将权重减小 decrease 并继续改进, 沿用已有的 g 值与搜索树, 只重新排序开放表,
+    并把本轮中变优的已关闭节点留到下一轮. 每找到更好的解或证明了更紧的界便产出一次结果, 界降到 1 时即为最优解.
+    first finds a solution quickly with weight w, then lowers the weight by decrease every round and keeps improving,
+    reusing the g values and search tree, only reordering the open list and deferring closed nodes improved within a
+    round to the next one. a result is yielded for every better solution or tighter bound, and the solution is
+    optimal once the bound reaches 1.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> fn: 启发函数, 只估计剩余步数, 默认为增量计算的曼哈顿距离 | heuristic function estimating remaining steps only,
+    >> incremental manhattan distance by default
+    >> w: 初始权重 | initial weight
+    >> decrease: 每轮权重的减小量 | decrease of the weight per round
+    >> trace: 事件接收器, 每产出一个解报告一次 | event sink, reports every solution yielded
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search(), 用尽时停止改进 | see search(), improvement stops once it is used up
+    >> max_seconds: 见 search(), 用尽时停止改进 | see search(), improvement stops once it is used up
+    << 逐个产出搜索结果, stats 中另有本轮的权重 'w' 与解的次优界 'bound' (解的步数不超过最优解的 bound 倍)
+    << yield SearchResult objects with the weight of the round 'w' and the suboptimality bound 'bound' in stats
+    << (the solution is at most bound times the optimum)
+    """
+    if w < 1:
+        raise ValueError('权重不能小于 1 | weight cannot be less than 1')
+    if decrease <= 0:
+        raise ValueError('权重的减小量必须为正 | decrease must be positive')
+    result = _prologue(start, end, trace)
+    if result is not None:
+        result.stats.update(w=w, bound=1.0)
+        yield result
+        return
+    began, size, goal = perf_counter(), start.size, end.state
+    bits, moves = _bits(size), _moves(size)
+    mask = (1 << bits) - 1
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    fast = _Manhattan if fn is None else getattr(fn, 'fast', None)
+    if fast is not None:
+        heuristic = fast(start, end)
+        evaluate, update = heuristic.evaluate, heuristic.update
+    else:
+        begin, target = start.value, end.value
+
+        def evaluate(state: int) -> int:
+            return fn({'start': begin, 'end': target, 'now': _unpack(state, size), 'history': ''})
+
+        def update(h: int, state: int, tile: int, src: int, dst: int) -> int:
+            return evaluate(state)
+
+    # nodes: 状态 -> [g, h, 空格位置, 父状态, 移动]; opened 开放状态, 惰性删除堆按 g + w * h 排序, 较深者优先;
+    # closed 本轮已关闭的状态, waiting 本轮关闭后又变优的状态
+    # nodes: state -> [g, h, blank, parent state, move]; opened open states in a lazy heap ordered by g + w * h,
+    # deeper first; closed states closed in this round, waiting states improved after being closed in this round
+    h = evaluate(start.state)
+    nodes = {start.state: [0, h, start._zero, None, '']}
+    opened, closed, waiting = {start.state}, set(), set()
+    front = [(w * h, 0, start.state)]
+    expanded = generated = peak = duplicates = 0
+    evaluations, stopped, reported, proven = 1, False, None, inf
+
+    def _path(state: int) -> str:
+        path = []
+        while state != start.state:
+            _, _, _, state, move = nodes[state]
+            path.append(move)
+        return ''.join(reversed(path))
+
+    while True:
+        # 改进当前的解, 直到目标的代价不大于开放表中的最小键 | improve until the goal costs no more than the least key
+        while front:
+            key, g, state = front[0]
+            if state not in opened or nodes[state][0] != -g:
+                heappop(front)
+                continue
+            if goal in nodes and nodes[goal][0] <= key:
+                break
+            heappop(front)
+            opened.discard(state)
+            closed.add(state)
+            g, h, zero = nodes[state][:3]
+            expanded += 1
+            if monitor is not None and expanded & 1023 == 0 and monitor(
+                    expanded, generated, len(opened), duplicates, evaluations):
+                # 未拓展的节点放回开放表, 以免次优界偏小 | put the unexpanded node back so the bound stays sound
+                closed.discard(state)
+                opened.add(state)
+                stopped = True
+                break
+            g += 1
+            for move, to in moves[zero]:
+                generated += 1
+                tile = (state >> (to * bits)) & mask
+                child = state - (tile << (to * bits)) + (tile << (zero * bits))
+                node = nodes.get(child)
+                if node is not None and node[0] <= g:
+                    duplicates += 1
+                    continue
+                if node is None:
+                    evaluations += 1
+                    node = nodes[child] = [g, update(h, child, tile, to, zero), to, state, move]
+                else:
+                    node[0], node[3], node[4] = g, state, move
+                if child in closed:
+                    waiting.add(child)
+                else:
+                    opened.add(child)
+                    heappush(front, (g + w * node[1], -g, child))
+            peak = max(peak, len(opened))
+        # 次优界: 目标的代价除以所有未关闭节点 g + h 的最小值 | suboptimality bound: cost of the goal over the least
+        # g + h of every node not closed
+        least = min((nodes[state][0] + nodes[state][1] for state in chain(opened, waiting)), default=inf)
+        cost = nodes[goal][0] if goal in nodes else inf
+        # 只有完成的一轮才保证解不超过最优解的 w 倍 | only a finished round guarantees the solution within w times
+        # the optimum
+        if not stopped:
+            proven = w
+        bound = 1.0 if cost <= least else min(proven, cost / least)
+        if cost < inf and (reported is None or (cost, bound) < reported):
+            reported = (cost, bound)
+            stats = {'duplicates': duplicates, 'evaluations': evaluations, 'w': w, 'bound': bound}
+            if stopped:
+                monitor.stop(stats)
+            yield _finish(start, Box(end.value, start.history + _path(goal)), expanded, generated, peak, began,
+                          trace, stats)
+        elif stopped and reported is None:
+            stats = {'duplicates': duplicates, 'evaluations': evaluations, 'w': w, 'bound': inf}
+            monitor.stop(stats, _path(min(opened, key=lambda state: (nodes[state][1], nodes[state][0]))))
+            yield _finish(start, None, expanded, generated, peak, began, trace, stats)
+        if stopped or bound <= 1 or not front and not waiting:
+            return
+        # 减小权重, 把变优的已关闭节点并入开放表并按新权重重排 | lower the weight, merge the improved closed nodes
+        # into the open list and reorder it by the new weight
+        w = max(1.0, w - decrease)
+        opened |= waiting
+        waiting, closed = set(), set()
+        front = [(nodes[state][0] + w * nodes[state][1], -nodes[state][0], state) for state in opened]
+        heapify(front)
 
 
 def lowest_step(task: dict) -> int:
@@ -517,8 +1838,8 @@ def most_at_place(task: dict) -> int:
     >> task: 用于完成评估的基本信息 | basic information for evaluation
     << 评估得出的搜索代价 | evaluation result of search cost
     """
-    s = 9
-    for i in range(9):
+    s = len(task['now'])
+    for i in range(s):
         if task['now'][i] == task['end'][i]:
             s -= 1
     return s
@@ -534,13 +1855,363 @@ def manhattan_distance(task: dict) -> int:
     >> task: 用于完成评估的基本信息 | basic information for evaluation
     << 评估得出的搜索代价 | evaluation result of search cost
     """
-    s = 0
-    for i in range(1, 9):
+    s, size = 0, int(len(task['now']) ** 0.5 + 0.5)
+    for i in range(1, len(task['now'])):
         now, goal = task['now'].index(i), task['end'].index(i)
-        s += abs(now // 3 - goal // 3) + abs(now % 3 - goal % 3)
+        s += abs(now // size - goal // size) + abs(now % size - goal % size)
     return s
 
 
+def linear_conflict(task: dict) -> int:
+    """
+    linear_conflict(task: dict) -> int
+
+    为 search() 函数构建的估价函数 (fn): 曼哈顿距离加线性冲突 | heuristic function (fn) for search(): manhattan
+    distance plus linear conflicts
+    同一行 (列) 中目标也在该行 (列) 却次序颠倒的数字, 至少有一个要离开再回来, 每个多走 2 步. 每行 (列) 须移出的
+    最少数字个数预先算入查找表.
+    tiles in a row (column) whose goal is in the same row (column) but in reversed order force at least one of them
+    to leave and come back, 2 extra moves each. the least number of tiles to move out of every row (column) is
+    precomputed into a lookup table.
+    >> task: 用于完成评估的基本信息 | basic information for evaluation
+    << 评估得出的搜索代价 | evaluation result of search cost
+    """
+    size = int(len(task['now']) ** 0.5 + 0.5)
+    return _evaluator(_LinearConflict, task['end']).evaluate(_pack(task['now'], _bits(size)))
+
+
+def walking_distance(task: dict) -> int:
+    """
+    walking_distance(task: dict) -> int
+
+    为 search() 函数构建的估价函数 (fn): 行走距离 | heuristic function (fn) for search(): walking distance
+    只看每行中各数字分别来自目标中的哪一行, 空格每次上下移动把一个数字换到相邻行, 所需的最少次数即为纵向行走距离;
+    横向同理, 两者之和为估价. 两张距离表由宽度优先搜索生成, 每种边长和空格位置只生成一次.
+    counting only which goal row the tiles in every row come from, each vertical move of the blank swaps one tile
+    into the adjacent row and the least number of such moves is the vertical walking distance; the horizontal one
+    is alike and the sum is the estimate. both distance tables come from a breadth first search, built once per
+    board size and blank position.
+    >> task: 用于完成评估的基本信息 | basic information for evaluation
+    << 评估得出的搜索代价 | evaluation result of search cost
+    """
+    size = int(len(task['now']) ** 0.5 + 0.5)
+    return _evaluator(_WalkingDistance, task['end']).evaluate(_pack(task['now'], _bits(size)))
+
+
+class FastHeuristic:
+    """
+    FastHeuristic(start: 'Box', end: 'Box') -> 'FastHeuristic'
+
+    快速启发函数接口 | fast heuristic interface
+    直接读取九宫格的紧凑编码, 并可由父节点的值和被移动的数字增量更新. 估价函数 fn 带有 fn.fast 属性
+    (以 fn.fast(start, end) 构造 FastHeuristic 对象) 时, search() 与 ida() 会自动使用这一接口, 否则按 task 字典调用 fn.
+    reads the compact encoding directly and may update incrementally from the parent value and the moved tile.
+    search() and ida() use this interface automatically when fn has a fn.fast attribute (fn.fast(start, end) builds
+    a FastHeuristic object), otherwise fn is called with the task dict.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    """
+
+    # 搜索代价中已走步数的系数 | weight of the steps taken in the search cost
+    g = 0
+
+    def __init__(self, start: 'Box', end: 'Box') -> None:
+        self.size = end.size
+        self.bits = _bits(end.size)
+        self.goal = end.value
+
+    def evaluate(self, state: int) -> int:
+        """
+        'FastHeuristic'.evaluate(state: int) -> int
+
+        由紧凑编码完整计算启发值 | compute heuristic value from the compact encoding
+        >> state: 九宫格对象的紧凑编码 | compact encoding of Box object
+        << 返回启发值 | return heuristic value
+        """
+        raise NotImplementedError
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        """
+        'FastHeuristic'.update(h: int, state: int, tile: int, src: int, dst: int) -> int
+
+        数字 tile 由 src 移到 dst (空格反向移动) 后的启发值, 默认重新计算
+        heuristic value after tile moves from src to dst (blank moves back), recomputed by default
+        >> h: 父节点的启发值 | heuristic value of parent
+        >> state: 子节点的紧凑编码 | compact encoding of child
+        >> tile: 被移动的数字 | moved tile
+        >> src: 移动前的位置 | position before the move
+        >> dst: 移动后的位置 | position after the move
+        << 返回子节点的启发值 | return heuristic value of child
+        """
+        return self.evaluate(state)
+
+
+class _Steps(FastHeuristic):
+    g = 1
+
+    def evaluate(self, state: int) -> int:
+        return 0
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        return 0
+
+
+class _Misplaced(FastHeuristic):
+
+    def evaluate(self, state: int) -> int:
+        bits, mask = self.bits, (1 << self.bits) - 1
+        return sum((state >> (i * bits)) & mask != tile for i, tile in enumerate(self.goal))
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        goal = self.goal
+        return h + (goal[dst] != tile) + (goal[src] != 0) - (goal[src] != tile) - (goal[dst] != 0)
+
+
+class _Manhattan(FastHeuristic):
+
+    def __init__(self, start: 'Box', end: 'Box') -> None:
+        super().__init__(start, end)
+        size, cells = self.size, len(self.goal)
+        # cost[tile][pos]: 数字 tile 位于 pos 时到目标位置的曼哈顿距离 | manhattan distance of tile at pos to its goal
+        self.cost = cost = [[0] * cells for _ in range(cells)]
+        for goal, tile in enumerate(self.goal):
+            if tile:
+                cost[tile] = [abs(pos // size - goal // size) + abs(pos % size - goal % size) for pos in range(cells)]
+
+    def evaluate(self, state: int) -> int:
+        bits, mask, cost = self.bits, (1 << self.bits) - 1, self.cost
+        return sum(cost[(state >> (pos * bits)) & mask][pos] for pos in range(len(self.goal)))
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        cost = self.cost[tile]
+        return h - cost[src] + cost[dst]
+
+
+_CONFLICTS = {}
+
+
+def _conflicts(size: int) -> List[int]:
+    """
+    线性冲突查找表: 一行 (列) 的编码为各位置上数字的目标列 (行) 号, 不属于该行 (列) 的数字记为 size, 按 size + 1
+    进制排列; 表值为须移出的最少数字个数的 2 倍, 即数字个数减去最长递增子序列的长度
+    linear conflict table: a row (column) is encoded by the goal column (row) of the tile at every position, size
+    for tiles not belonging to it, in base size + 1; the value is twice the least number of tiles to move out, i.e.
+    the number of tiles minus the longest increasing subsequence
+    """
+    table = _CONFLICTS.get(size)
+    if table is None:
+        base, table = size + 1, []
+        for code in range(base ** size):
+            digits = [code // base ** i % base for i in range(size)]
+            goals = [digit for digit in digits if digit != size]
+            longest = [1] * len(goals)
+            for i in range(len(goals)):
+                for j in range(i):
+                    if goals[j] < goals[i] and longest[j] + 1 > longest[i]:
+                        longest[i] = longest[j] + 1
+            table.append(2 * (len(goals) - max(longest, default=0)))
+        _CONFLICTS[size] = table
+    return table
+
+
+class _LinearConflict(_Manhattan):
+
+    def __init__(self, start: 'Box', end: 'Box') -> None:
+        super().__init__(start, end)
+        size, cells, base = self.size, len(self.goal), self.size + 1
+        self.table = _conflicts(size)
+        place = {tile: pos for pos, tile in enumerate(self.goal)}
+        # weights[pos][tile]: 数字位于 pos 时对所在行, 列编码的贡献 | share of tile at pos in the code of its row, column
+        self.row_weights = [[0] * cells for _ in range(cells)]
+        self.column_weights = [[0] * cells for _ in range(cells)]
+        for pos in range(cells):
+            row, column = divmod(pos, size)
+            for tile in range(cells):
+                goal_row, goal_column = divmod(place[tile], size)
+                self.row_weights[pos][tile] = (goal_column if tile and goal_row == row else size) * base ** column
+                self.column_weights[pos][tile] = (goal_row if tile and goal_column == column else size) * base ** row
+        self.rows = [range(row * size, row * size + size) for row in range(size)]
+        self.columns = [range(column, cells, size) for column in range(size)]
+
+    def _code(self, state: int, cells: range, weights: List[List[int]]) -> int:
+        bits, mask = self.bits, (1 << self.bits) - 1
+        return sum(weights[pos][(state >> (pos * bits)) & mask] for pos in cells)
+
+    def evaluate(self, state: int) -> int:
+        table = self.table
+        return super().evaluate(state) + sum(
+            table[self._code(state, cells, self.row_weights)] for cells in self.rows) + sum(
+            table[self._code(state, cells, self.column_weights)] for cells in self.columns)
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        # 只有经过 src 或 dst 且编码改变的线才需重算, 父节点的编码由子节点的编码差量得出 | only lines through src or
+        # dst whose code changes are recomputed, and the code of the parent follows from the child's by the difference
+        size, table = self.size, self.table
+        h += self.cost[tile][dst] - self.cost[tile][src]
+        for weights, lines, before, after in ((self.row_weights, self.rows, src // size, dst // size),
+                                              (self.column_weights, self.columns, src % size, dst % size)):
+            left = weights[src][0] - weights[src][tile]
+            arrived = weights[dst][tile] - weights[dst][0]
+            changes = ((before, left + arrived),) if before == after else ((before, left), (after, arrived))
+            for index, delta in changes:
+                if delta:
+                    code = self._code(state, lines[index], weights)
+                    h += table[code] - table[code - delta]
+        return h
+
+
+_WALKING = {}
+
+
+def _walking(size: int, blank: int) -> Dict[int, int]:
+    """
+    行走距离表: 状态为 counts[i][j] (第 i 行中目标在第 j 行的数字个数) 与空格所在行, 编码为 size + 1 进制的整数,
+    由目标状态出发宽度优先搜索得到到目标的步数; 列的情形转置后相同
+    walking distance table: a state is counts[i][j] (tiles in row i whose goal is in row j) and the blank row,
+    encoded as an integer in base size + 1, with the distance found by breadth first search from the goal; columns
+    are the same after transposition
+    """
+    table = _WALKING.get((size, blank))
+    if table is None:
+        base = size + 1
+        counts = [size if i == j else 0 for i in range(size) for j in range(size)]
+        counts[blank * size + blank] -= 1
+        root = (tuple(counts), blank)
+
+        def _code(counts: Tuple[int, ...], row: int) -> int:
+            return sum(count * base ** i for i, count in enumerate(counts)) + row * base ** (size * size)
+
+        table = {_code(*root): 0}
+        layer, distance = [root], 0
+        while layer:
+            distance += 1
+            following = []
+            for counts, row in layer:
+                for near in (row - 1, row + 1):
+                    if not 0 <= near < size:
+                        continue
+                    for goal in range(size):
+                        # 相邻行中目标在 goal 行的一个数字换到空格所在行 | a tile of goal row goal moves in from near
+                        if counts[near * size + goal]:
+                            moved = list(counts)
+                            moved[near * size + goal] -= 1
+                            moved[row * size + goal] += 1
+                            moved = tuple(moved)
+                            code = _code(moved, near)
+                            if code not in table:
+                                table[code] = distance
+                                following.append((moved, near))
+            layer = following
+        _WALKING[size, blank] = table
+    return table
+
+
+class _WalkingDistance(FastHeuristic):
+
+    def __init__(self, start: 'Box', end: 'Box') -> None:
+        super().__init__(start, end)
+        size, cells, base = self.size, len(self.goal), self.size + 1
+        place = {tile: pos for pos, tile in enumerate(self.goal)}
+        self.vertical = _walking(size, place[0] // size)
+        self.horizontal = _walking(size, place[0] % size)
+        # weights[pos][tile]: 数字位于 pos 时对编码的贡献, 空格贡献其所在的行 (列) | share of tile at pos in the code,
+        # the blank adds its row (column)
+        blank = base ** (size * size)
+        self.rows = [[0] * cells for _ in range(cells)]
+        self.columns = [[0] * cells for _ in range(cells)]
+        for pos in range(cells):
+            row, column = divmod(pos, size)
+            for tile in range(cells):
+                goal_row, goal_column = divmod(place[tile], size)
+                self.rows[pos][tile] = base ** (row * size + goal_row) if tile else row * blank
+                self.columns[pos][tile] = base ** (column * size + goal_column) if tile else column * blank
+
+    def _codes(self, state: int) -> Tuple[int, int]:
+        bits, mask, rows, columns = self.bits, (1 << self.bits) - 1, self.rows, self.columns
+        vertical = horizontal = 0
+        for pos in range(len(self.goal)):
+            tile = (state >> (pos * bits)) & mask
+            vertical += rows[pos][tile]
+            horizontal += columns[pos][tile]
+        return vertical, horizontal
+
+    def evaluate(self, state: int) -> int:
+        vertical, horizontal = self._codes(state)
+        return self.vertical[vertical] + self.horizontal[horizontal]
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        # 上下移动只改变纵向距离, 左右移动只改变横向距离; 父节点的编码由子节点的编码差量得出
+        # vertical moves only change the vertical distance and horizontal moves the horizontal one; the code of the
+        # parent follows from the child's by the difference
+        bits, mask = self.bits, (1 << self.bits) - 1
+        if src // self.size != dst // self.size:
+            weights, table = self.rows, self.vertical
+        else:
+            weights, table = self.columns, self.horizontal
+        code = sum(weights[pos][(state >> (pos * bits)) & mask] for pos in range(len(self.goal)))
+        parent = code - weights[dst][tile] - weights[src][0] + weights[src][tile] + weights[dst][0]
+        return h - table[parent] + table[code]
+
+
+_EVALUATORS = {}
+
+
+def _evaluator(kind: type, end: List[int]) -> 'FastHeuristic':
+    """按目标缓存的快速接口对象, 供按 task 字典调用的估价函数使用 | fast interface object cached by end, for
+    heuristic functions called with the task dict"""
+    key = (kind, tuple(end))
+    heuristic = _EVALUATORS.get(key)
+    if heuristic is None:
+        box = Box(list(end))
+        heuristic = _EVALUATORS[key] = kind(box, box)
+    return heuristic
+
+
+lowest_step.fast = _Steps
+most_at_place.fast = _Misplaced
+manhattan_distance.fast = _Manhattan
+linear_conflict.fast = _LinearConflict
+walking_distance.fast = _WalkingDistance
+
+
+class _Sum(FastHeuristic):
+
+    def __init__(self, start: 'Box', end: 'Box', parts: Sequence[FastHeuristic]) -> None:
+        super().__init__(start, end)
+        self.g = sum(part.g for part in parts)
+        self.parts = [part for part in parts if not isinstance(part, _Steps)]
+
+    def evaluate(self, state: int) -> int:
+        return sum(part.evaluate(state) for part in self.parts)
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        # 只有一项随状态变化时可以增量更新 | incremental only when a single part depends on the state
+        if len(self.parts) == 1:
+            return self.parts[0].update(h, state, tile, src, dst)
+        return self.evaluate(state)
+
+
+def combine(*fns: Callable[[Dict[str, any]], int]) -> Callable[[Dict[str, any]], int]:
+    """
+    combine(*fns: Callable[[Dict[str, any]], int]) -> Callable[[Dict[str, any]], int]
+
+    将多个估价函数相加为一个新的估价函数, 各项都支持快速接口时结果也支持
+    sum several heuristic functions into a new one, which supports the fast interface when all parts do
+    例如 combine(ls, mhd) 即为 A* 搜索的 f = g + h.
+    e.g. combine(ls, mhd) is f = g + h of A* search.
+    >> fns: 估价函数 | heuristic functions
+    << 返回相加后的估价函数 | return summed heuristic function
+    """
+
+    def combined(task: dict) -> int:
+        return sum(fn(task) for fn in fns)
+
+    factories = [getattr(fn, 'fast', None) for fn in fns]
+    if None not in factories:
+        combined.fast = lambda start, end: _Sum(start, end, [factory(start, end) for factory in factories])
+    return combined
+
+
 def run_time(func: Callable) -> Callable:
     """
     @run_time
@@ -585,15 +2256,55 @@ def run_time_5(func: Callable) -> Callable:
     return wrapper
 
 
+def run_profile(func: Callable, *args, path: Optional[str] = None, sort: str = 'cumulative', limit: int = 20,
+                **kwargs) -> Any:
+    """
+    run_profile(func: Callable, *args, path: Optional[str] = None, sort: str = 'cumulative', limit: int = 20,
+                **kwargs) -> Any
+
+    以 cProfile 运行一次 func(*args, **kwargs) 并输出统计 | run func(*args, **kwargs) once under cProfile and report
+    例如 run_profile(search, a, b, combine(ls, mhd)).
+    e.g. run_profile(search, a, b, combine(ls, mhd)).
+    >> func: 被分析的函数, 通常是搜索函数 | function to profile, usually a search function
+    >> path: 统计文件路径, 给出时写入文件 (可用 pstats 或 snakeviz 查看), 否则打印 | stats file path, written when given
+    >> (readable by pstats or snakeviz), printed otherwise
+    >> sort: 打印时的排序方式 | sort order when printing
+    >> limit: 打印的行数 | number of rows printed
+    << 返回 func 的返回值 | return value of func
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    if path is not None:
+        profiler.dump_stats(path)
+    else:
+        pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
+    return result
+
+
+from .cache import SolutionCache, canonical_key
+from .parallel import parallel_search
+from .pattern import AdditivePatternDatabase, PatternDatabase, build_additive, build_pattern_database
+from .session import SearchSession
+from .table import DistanceTable, build_table, canonical_goal, load_table, lookup_solve
+
 bfs = breadth_first_search
 dfs = depth_first_search
 dls = depth_limited_search
+iddfs = iterative_deepening_search
 dbfs = double_breadth_first_search
+mm = bidirectional_search
+sma = memory_bounded_search
+ara = anytime_search
+hda = parallel_search
+ida = iterative_deepening_a_star
 ls = lowest_step
 mp = most_at_place
 mhd = manhattan_distance
+lc = linear_conflict
+wd = walking_distance
 rt = run_time
 rt5 = run_time_5
+rp = run_profile
 
 if __name__ == '__main__':
     print(__doc__)
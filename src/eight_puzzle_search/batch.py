@@ -0,0 +1,149 @@
+"""
+批量求解 | batch solving
+
+从文件中逐行读取题目, 先以逆序数奇偶性剔除无解的题目, 其余按块分发到进程池求解, 并按输入顺序以 JSON Lines 输出.
+puzzles are streamed from a file line by line, unsolvable pairs are rejected up front by the inversion parity check,
+the rest are fanned out across a process pool in chunks and results are streamed back as JSON Lines in input order.
+
+每行一道题: 起点, 可选的目标, 以空白分隔; 九宫格可写作连续数字 (如 283164705, * 也可代表空位) 或以逗号分隔.
+one puzzle per line: start and an optional end separated by whitespace; a board is written either as
+consecutive digits (e.g. 283164705, * also stands for blank) or comma separated.
+
+命令行 | command line:
+    python -m eight_puzzle_search.batch puzzles.txt -o solutions.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import *
+
+from . import Box, _deepen, is_solvable
+from .table import lookup_solve
+
+METHODS = ('auto', 'lookup', 'ida')
+
+
+def parse_board(text: str) -> 'Box':
+    """
+    parse_board(text: str) -> 'Box'
+
+    解析一个九宫格 | parse one board
+    >> text: 连续数字或逗号分隔的数字 | consecutive digits or comma separated numbers
+    << 返回九宫格对象 | return Box object
+    """
+    if ',' in text:
+        return Box([int(i) if i.strip() not in ('', '*') else 0 for i in text.split(',')])
+    return Box([int(i) if i != '*' else 0 for i in text])
+
+
+def _solve(start: 'Box', end: 'Box', method: str, directory: Optional[str]) -> str:
+    if method == 'lookup' or method == 'auto' and start.size == 3:
+        return lookup_solve(start, end, directory)
+    deepening = _deepen(start, end, None)
+    try:
+        while True:
+            next(deepening)
+    except StopIteration as solved:
+        return solved.value
+
+
+def _solve_line(number: int, line: str, goal: Optional[str], method: str, directory: Optional[str]) -> str:
+    record = {'line': number}
+    try:
+        fields = line.split()
+        if len(fields) == 1 and goal is not None:
+            fields.append(goal)
+        if len(fields) != 2:
+            raise ValueError('每行须含起点和目标 | each line needs a start and an end')
+        start, end = parse_board(fields[0]), parse_board(fields[1])
+        record['start'], record['end'] = start.value, end.value
+        record['solvable'] = is_solvable(start, end)
+        if record['solvable']:
+            moves = _solve(start, end, method, directory)
+            record['moves'], record['length'] = moves, len(moves)
+        else:
+            record['moves'], record['length'] = None, None
+    except ValueError as error:
+        record['error'] = str(error)
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _solve_chunk(chunk: List[Tuple[int, str]], goal: Optional[str], method: str,
+                 directory: Optional[str]) -> List[str]:
+    return [_solve_line(number, line, goal, method, directory) for number, line in chunk]
+
+
+def solve_lines(lines: Iterable[str], goal: Optional[str] = None, method: str = 'auto',
+                processes: Optional[int] = None, chunksize: int = 256,
+                directory: Optional[str] = None) -> Iterator[str]:
+    """
+    solve_lines(lines: Iterable[str], goal: Optional[str] = None, method: str = 'auto',
+                processes: Optional[int] = None, chunksize: int = 256,
+                directory: Optional[str] = None) -> Iterator[str]
+
+    批量求解并按输入顺序逐行产出 JSON 结果 | solve in batch and yield JSON results in input order
+    >> lines: 题目行 | puzzle lines
+    >> goal: 行内未给出目标时使用的目标 | end used when a line gives none
+    >> method: 'lookup' 查表, 'ida' 迭代加深 A*, 'auto' 3x3 查表其余 IDA* | 'lookup', 'ida', or 'auto' for lookup on
+    >> 3x3 and IDA* otherwise
+    >> processes: 进程数, 默认为 CPU 核数 | number of processes, CPU count by default
+    >> chunksize: 每块的题目数 | puzzles per chunk
+    >> directory: 距离表目录 | distance table directory
+    << 逐行产出 JSON 字符串 | yield JSON strings line by line
+    """
+    if method not in METHODS:
+        raise ValueError('未知的求解方式 | unknown method: {}'.format(method))
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    with Pool(processes) as pool:
+        # 限制在途的块数, 使内存占用与输入规模无关 | bound chunks in flight so memory does not grow with input
+        pending, limit = deque(), (processes or os.cpu_count() or 1) * 4
+        while True:
+            chunk = list(islice(numbered, chunksize))
+            if chunk:
+                pending.append(pool.apply_async(_solve_chunk, (chunk, goal, method, directory)))
+            while pending and (len(pending) >= limit or not chunk):
+                yield from pending.popleft().get()
+            if not chunk:
+                return
+
+
+def solve_file(path: str, output: Optional[str] = None, **kwargs) -> None:
+    """
+    solve_file(path: str, output: Optional[str] = None, **kwargs) -> None
+
+    批量求解文件中的题目 | solve puzzles in a file in batch
+    >> path: 输入文件, 每行一道题 | input file, one puzzle per line
+    >> output: 输出的 JSON Lines 文件, 默认为标准输出 | output JSON Lines file, stdout by default
+    >> kwargs: 传给 solve_lines() 的参数 | arguments passed to solve_lines()
+    """
+    with open(path, encoding='utf-8') as source:
+        target = open(output, 'w', encoding='utf-8') if output else sys.stdout
+        try:
+            for record in solve_lines(source, **kwargs):
+                target.write(record + '\n')
+        finally:
+            if output:
+                target.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m eight_puzzle_search.batch',
+                                     description='批量求解八数码问题 | solve puzzles in batch')
+    parser.add_argument('path', help='输入文件, 每行一道题 | input file, one puzzle per line')
+    parser.add_argument('-o', '--output', help='输出文件, 默认为标准输出 | output file, stdout by default')
+    parser.add_argument('-g', '--goal', help='默认目标 | default end')
+    parser.add_argument('-m', '--method', choices=METHODS, default='auto', help='求解方式 | method')
+    parser.add_argument('-p', '--processes', type=int, help='进程数 | number of processes')
+    parser.add_argument('-c', '--chunksize', type=int, default=256, help='每块的题目数 | puzzles per chunk')
+    parser.add_argument('-d', '--directory', help='距离表目录 | distance table directory')
+    args = parser.parse_args(argv)
+    solve_file(args.path, args.output, goal=args.goal, method=args.method, processes=args.processes,
+               chunksize=args.chunksize, directory=args.directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""
+基准测试 | benchmark suite
+
+以固定随机种子生成题库: 按最优步数 0-31 分桶的八数码, 以及随机游走得到的十五数码. 对每个求解器与启发函数
+记录用时, 每秒生成节点数, 拓展节点数和 tracemalloc 测得的内存峰值, 结果写为 JSON, 并可与基线比较找出退化.
+a seeded corpus holds 8-puzzles bucketed by optimal depth 0-31 and random walk 15-puzzles. every solver and
+heuristic is run on it, recording wall time, generated nodes per second, expansions and tracemalloc peak memory;
+results are written as JSON and can be compared with a baseline to flag regressions.
+
+命令行 | command line:
+    python -m eight_puzzle_search.bench run -o result.json
+    python -m eight_puzzle_search.bench compare baseline.json result.json --threshold 0.1
+    python -m eight_puzzle_search.bench heuristics
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import *
+
+from . import (Box, SearchResult, bidirectional_search, breadth_first_search, combine, depth_limited_search,
+               double_breadth_first_search, iterative_deepening_a_star, iterative_deepening_search, linear_conflict,
+               lowest_step, manhattan_distance, most_at_place, search, walking_distance, _bits, _moves, _unpack)
+
+GOAL_8 = (1, 2, 3, 4, 5, 6, 7, 8, 0)
+GOAL_15 = tuple(range(1, 16)) + (0,)
+
+
+def _astar(fn: Callable) -> Callable[['Box', 'Box'], 'SearchResult']:
+    return lambda start, end: search(start, end, fn)
+
+
+def _ida(fn: Callable) -> Callable[['Box', 'Box'], 'SearchResult']:
+    return lambda start, end: iterative_deepening_a_star(start, end, fn)
+
+
+# 名称 -> (求解函数, 各边长下的最大步数, 超出则跳过) | name -> (solver, max depth per board size, skipped beyond)
+SOLVERS = {
+    'bfs': (breadth_first_search, {3: 12}),
+    'dls': (lambda start, end, depth: depth_limited_search(start, end, depth), {3: 20}),
+    'iddfs': (iterative_deepening_search, {3: 24, 4: 20}),
+    'dbfs': (double_breadth_first_search, {3: 31}),
+    'astar-ls+mp': (_astar(combine(lowest_step, most_at_place)), {3: 31}),
+    'astar-ls+mhd': (_astar(combine(lowest_step, manhattan_distance)), {3: 31, 4: 40}),
+    'astar-ls+lc': (_astar(combine(lowest_step, linear_conflict)), {3: 31, 4: 40}),
+    'astar-ls+wd': (_astar(combine(lowest_step, walking_distance)), {3: 31, 4: 40}),
+    'greedy-mhd': (_astar(manhattan_distance), {3: 31, 4: 60}),
+    'ida-mhd': (iterative_deepening_a_star, {3: 31, 4: 60}),
+    'ida-lc': (_ida(linear_conflict), {3: 31, 4: 60}),
+    'ida-wd': (_ida(walking_distance), {3: 31, 4: 60}),
+    'mm-mhd': (bidirectional_search, {3: 31, 4: 40}),
+}
+
+try:
+    from . import vector
+except ImportError:
+    pass
+else:
+    SOLVERS['vector-bfs'] = (vector.breadth_first_search, {3: 31})
+    SOLVERS['vector-astar-mhd'] = (vector.search, {3: 31, 4: 40})
+
+
+def _distances() -> Dict[int, int]:
+    """从 GOAL_8 出发宽度优先搜索全部状态的最优步数 | optimal depth of every state by BFS from GOAL_8"""
+    goal = Box(list(GOAL_8))
+    depth, layer = {goal.state: 0}, [goal]
+    while layer:
+        following = []
+        for now in layer:
+            for check in now.expand():
+                if check.state not in depth:
+                    depth[check.state] = depth[now.state] + 1
+                    following.append(check)
+        layer = following
+    return depth
+
+
+def corpus(seed: int = 0, per_depth: int = 2, fifteen: int = 10) -> List[Dict[str, Any]]:
+    """
+    corpus(seed: int = 0, per_depth: int = 2, fifteen: int = 10) -> List[Dict[str, Any]]
+
+    生成固定的题库 | build the fixed corpus
+    >> seed: 随机种子 | random seed
+    >> per_depth: 八数码每个最优步数抽取的题数 | 8-puzzles drawn per optimal depth
+    >> fifteen: 十五数码的题数, 随机游走 20 至 60 步 | number of 15-puzzles, random walks of 20 to 60 moves
+    << 返回题目列表, 含 id, start, end, depth (十五数码为游走步数) | return instances with id, start, end and depth
+    (walk length for 15-puzzles)
+    """
+    rng = random.Random(seed)
+    buckets = {}
+    for state, depth in _distances().items():
+        buckets.setdefault(depth, []).append(state)
+    instances = []
+    for depth in sorted(buckets):
+        states = sorted(buckets[depth])
+        for i, state in enumerate(rng.sample(states, min(per_depth, len(states)))):
+            instances.append({'id': '8-d{:02d}-{}'.format(depth, i), 'start': _unpack(state),
+                              'end': list(GOAL_8), 'depth': depth, 'exact': True})
+    for i in range(fifteen):
+        walk = 20 + (40 * i // max(fifteen - 1, 1))
+        now, last = Box(list(GOAL_15)), None
+        for _ in range(walk):
+            choices = [box for box in now.expand() if box.state != last]
+            last, now = now.state, rng.choice(choices)
+        instances.append({'id': '15-w{:02d}-{}'.format(walk, i), 'start': now.value, 'end': list(GOAL_15),
+                          'depth': walk, 'exact': False})
+    return instances
+
+
+def _call(name: str, start: 'Box', end: 'Box', depth: int) -> 'SearchResult':
+    solver = SOLVERS[name][0]
+    return solver(start, end, depth) if name == 'dls' else solver(start, end)
+
+
+def measure(name: str, instance: Dict[str, Any], repeat: int = 1, memory: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    measure(name: str, instance: Dict[str, Any], repeat: int = 1, memory: bool = True) -> Optional[Dict[str, Any]]
+
+    在一道题上测量一个求解器, 超出其步数上限时返回 None | measure one solver on one instance, None beyond its depth limit
+    用时取 repeat 次中的最小值; 内存峰值另行运行一次, 以免 tracemalloc 影响计时.
+    wall time is the least of repeat runs; peak memory comes from one extra run so tracemalloc does not skew timing.
+    >> name: SOLVERS 中的求解器名称 | solver name in SOLVERS
+    >> instance: corpus() 中的题目 | instance from corpus()
+    >> repeat: 计时的重复次数 | timed repetitions
+    >> memory: 是否测量内存峰值 | whether to measure peak memory
+    << 返回测量记录 | return measurement record
+    """
+    start, end = Box(instance['start']), Box(instance['end'])
+    limit = SOLVERS[name][1].get(start.size)
+    if limit is None or instance['depth'] > limit:
+        return None
+    wall = float('inf')
+    for _ in range(max(repeat, 1)):
+        began = perf_counter()
+        result = _call(name, start, end, instance['depth'])
+        wall = min(wall, perf_counter() - began)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            _call(name, start, end, instance['depth'])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'solver': name, 'instance': instance['id'], 'depth': instance['depth'], 'length': result.depth,
+            'expanded': result.expanded, 'generated': result.generated, 'frontier': result.frontier,
+            'duplicates': result.stats.get('duplicates'), 'evaluations': result.stats.get('evaluations'),
+            'wall': wall, 'nodes_per_sec': result.generated / wall if wall else None, 'peak': peak}
+
+
+def run(solvers: Optional[Sequence[str]] = None, seed: int = 0, per_depth: int = 2, fifteen: int = 10,
+        repeat: int = 1, memory: bool = True, progress: Optional[Callable[[Dict[str, Any]], None]] = None
+        ) -> Dict[str, Any]:
+    """
+    run(solvers: Optional[Sequence[str]] = None, seed: int = 0, per_depth: int = 2, fifteen: int = 10,
+        repeat: int = 1, memory: bool = True, progress: Optional[Callable[[Dict[str, Any]], None]] = None
+        ) -> Dict[str, Any]
+
+    在整个题库上运行基准测试 | run the benchmark over the whole corpus
+    >> solvers: 求解器名称, 默认为全部 | solver names, all by default
+    >> seed, per_depth, fifteen: 见 corpus() | see corpus()
+    >> repeat, memory: 见 measure() | see measure()
+    >> progress: 每得到一条记录时调用 | called with every record
+    << 返回可写为 JSON 的结果 | return JSON serializable result
+    """
+    solvers = list(SOLVERS) if solvers is None else list(solvers)
+    for name in solvers:
+        if name not in SOLVERS:
+            raise ValueError('未知的求解器 | unknown solver: {}'.format(name))
+    records = []
+    for instance in corpus(seed, per_depth, fifteen):
+        for name in solvers:
+            record = measure(name, instance, repeat, memory)
+            if record is not None:
+                records.append(record)
+                if progress is not None:
+                    progress(record)
+    summary = {}
+    for record in records:
+        total = summary.setdefault(record['solver'], {'instances': 0, 'wall': 0.0, 'expanded': 0, 'generated': 0,
+                                                      'peak': 0})
+        total['instances'] += 1
+        total['wall'] += record['wall']
+        total['expanded'] += record['expanded']
+        total['generated'] += record['generated']
+        total['peak'] = max(total['peak'], record['peak'] or 0)
+    for total in summary.values():
+        total['nodes_per_sec'] = total['generated'] / total['wall'] if total['wall'] else None
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'config': {'seed': seed, 'per_depth': per_depth, 'fifteen': fifteen, 'repeat': repeat},
+            'records': records, 'summary': summary}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]
+
+    比较两次结果中共有的记录, 找出用时, 拓展节点数或内存峰值增长超过 threshold 的求解器
+    compare records present in both results and flag solvers whose wall time, expansions or peak memory grew
+    beyond threshold
+    >> baseline: 基线结果 | baseline result
+    >> current: 当前结果 | current result
+    >> threshold: 允许的相对增长, 0.1 即 10% | allowed relative growth, 0.1 for 10%
+    << 返回退化列表, 每项含 solver, metric, baseline, current, ratio | return regressions with solver, metric,
+    baseline, current and ratio
+    """
+    before = {(record['solver'], record['instance']): record for record in baseline['records']}
+    totals = {}
+    for record in current['records']:
+        old = before.get((record['solver'], record['instance']))
+        if old is None:
+            continue
+        total = totals.setdefault(record['solver'], {})
+        for metric in ('wall', 'expanded', 'peak'):
+            if old[metric] is None or record[metric] is None:
+                continue
+            pair = total.setdefault(metric, [0, 0])
+            pair[0] += old[metric]
+            pair[1] += record[metric]
+    regressions = []
+    for solver, total in sorted(totals.items()):
+        for metric, (old, new) in total.items():
+            ratio = new / old if old else (1.0 if not new else float('inf'))
+            if ratio > 1 + threshold:
+                regressions.append({'solver': solver, 'metric': metric, 'baseline': old, 'current': new,
+                                    'ratio': ratio})
+    return regressions
+
+
+# 与曼哈顿距离比较的启发函数 | heuristics compared with manhattan distance
+HEURISTICS = {'mhd': manhattan_distance, 'lc': linear_conflict, 'wd': walking_distance}
+
+
+def heuristics(seed: int = 0, per_depth: int = 2, fifteen: int = 10, repeat: int = 20,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    heuristics(seed: int = 0, per_depth: int = 2, fifteen: int = 10, repeat: int = 20,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]
+
+    在题库上比较各启发函数与曼哈顿距离: IDA* 拓展的节点数与用时, 以及快速接口每次完整计算与增量更新的用时
+    compare every heuristic with manhattan distance on the corpus: IDA* expansions and wall time, and the time of one
+    full evaluation and one incremental update through the fast interface
+    >> seed, per_depth, fifteen: 见 corpus() | see corpus()
+    >> repeat: 每道题上计时估价的重复次数 | timed evaluations per instance
+    >> progress: 每得到一条记录时调用 | called with every record
+    << 返回可写为 JSON 的结果, summary 中的 ratio 均相对于 mhd | return JSON serializable result, every ratio in
+    << summary is relative to mhd
+    """
+    records, summary = [], {}
+    for instance in corpus(seed, per_depth, fifteen):
+        start, end = Box(instance['start']), Box(instance['end'])
+        if start.state == end.state:
+            continue
+        bits = _bits(start.size)
+        # 取起点的第一个子节点计时增量更新 | time the incremental update on the first child of start
+        move, to = _moves(start.size)[start._zero][0]
+        tile = (start.state >> (to * bits)) & ((1 << bits) - 1)
+        child = start.state - (tile << (to * bits)) + (tile << (start._zero * bits))
+        for name, fn in HEURISTICS.items():
+            # 先构造快速接口对象, 使查找表的生成不计入搜索用时 | build the fast object first so that building lookup
+            # tables is not timed as search
+            heuristic = fn.fast(start, end)
+            result = iterative_deepening_a_star(start, end, fn)
+            h = heuristic.evaluate(start.state)
+            began = perf_counter()
+            for _ in range(repeat):
+                heuristic.evaluate(start.state)
+            evaluate = (perf_counter() - began) / repeat
+            began = perf_counter()
+            for _ in range(repeat):
+                heuristic.update(h, child, tile, to, start._zero)
+            update = (perf_counter() - began) / repeat
+            record = {'heuristic': name, 'instance': instance['id'], 'depth': result.depth, 'initial': h,
+                      'expanded': result.expanded, 'wall': result.elapsed, 'evaluate': evaluate, 'update': update}
+            records.append(record)
+            if progress is not None:
+                progress(record)
+            total = summary.setdefault(name, {'instances': 0, 'expanded': 0, 'wall': 0.0, 'evaluate': 0.0,
+                                              'update': 0.0})
+            total['instances'] += 1
+            for key in ('expanded', 'wall', 'evaluate', 'update'):
+                total[key] += record[key]
+    base = summary.get('mhd')
+    for total in summary.values():
+        total['evaluate'] /= total['instances']
+        total['update'] /= total['instances']
+    for total in summary.values():
+        for key in ('expanded', 'wall', 'evaluate', 'update'):
+            total[key + '_ratio'] = total[key] / base[key] if base and base[key] else None
+    return {'config': {'seed': seed, 'per_depth': per_depth, 'fifteen': fifteen, 'repeat': repeat},
+            'records': records, 'summary': summary}
+
+
+def speedup(workers: int, seed: int = 0, per_depth: int = 2, fifteen: int = 10, least: int = 20,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    speedup(workers: int, seed: int = 0, per_depth: int = 2, fifteen: int = 10, least: int = 20,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]
+
+    在题库上比较并行搜索与串行 search() 的用时 | compare parallel search with serial search() on the corpus
+    两者都使用 combine(ls, mhd), 只运行步数不少于 least 且在 astar-ls+mhd 上限以内的题目, 较浅的题目主要反映进程开销.
+    both use combine(ls, mhd); only instances of at least least moves within the astar-ls+mhd limit are run, as
+    shallower ones mostly measure process overhead.
+    >> workers: 并行搜索的进程数 | number of processes of parallel search
+    >> seed, per_depth, fifteen: 见 corpus() | see corpus()
+    >> least: 最少步数 | least depth
+    >> progress: 每得到一条记录时调用 | called with every record
+    << 返回可写为 JSON 的结果, 含逐题记录与总加速比 | return JSON serializable result with records and total speedup
+    """
+    fn, limits = combine(lowest_step, manhattan_distance), SOLVERS['astar-ls+mhd'][1]
+    records = []
+    for instance in corpus(seed, per_depth, fifteen):
+        start, end = Box(instance['start']), Box(instance['end'])
+        if instance['depth'] < least or instance['depth'] > limits.get(start.size, -1):
+            continue
+        serial, parallel = search(start, end, fn), search(start, end, fn, workers=workers)
+        record = {'instance': instance['id'], 'depth': serial.depth, 'serial': serial.elapsed,
+                  'parallel': parallel.elapsed, 'speedup': serial.elapsed / parallel.elapsed,
+                  'serial_expanded': serial.expanded, 'parallel_expanded': parallel.expanded}
+        records.append(record)
+        if progress is not None:
+            progress(record)
+    serial = sum(record['serial'] for record in records)
+    parallel = sum(record['parallel'] for record in records)
+    return {'workers': workers, 'records': records, 'speedup': serial / parallel if parallel else None}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m eight_puzzle_search.bench',
+                                     description='八数码问题基准测试 | benchmark of eight puzzle search')
+    commands = parser.add_subparsers(dest='command', required=True)
+    running = commands.add_parser('run', help='运行基准测试 | run benchmark')
+    running.add_argument('-o', '--output', help='输出的 JSON 文件, 默认为标准输出 | output JSON file, stdout by default')
+    running.add_argument('-s', '--solvers', nargs='+', choices=list(SOLVERS), help='求解器 | solvers')
+    running.add_argument('--seed', type=int, default=0, help='随机种子 | random seed')
+    running.add_argument('--per-depth', type=int, default=2, help='八数码每个步数的题数 | 8-puzzles per depth')
+    running.add_argument('--fifteen', type=int, default=10, help='十五数码的题数 | number of 15-puzzles')
+    running.add_argument('--repeat', type=int, default=1, help='计时的重复次数 | timed repetitions')
+    running.add_argument('--no-memory', action='store_true', help='不测量内存峰值 | skip peak memory')
+    comparing = commands.add_parser('compare', help='与基线比较 | compare with baseline')
+    comparing.add_argument('baseline', help='基线 JSON 文件 | baseline JSON file')
+    comparing.add_argument('current', help='当前 JSON 文件 | current JSON file')
+    comparing.add_argument('-t', '--threshold', type=float, default=0.1, help='允许的相对增长 | allowed relative growth')
+    speeding = commands.add_parser('speedup', help='并行搜索的加速比 | speedup of parallel search')
+    speeding.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help='进程数 | number of processes')
+    speeding.add_argument('--seed', type=int, default=0, help='随机种子 | random seed')
+    speeding.add_argument('--per-depth', type=int, default=2, help='八数码每个步数的题数 | 8-puzzles per depth')
+    speeding.add_argument('--fifteen', type=int, default=10, help='十五数码的题数 | number of 15-puzzles')
+    speeding.add_argument('--least', type=int, default=20, help='最少步数 | least depth')
+    comparing_heuristics = commands.add_parser('heuristics', help='与曼哈顿距离比较启发函数 | compare heuristics with '
+                                                                  'manhattan distance')
+    comparing_heuristics.add_argument('--seed', type=int, default=0, help='随机种子 | random seed')
+    comparing_heuristics.add_argument('--per-depth', type=int, default=2, help='八数码每个步数的题数 | 8-puzzles per depth')
+    comparing_heuristics.add_argument('--fifteen', type=int, default=10, help='十五数码的题数 | number of 15-puzzles')
+    comparing_heuristics.add_argument('--repeat', type=int, default=20, help='计时估价的重复次数 | timed evaluations')
+    args = parser.parse_args(argv)
+
+    if args.command == 'heuristics':
+        def _compare(record: Dict[str, Any]) -> None:
+            print('{heuristic:>4} {instance:>12} {expanded:>10} expanded {wall:>9.4f}s {evaluate:.2e}s/eval'.format(
+                **record), file=sys.stderr)
+
+        result = heuristics(args.seed, args.per_depth, args.fifteen, args.repeat, _compare)
+        for name, total in result['summary'].items():
+            print('{:>4} expanded x{:.3f}  wall x{:.3f}  evaluate x{:.2f}  update x{:.2f}'.format(
+                name, total['expanded_ratio'], total['wall_ratio'], total['evaluate_ratio'], total['update_ratio']),
+                file=sys.stderr)
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if args.command == 'speedup':
+        def _report(record: Dict[str, Any]) -> None:
+            print('{instance:>12} {serial:>9.4f}s {parallel:>9.4f}s  x{speedup:.2f}'.format(**record), file=sys.stderr)
+
+        result = speedup(args.workers, args.seed, args.per_depth, args.fifteen, args.least, _report)
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if args.command == 'run':
+        def _progress(record: Dict[str, Any]) -> None:
+            print('{solver:>14} {instance:>12} {wall:>10.4f}s {expanded:>10} expanded'.format(**record),
+                  file=sys.stderr)
+
+        result = run(args.solvers, args.seed, args.per_depth, args.fifteen, args.repeat, not args.no_memory,
+                     _progress)
+        text = json.dumps(result, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+        else:
+            print(text)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(args.current, encoding='utf-8') as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print('退化 | regression: {solver} {metric} {baseline:.6g} -> {current:.6g} (x{ratio:.2f})'.format(
+            **regression))
+    if not regressions:
+        print('未发现退化 | no regression')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+解的缓存 | solution cache
+
+以规范化的 (起点, 目标) 为键缓存移动序列: 先将数字重新编号使目标成为规范目标 (空格位置不变, 其余格按顺序填入
+1 到 n*n-1), 于是所有只差数字编号的题目共用一条缓存. 开启 symmetry 后还会在棋盘的 8 种旋转与翻转中取最小的键,
+命中时把缓存的移动序列映射回原棋盘的方向. 内存中的缓存以 LRU 方式淘汰, 也可指定 sqlite 文件持久保存.
+moves are cached under the canonicalized (start, end) pair: tiles are relabeled so that end becomes the canonical
+goal (blank kept in place, other cells filled with 1 to n*n-1 in order), so every pair that only differs by tile
+labels shares one entry. with symmetry on, the least key over the 8 rotations and reflections of the board is used
+and cached moves are mapped back to the directions of the original board on a hit. the cache in memory is evicted
+in LRU order and may be persisted to an sqlite file.
+"""
+import sqlite3
+from collections import OrderedDict
+from time import perf_counter
+from typing import *
+
+from . import Box, SearchResult, combine, lowest_step, manhattan_distance, search
+
+# 各移动中空格的 (行, 列) 位移 | (row, column) offset of the blank for every move
+_OFFSETS = {'U': (1, 0), 'D': (-1, 0), 'L': (0, 1), 'R': (0, -1)}
+_NAMES = {offset: move for move, offset in _OFFSETS.items()}
+# 8 种对称变换: (是否转置, 是否上下翻转, 是否左右翻转) | 8 symmetries: (transpose, flip rows, flip columns)
+_SYMMETRIES = tuple((transpose, rows, columns) for transpose in (False, True) for rows in (False, True)
+                    for columns in (False, True))
+_PLACES = {}
+_DIRECTIONS = {}
+
+
+def _places(size: int, symmetry: Tuple[bool, bool, bool]) -> Tuple[int, ...]:
+    """变换后各格的新位置 | new position of every cell after the symmetry"""
+    places = _PLACES.get((size, symmetry))
+    if places is None:
+        transpose, rows, columns = symmetry
+        result = []
+        for cell in range(size * size):
+            row, column = divmod(cell, size)
+            if transpose:
+                row, column = column, row
+            if rows:
+                row = size - 1 - row
+            if columns:
+                column = size - 1 - column
+            result.append(row * size + column)
+        places = _PLACES[size, symmetry] = tuple(result)
+    return places
+
+
+def _directions(symmetry: Tuple[bool, bool, bool], inverse: bool = False) -> Dict[int, str]:
+    """变换后各移动的新方向, 供 str.translate 使用 | new direction of every move, for str.translate"""
+    directions = _DIRECTIONS.get((symmetry, inverse))
+    if directions is None:
+        transpose, rows, columns = symmetry
+        table = {}
+        for move, (row, column) in _OFFSETS.items():
+            # 先转置后翻转, 逆变换则先翻转后转置 | transpose then flip, the inverse flips then transposes
+            if transpose and not inverse:
+                row, column = column, row
+            row, column = -row if rows else row, -column if columns else column
+            if transpose and inverse:
+                row, column = column, row
+            table[ord(move)] = _NAMES[row, column]
+        directions = _DIRECTIONS[symmetry, inverse] = table
+    return directions
+
+
+def canonical_key(start: 'Box', end: 'Box', symmetry: bool = False) -> Tuple[str, Tuple[bool, bool, bool]]:
+    """
+    canonical_key(start: 'Box', end: 'Box', symmetry: bool = False) -> Tuple[str, Tuple[bool, bool, bool]]
+
+    求 (起点, 目标) 的规范键 | canonical key of the (start, end) pair
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> symmetry: 是否在 8 种对称变换中取最小的键 | take the least key over the 8 symmetries
+    << 返回键及所用的对称变换 | return key and the symmetry used
+    """
+    if start.size != end.size:
+        raise ValueError('起点与目标的大小不一致 | start and end differ in size')
+    size, best = start.size, None
+    for candidate in _SYMMETRIES if symmetry else _SYMMETRIES[:1]:
+        places = _places(size, candidate)
+        moved_start, moved_end = [0] * (size * size), [0] * (size * size)
+        for cell, place in enumerate(places):
+            moved_start[place], moved_end[place] = start.value[cell], end.value[cell]
+        # 规范目标中空格之外的格按位置顺序编号 | the canonical goal numbers non-blank cells in position order
+        relabel, label = {0: 0}, 0
+        for tile in moved_end:
+            if tile:
+                label += 1
+                relabel[tile] = label
+        key = (moved_end.index(0), tuple(relabel[tile] for tile in moved_start))
+        if best is None or key < best[0]:
+            best = key, candidate
+    (zero, tiles), candidate = best
+    return '{}:{}:{}'.format(size, zero, ','.join(map(str, tiles))), candidate
+
+
+class SolutionCache:
+    """
+    SolutionCache(capacity: int = 4096, path: Optional[str] = None, symmetry: bool = False) -> 'SolutionCache'
+
+    以规范化的 (起点, 目标) 为键的 LRU 解缓存 | LRU solution cache keyed by the canonicalized (start, end) pair
+    缓存保存求解函数给出的解, 是否最优取决于所用的求解函数, 不同的求解函数宜使用不同的缓存.
+    the cache keeps whatever the solver returned, so whether a cached solution is optimal depends on the solver;
+    use a separate cache for each solver.
+    >> capacity: 内存中最多保存的条目数 | most entries kept in memory
+    >> path: sqlite 文件路径, 给出时缓存会持久保存 | sqlite file path, the cache is persisted when given
+    >> symmetry: 是否以棋盘的对称变换进一步合并题目 | merge pairs further by the symmetries of the board
+    << 解缓存对象 | SolutionCache object
+    """
+
+    def __init__(self, capacity: int = 4096, path: Optional[str] = None, symmetry: bool = False) -> None:
+        if capacity < 1:
+            raise ValueError('缓存容量必须为正 | capacity must be positive')
+        self.capacity = capacity
+        self.symmetry = symmetry
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._store = None
+        if path is not None:
+            self._store = sqlite3.connect(path)
+            self._store.execute('CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, moves TEXT NOT NULL)')
+            self._store.commit()
+
+    def __enter__(self) -> 'SolutionCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """
+        'SolutionCache'.close() -> None
+
+        关闭 sqlite 文件 | close the sqlite file
+        """
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def _remember(self, key: str, moves: str) -> None:
+        self._entries[key] = moves
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, start: 'Box', end: 'Box') -> Optional[str]:
+        """
+        'SolutionCache'.get(start: 'Box', end: 'Box') -> Optional[str]
+
+        查询缓存的移动序列 | look up cached moves
+        >> start: 起始九宫格对象 | start Box object
+        >> end: 目标九宫格对象 | end Box object
+        << 返回移动序列, 未命中时为 None | return moves, None on a miss
+        """
+        key, symmetry = canonical_key(start, end, self.symmetry)
+        moves = self._entries.get(key)
+        if moves is not None:
+            self._entries.move_to_end(key)
+        elif self._store is not None:
+            row = self._store.execute('SELECT moves FROM solutions WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                moves = row[0]
+                self._remember(key, moves)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return moves.translate(_directions(symmetry, inverse=True))
+
+    def put(self, start: 'Box', end: 'Box', moves: str) -> None:
+        """
+        'SolutionCache'.put(start: 'Box', end: 'Box', moves: str) -> None
+
+        缓存一条移动序列 | cache moves
+        >> start: 起始九宫格对象 | start Box object
+        >> end: 目标九宫格对象 | end Box object
+        >> moves: 从起点到目标的移动序列 | moves from start to end
+        """
+        key, symmetry = canonical_key(start, end, self.symmetry)
+        moves = moves.translate(_directions(symmetry))
+        self._remember(key, moves)
+        if self._store is not None:
+            self._store.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?)', (key, moves))
+            self._store.commit()
+
+    def clear(self) -> None:
+        """
+        'SolutionCache'.clear() -> None
+
+        清空内存中的缓存与统计, 不影响 sqlite 文件 | clear the cache in memory and the statistics, the sqlite file is
+        kept
+        """
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        'SolutionCache'.stats -> Dict[str, Any]
+
+        命中统计 | hit statistics
+        << 返回 hits, misses, evictions, size, capacity 与 hit_rate | return hits, misses, evictions, size,
+        << capacity and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._entries),
+                'capacity': self.capacity, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def solve(self, start: 'Box', end: 'Box', solver: Optional[Callable[..., 'SearchResult']] = None, *args,
+              **kwargs) -> 'SearchResult':
+        """
+        'SolutionCache'.solve(start: 'Box', end: 'Box', solver: Optional[Callable[..., 'SearchResult']] = None,
+                              *args, **kwargs) -> 'SearchResult'
+
+        先查缓存, 未命中时调用 solver(start, end, *args, **kwargs) 求解并缓存结果
+        look up the cache first, and on a miss solve with solver(start, end, *args, **kwargs) and cache the result
+        >> start: 起始九宫格对象 | start Box object
+        >> end: 目标九宫格对象 | end Box object
+        >> solver: 求解函数, 默认为 search(start, end, combine(ls, mhd)) | solver, search(start, end, combine(ls, mhd))
+        >> by default
+        << 返回搜索结果, 命中时计数为 0 且 stats['cached'] 为 True | return SearchResult object, with zero counters
+        << and stats['cached'] set to True on a hit
+        """
+        began = perf_counter()
+        moves = self.get(start, end)
+        if moves is not None:
+            return SearchResult(Box(end.value, start.history + moves), moves, 0, 0, 0, perf_counter() - began,
+                                {'cached': True})
+        if solver is None:
+            result = search(start, end, combine(lowest_step, manhattan_distance), *args, **kwargs)
+        else:
+            result = solver(start, end, *args, **kwargs)
+        if result.solved and not result.stats.get('cancelled'):
+            self.put(start, end, result.path)
+        return result
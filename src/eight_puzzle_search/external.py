@@ -0,0 +1,294 @@
+"""
+外存分层宽度优先枚举 | external memory layered breadth first enumeration
+
+每层状态以紧凑编码 (每个状态 8 字节, 升序且无重复) 写入单独的层文件, 内存中只保留一个固定大小的缓冲区.
+生成下一层时顺序读取当前层, 子节点攒满缓冲区后排序去重写为有序段, 最后多路归并各段, 并与当前层和上一层
+(滑块问题的图是无向的, 相邻层之间才有边) 做有序差集, 即延迟重复检测. 每完成一层便原子地更新清单文件,
+中断后再次运行会从最后完成的一层继续. 查询时以 mmap 方式在有序的层文件中二分查找.
+every layer is written to its own file of compact encodings (8 bytes per state, ascending and unique) and only a
+fixed size buffer is held in memory. the next layer is produced by reading the current one sequentially, sorting
+and deduplicating children into sorted runs whenever the buffer fills, then merging all runs and subtracting the
+current and previous layers as sorted sets (moves are reversible, so edges only join adjacent layers), i.e.
+delayed duplicate detection. the manifest is replaced atomically after every layer, and a rerun resumes from the
+last finished layer. lookups binary search the sorted layer files via mmap.
+
+目录结构 | directory layout:
+    manifest.json   {"version": 1, "start": [...], "counts": [...], "complete": bool}
+    layer_000.bin   第 0 层, 即起点 | layer 0, the start
+    layer_001.bin   ...
+    distances.bin   可选, 仅 3x3: 按 table 模块的状态序号排列的步数 | optional, 3x3 only: depth by the state rank
+                    of the table module
+
+命令行 | command line:
+    python -m eight_puzzle_search.external 123456780 -d layers --distances
+"""
+import argparse
+import heapq
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from time import perf_counter
+from typing import *
+
+from . import Box, _bits, _moves
+from .batch import parse_board
+from .table import _COUNT, _rank
+
+_VERSION = 1
+_BLOCK = 1 << 16  # 每次顺序读写的状态数 | states per sequential read or write
+
+
+def _layer(directory: str, depth: int) -> str:
+    return os.path.join(directory, 'layer_{:03d}.bin'.format(depth))
+
+
+def _read(path: str) -> Iterator[int]:
+    """以大块顺序读取有序的状态文件 | read a sorted state file in large sequential blocks"""
+    with open(path, 'rb') as file:
+        while True:
+            block = array('Q')
+            try:
+                block.fromfile(file, _BLOCK)
+            except EOFError:
+                pass
+            if not block:
+                return
+            yield from block
+
+
+def _write(path: str, states: Iterable[int]) -> int:
+    """以大块顺序写入状态, 先写临时文件再原子替换, 返回写入的个数 | write states in large sequential blocks to a
+    temporary file that atomically replaces path, returning the number written"""
+    count, block = 0, array('Q')
+    with open(path + '.tmp', 'wb') as file:
+        for state in states:
+            block.append(state)
+            if len(block) == _BLOCK:
+                block.tofile(file)
+                count += len(block)
+                block = array('Q')
+        block.tofile(file)
+        count += len(block)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+    return count
+
+
+def _unique(states: Iterable[int]) -> Iterator[int]:
+    last = None
+    for state in states:
+        if state != last:
+            yield state
+            last = state
+
+
+def _subtract(states: Iterator[int], *others: Iterator[int]) -> Iterator[int]:
+    """有序差集 | difference of sorted sequences"""
+    heads = [[next(other, None), other] for other in others]
+    for state in states:
+        present = False
+        for head in heads:
+            while head[0] is not None and head[0] < state:
+                head[0] = next(head[1], None)
+            if head[0] == state:
+                present = True
+        if not present:
+            yield state
+
+
+def _save(directory: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(directory, 'manifest.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    os.replace(path + '.tmp', path)
+
+
+def enumerate_layers(start: 'Box', directory: str, max_depth: Optional[int] = None, run_size: int = 1 << 22,
+                     distances: bool = False,
+                     progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None) -> List[int]:
+    """
+    enumerate_layers(start: 'Box', directory: str, max_depth: Optional[int] = None, run_size: int = 1 << 22,
+                     distances: bool = False,
+                     progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None) -> List[int]
+
+    从 start 出发逐层枚举全部可达状态, 每层写入 directory 下的层文件, 目录中已有同一起点的清单时从中断处继续
+    enumerate every state reachable from start layer by layer into files under directory, resuming where it stopped
+    when the directory already holds a manifest of the same start
+    >> start: 起始九宫格对象, 至多 4x4 | start Box object, 4x4 at most
+    >> directory: 层文件目录 | layer file directory
+    >> max_depth: 最大层数, 默认枚举到没有新状态为止 | deepest layer, until no new state by default
+    >> run_size: 内存缓冲区的状态数, 每个状态占 8 字节 | states in the memory buffer, 8 bytes each
+    >> distances: 完成后是否另写 3x3 的距离表 distances.bin | whether to also write the 3x3 distance table
+    >> distances.bin once complete
+    >> progress: 每完成一层以 depth, count, states, elapsed 调用, 返回 False 时停止 | called with depth, count,
+    >> states and elapsed after every layer, returning False stops
+    << 返回各层的状态数 | return number of states per layer
+    """
+    size = start.size
+    if size * size * _bits(size) > 64:
+        raise ValueError('外存枚举至多支持 4x4 九宫格 | external enumeration supports 4x4 boards at most')
+    if distances and size != 3:
+        raise ValueError('距离表仅支持 3x3 九宫格 | distance tables only support 3x3 boards')
+    if run_size < 1:
+        raise ValueError('缓冲区大小必须为正 | run_size must be positive')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'manifest.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') != _VERSION or manifest.get('start') != start.value:
+            raise ValueError('目录中已有其他起点的枚举 | directory holds an enumeration of another start')
+    else:
+        manifest = {'version': _VERSION, 'start': start.value, 'counts': [], 'complete': False}
+    # 清除中断时留下的段文件与临时文件 | remove runs and temporary files left by an interruption
+    for name in os.listdir(directory):
+        if name.startswith('run_') or name.endswith('.tmp'):
+            os.remove(os.path.join(directory, name))
+    counts = manifest['counts']
+    if not counts:
+        counts.append(_write(_layer(directory, 0), [start.state]))
+        _save(directory, manifest)
+    bits, moves, cells = _bits(size), _moves(size), size * size
+    mask = (1 << bits) - 1
+    began = perf_counter()
+    while not manifest['complete'] and (max_depth is None or len(counts) <= max_depth):
+        depth = len(counts)
+        # 生成子节点, 缓冲区满时排序去重写为有序段 | generate children, writing a sorted unique run whenever the
+        # buffer fills
+        runs, buffer = [], set()
+        for state in _read(_layer(directory, depth - 1)):
+            zero = 0
+            while (state >> (zero * bits)) & mask:
+                zero += 1
+            for move, to in moves[zero]:
+                tile = (state >> (to * bits)) & mask
+                buffer.add(state - (tile << (to * bits)) + (tile << (zero * bits)))
+            if len(buffer) >= run_size:
+                runs.append(os.path.join(directory, 'run_{:03d}_{:05d}.bin'.format(depth, len(runs))))
+                _write(runs[-1], sorted(buffer))
+                buffer = set()
+        ordered = [iter(sorted(buffer))] + [_read(run) for run in runs]
+        del buffer
+        previous = [_read(_layer(directory, depth - 1))]
+        if depth >= 2:
+            previous.append(_read(_layer(directory, depth - 2)))
+        count = _write(_layer(directory, depth), _subtract(_unique(heapq.merge(*ordered)), *previous))
+        for run in runs:
+            os.remove(run)
+        if count:
+            counts.append(count)
+        else:
+            os.remove(_layer(directory, depth))
+            manifest['complete'] = True
+        _save(directory, manifest)
+        if progress is not None and progress({'depth': depth, 'count': count, 'states': sum(counts),
+                                              'elapsed': perf_counter() - began}) is False:
+            break
+    if distances and manifest['complete']:
+        table = bytearray(_COUNT)
+        for depth in range(len(counts)):
+            for state in _read(_layer(directory, depth)):
+                zero = 0
+                while (state >> (zero * bits)) & mask:
+                    zero += 1
+                table[_rank(state, zero)] = depth
+        with open(os.path.join(directory, 'distances.bin.tmp'), 'wb') as file:
+            file.write(table)
+        os.replace(os.path.join(directory, 'distances.bin.tmp'), os.path.join(directory, 'distances.bin'))
+    return list(counts)
+
+
+class LayerFiles:
+    """
+    LayerFiles(directory: str) -> 'LayerFiles'
+
+    以 mmap 方式打开 enumerate_layers() 写出的层文件 | layer files written by enumerate_layers() opened via mmap
+    >> directory: 层文件目录 | layer file directory
+    << 层文件对象 | LayerFiles object
+    """
+
+    def __init__(self, directory: str) -> None:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') != _VERSION:
+            raise ValueError('不支持的清单版本 | unsupported manifest version')
+        self.start = Box(manifest['start'])
+        self.counts = manifest['counts']
+        self.complete = manifest['complete']
+        self._maps, self._views = [], []
+        for depth in range(len(self.counts)):
+            with open(_layer(directory, depth), 'rb') as file:
+                self._maps.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            self._views.append(memoryview(self._maps[-1]).cast('Q'))
+
+    def __enter__(self) -> 'LayerFiles':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        'LayerFiles'.close() -> None
+
+        关闭内存映射 | close memory maps
+        """
+        for view in self._views:
+            view.release()
+        for layer in self._maps:
+            layer.close()
+        self._maps, self._views = [], []
+
+    def depth(self, box: 'Box') -> Optional[int]:
+        """
+        'LayerFiles'.depth(box: 'Box') -> Optional[int]
+
+        在各层中二分查找, 求到起点的步数 | binary search the layers for the distance to the start
+        >> box: 查询的九宫格对象 | Box object to query
+        << 返回步数, 不在已枚举的层中时为 None | return distance, None when not in the enumerated layers
+        """
+        state = box.state
+        for depth, view in enumerate(self._views):
+            index = bisect_left(view, state)
+            if index < len(view) and view[index] == state:
+                return depth
+        return None
+
+    def states(self, depth: int) -> Iterator['Box']:
+        """
+        'LayerFiles'.states(depth: int) -> Iterator['Box']
+
+        按编码升序产出某一层的全部状态 | yield every state of a layer in ascending encoding
+        >> depth: 层数 | layer depth
+        << 逐个产出九宫格对象 | yield Box objects
+        """
+        size, bits = self.start.size, _bits(self.start.size)
+        mask = (1 << bits) - 1
+        for state in self._views[depth]:
+            yield Box([(state >> (i * bits)) & mask for i in range(size * size)])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m eight_puzzle_search.external',
+                                     description='外存分层宽度优先枚举 | external memory layered breadth first '
+                                                 'enumeration')
+    parser.add_argument('start', help='起点, 如 123456780 | start, e.g. 123456780')
+    parser.add_argument('-d', '--directory', required=True, help='层文件目录 | layer file directory')
+    parser.add_argument('-m', '--max-depth', type=int, help='最大层数 | deepest layer')
+    parser.add_argument('-r', '--run-size', type=int, default=1 << 22, help='内存缓冲区的状态数 | states in buffer')
+    parser.add_argument('--distances', action='store_true', help='另写 3x3 距离表 | also write 3x3 distance table')
+    args = parser.parse_args(argv)
+
+    def _report(info: Dict[str, Any]) -> None:
+        print('{depth:>4} {count:>16} {states:>18} {elapsed:>10.2f}s'.format(**info))
+
+    counts = enumerate_layers(parse_board(args.start), args.directory, args.max_depth, args.run_size,
+                              args.distances, _report)
+    print('共 {} 层, {} 个状态 | {} layers, {} states'.format(len(counts), sum(counts), len(counts), sum(counts)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+并行哈希分布 A* 搜索 (HDA*) | parallel hash distributed A* search (HDA*)
+
+状态按哈希值划分给各个工作进程, 每个进程只维护自己所拥有状态的开放表与已访问表. 搜索以同步轮次进行:
+每轮各进程拓展至多 batch 个节点, 将生成的子节点按所有者分批直接发往对方的收件队列, 再收取发给自己的各批并去重.
+每轮结束时主进程汇总各进程的最小 f 值与找到的目标代价, 当任何开放节点的 f 值都不小于已知最优代价时停止,
+此时没有在途的消息, 所得解为最优解. 路径由主进程沿各状态所有者记录的父状态逐步还原.
+states are hash partitioned to worker processes and each worker keeps the open and closed sets of the states it
+owns. the search runs in synchronous rounds: every worker expands at most batch nodes, sends the generated children
+in one batch per owner straight into the owner's inbox, then collects the batches sent to it and deduplicates them.
+after each round the main process gathers the least f of every worker and the goal costs found, and stops once no
+open node has f below the best known cost; no message is in flight at that point, so the solution is optimal.
+the path is rebuilt by the main process from the parent states recorded by the owner of every state.
+"""
+import multiprocessing
+import os
+from heapq import heappop, heappush
+from math import inf
+from time import perf_counter
+from typing import *
+
+from . import Box, SearchResult, _Manhattan, _bits, _finish, _monitor, _moves, _prologue
+
+_MIX = 0x9E3779B97F4A7C15
+_MASK = (1 << 64) - 1
+
+
+def _owner(state: int, workers: int) -> int:
+    """以乘法哈希决定状态的所有者 | owner of state by multiplicative hashing"""
+    return (((state * _MIX) & _MASK) >> 32) % workers
+
+
+def _worker(index: int, workers: int, start: 'Box', end: 'Box', fast: Callable, commands: 'multiprocessing.Queue',
+            inboxes: List['multiprocessing.Queue'], reports: 'multiprocessing.Queue') -> None:
+    size, goal = start.size, end.state
+    bits, moves = _bits(size), _moves(size)
+    mask = (1 << bits) - 1
+    heuristic = fast(start, end)
+    weight, update = heuristic.g, heuristic.update
+    nodes = {}  # 状态 -> (g, 父状态, 移动) | state -> (g, parent state, move)
+    front = []
+    expanded = generated = duplicates = 0
+    if _owner(start.state, workers) == index:
+        h = heuristic.evaluate(start.state)
+        nodes[start.state] = (0, None, '')
+        front.append((h, 0, start.state, start._zero, h))
+    while True:
+        command = commands.get()
+        if command[0] == 'stop':
+            return
+        if command[0] == 'parent':
+            reports.put(nodes[command[1]][1:])
+            continue
+        if command[0] == 'closest':
+            # 开放表中曼哈顿距离最小的节点, 与 _closest() 的取法相同 | open node nearest to end by manhattan distance,
+            # chosen the same way as _closest()
+            evaluate = _Manhattan(start, end).evaluate
+            reports.put(min(((evaluate(state), g, state) for _, g, state, _, _ in front if nodes[state][0] == g),
+                            default=(inf, inf, None)))
+            continue
+        best, batch = command[1], command[2]
+        outgoing = [[] for _ in range(workers)]
+        done = 0
+        while front and done < batch:
+            key, g, state, zero, h = front[0]
+            if nodes[state][0] < g:
+                heappop(front)
+                continue
+            # f 不小于已知最优代价的节点不会带来更优的解 | nodes with f no less than the best cost cannot improve it
+            if key >= best:
+                break
+            heappop(front)
+            done += 1
+            parent = nodes[state][1]
+            for move, to in moves[zero]:
+                tile = (state >> (to * bits)) & mask
+                child = state - (tile << (to * bits)) + (tile << (zero * bits))
+                if child == parent:
+                    continue
+                generated += 1
+                outgoing[_owner(child, workers)].append((child, to, g + 1, update(h, child, tile, to, zero), state,
+                                                         move))
+        expanded += done
+        for target in range(workers):
+            if target != index:
+                inboxes[target].put(outgoing[target])
+        # 每轮从其他进程各收一批, 轮次之间不会混淆 | one batch from every other worker per round, so rounds never mix
+        found = inf
+        for received in [outgoing[index]] + [inboxes[index].get() for _ in range(workers - 1)]:
+            for child, to, g, h, state, move in received:
+                if child in nodes and nodes[child][0] <= g:
+                    duplicates += 1
+                    continue
+                nodes[child] = (g, state, move)
+                if child == goal:
+                    found = min(found, g)
+                else:
+                    heappush(front, (weight * g + h, g, child, to, h))
+        reports.put((index, front[0][0] if front else inf, found, expanded, generated, duplicates, len(front)))
+
+
+def _path(start: 'Box', state: int, workers: int, commands: List['multiprocessing.Queue'],
+          reports: 'multiprocessing.Queue') -> str:
+    """沿各状态所有者记录的父状态还原移动序列 | rebuild the moves from parents recorded by the owner of each state"""
+    moves = []
+    while state != start.state:
+        commands[_owner(state, workers)].put(('parent', state))
+        state, move = reports.get()
+        moves.append(move)
+    return ''.join(reversed(moves))
+
+
+def parallel_search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int], workers: Optional[int] = None,
+                    batch: int = 256, trace: Optional[Callable[[str, Any], None]] = None,
+                    progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                    interval: float = 1.0, max_nodes: Optional[int] = None,
+                    max_seconds: Optional[float] = None) -> 'SearchResult':
+    """
+    parallel_search(start: 'Box', end: 'Box', fn: Callable[[Dict[str, any]], int], workers: Optional[int] = None,
+                    batch: int = 256, trace: Optional[Callable[[str, Any], None]] = None,
+                    progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                    interval: float = 1.0, max_nodes: Optional[int] = None,
+                    max_seconds: Optional[float] = None) -> 'SearchResult'
+
+    多进程的哈希分布 A* 搜索, 也可通过 search(..., workers=n) 调用 | multi-process hash distributed A* search, also
+    reachable as search(..., workers=n)
+    估价函数须支持快速接口, 如 combine(ls, mhd); 已走步数的系数为 1 时所得解为最优解, 否则找到目标即停止.
+    fn must support the fast interface, e.g. combine(ls, mhd); the solution is optimal when the weight of steps taken
+    is 1, otherwise the search stops at the first goal found.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> fn: 估价函数 | heuristic function
+    >> workers: 工作进程数, 默认为 CPU 核数 | number of worker processes, CPU count by default
+    >> batch: 每个进程每轮拓展的节点数 | nodes expanded per worker per round
+    >> trace: 事件接收器, 仅报告开始与结束 | event sink, reports start and finish only
+    >> progress: 见 search() | see search()
+    >> interval: 见 search() | see search()
+    >> max_nodes: 见 search(), 每轮检查一次 | see search(), checked once per round
+    >> max_seconds: 见 search(), 每轮检查一次 | see search(), checked once per round
+    << 返回搜索结果, stats 中另有 'workers' 与 'rounds' | return SearchResult object with 'workers' and 'rounds' in stats
+    """
+    fast = getattr(fn, 'fast', None)
+    if fast is None:
+        raise ValueError('并行搜索需要支持快速接口的估价函数 | parallel search needs a heuristic with the fast interface')
+    workers = workers or os.cpu_count() or 1
+    if batch < 1:
+        raise ValueError('每轮拓展的节点数必须为正 | batch must be positive')
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began = perf_counter()
+    optimal = fast(start, end).g == 1
+    monitor = _monitor(progress, interval, began, max_nodes, max_seconds)
+    # 优先使用 fork, 使 combine() 等无法序列化的估价函数也能传给子进程 | prefer fork so that heuristics which cannot
+    # be pickled, such as those from combine(), still reach the workers
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    commands = [context.Queue() for _ in range(workers)]
+    inboxes = [context.Queue() for _ in range(workers)]
+    reports = context.Queue()
+    processes = [context.Process(target=_worker, args=(index, workers, start, end, fast, commands[index], inboxes,
+                                                       reports), daemon=True) for index in range(workers)]
+    for process in processes:
+        process.start()
+    best, rounds, peak, cancelled = inf, 0, 0, False
+    totals = [0, 0, 0]  # expanded, generated, duplicates
+    try:
+        while True:
+            rounds += 1
+            for queue in commands:
+                queue.put(('round', best, batch))
+            answers = [reports.get() for _ in range(workers)]
+            best = min([best] + [answer[2] for answer in answers])
+            least = min(answer[1] for answer in answers)
+            totals = [sum(answer[i] for answer in answers) for i in (3, 4, 5)]
+            peak = max(peak, sum(answer[6] for answer in answers))
+            if least >= best or least == inf or best < inf and not optimal:
+                break
+            if monitor is not None and monitor(totals[0], totals[1], peak, totals[2], totals[1] + 1):
+                cancelled = True
+                break
+        box, partial = None, None
+        if best < inf and not cancelled:
+            box = Box(end.value, start.history + _path(start, end.state, workers, commands, reports))
+        elif cancelled:
+            # 各进程报告最近的开放节点, 取其中最近者 | every worker reports its nearest open node, keep the nearest
+            for queue in commands:
+                queue.put(('closest',))
+            _, _, state = min((reports.get() for _ in range(workers)), key=lambda answer: answer[:2])
+            partial = '' if state is None else _path(start, state, workers, commands, reports)
+    finally:
+        for queue in commands:
+            queue.put(('stop',))
+        for process in processes:
+            process.join()
+    stats = {'duplicates': totals[2], 'evaluations': totals[1] + 1, 'workers': workers, 'rounds': rounds}
+    if cancelled:
+        monitor.stop(stats, partial)
+    return _finish(start, box, totals[0], totals[1], peak, began, trace, stats)
+
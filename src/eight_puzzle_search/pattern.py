@@ -0,0 +1,351 @@
+"""
+可加的模式数据库启发函数 | additive pattern database heuristics
+
+将数字划分为互不相交的若干组, 对每组只关注组内数字和空格的位置, 从目标出发逆向宽度优先搜索,
+只计组内数字的移动步数, 各组的值相加即为可采纳的启发值.
+tiles are split into disjoint groups; for each group only its tiles and the blank are tracked during a backward
+breadth first search from the goal, counting moves of group tiles only, so the values of all groups add up
+to an admissible heuristic.
+
+文件格式 (版本 1) | file format (version 1):
+    header: magic b'EPPD', version (uint16), size (uint8), tiles count k (uint8), entries (uint32),
+            goal (size * size bytes), tiles (k bytes)
+    body:   entries bytes, indexed by the rank of the positions of the pattern tiles
+"""
+import mmap
+import os
+import struct
+from array import array
+from typing import *
+
+from . import Box, FastHeuristic, _moves
+
+_MAGIC = b'EPPD'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHBBI')
+_UNSEEN = 255
+_RECORD = struct.Struct('<IQQ')
+
+
+def _count(cells: int, k: int) -> int:
+    """从 cells 格中有序选出 k 格的方案数 | number of ordered choices of k cells out of cells"""
+    total = 1
+    for i in range(k):
+        total *= cells - i
+    return total
+
+
+def _rank(positions: Sequence[int], cells: int) -> int:
+    """互不相同的位置序列的混合进制序号 | mixed radix rank of a sequence of distinct positions"""
+    rank = 0
+    for i, pos in enumerate(positions):
+        digit = pos
+        for j in range(i):
+            if positions[j] < pos:
+                digit -= 1
+        rank = rank * (cells - i) + digit
+    return rank
+
+
+def _unrank(rank: int, k: int, cells: int) -> List[int]:
+    digits = []
+    for i in range(k - 1, -1, -1):
+        rank, digit = divmod(rank, cells - i)
+        digits.append(digit)
+    free = list(range(cells))
+    return [free.pop(digit) for digit in reversed(digits)]
+
+
+class PatternDatabase:
+    """
+    PatternDatabase(path: str) -> 'PatternDatabase'
+
+    以 mmap 方式载入的模式数据库, 可直接作为 search() 的 fn 或 ida() 的启发函数
+    pattern database loaded via mmap, usable as fn of search() or heuristic of ida()
+    >> path: 模式数据库文件路径 | pattern database file path
+    << 载入的模式数据库对象 | loaded PatternDatabase object
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, k, entries = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise ValueError('不是模式数据库文件 | not a pattern database file')
+        if version != _VERSION:
+            raise ValueError('不支持的模式数据库版本 | unsupported pattern database version')
+        cells = size * size
+        self._offset = _HEADER.size + cells + k
+        if len(self._map) != self._offset + entries or entries != _count(cells, k):
+            raise ValueError('模式数据库文件不完整 | pattern database file is truncated')
+        self.size = size
+        self.goal = Box(list(self._map[_HEADER.size:_HEADER.size + cells]))
+        self.tiles = tuple(self._map[_HEADER.size + cells:self._offset])
+
+    def __enter__(self) -> 'PatternDatabase':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        'PatternDatabase'.close() -> None
+
+        关闭内存映射 | close memory map
+        """
+        self._map.close()
+
+    def lookup(self, value: List[int]) -> int:
+        """
+        'PatternDatabase'.lookup(value: List[int]) -> int
+
+        查询组内数字位于 value 中各位置时的最少移动步数 | query least moves of pattern tiles at their places in value
+        >> value: 九宫格对象的值 | value of Box object
+        << 返回启发值 | return heuristic value
+        """
+        return self._map[self._offset + _rank([value.index(tile) for tile in self.tiles], len(value))]
+
+    def __call__(self, task: dict) -> int:
+        """模式数据库作为估价函数 (fn) | pattern database as heuristic function (fn)"""
+        return self.lookup(task['now'])
+
+    def _entry(self, positions: Sequence[int]) -> int:
+        # 组内数字位于 positions 时的启发值 | heuristic value with pattern tiles at positions
+        return self._map[self._offset + _rank(positions, self.size * self.size)]
+
+    def fast(self, start: 'Box', end: 'Box') -> 'FastHeuristic':
+        """
+        'PatternDatabase'.fast(start: 'Box', end: 'Box') -> 'FastHeuristic'
+
+        快速接口, 未移动组内数字时启发值不变 | fast interface, value unchanged when no pattern tile moves
+        """
+        return _Lookup(start, end, [self])
+
+
+class AdditivePatternDatabase:
+    """
+    AdditivePatternDatabase(databases: Sequence['PatternDatabase']) -> 'AdditivePatternDatabase'
+
+    互不相交的模式数据库之和 | sum of disjoint pattern databases
+    >> databases: 模式数据库列表 | list of PatternDatabase objects
+    << 可加模式数据库对象 | AdditivePatternDatabase object
+    """
+
+    def __init__(self, databases: Sequence['PatternDatabase']) -> None:
+        tiles = [tile for database in databases for tile in database.tiles]
+        if len(tiles) != len(set(tiles)):
+            raise ValueError('模式数据库的数字必须互不相交 | tiles of pattern databases must be disjoint')
+        if len({database.goal.state for database in databases}) > 1:
+            raise ValueError('模式数据库的目标必须相同 | pattern databases must share the same goal')
+        self.databases = tuple(databases)
+        self.goal = self.databases[0].goal
+
+    def lookup(self, value: List[int]) -> int:
+        """
+        'AdditivePatternDatabase'.lookup(value: List[int]) -> int
+
+        各模式数据库启发值之和 | sum of heuristic values of all pattern databases
+        >> value: 九宫格对象的值 | value of Box object
+        << 返回启发值 | return heuristic value
+        """
+        return sum(database.lookup(value) for database in self.databases)
+
+    def __call__(self, task: dict) -> int:
+        """可加模式数据库作为估价函数 (fn) | additive pattern database as heuristic function (fn)"""
+        return self.lookup(task['now'])
+
+    def fast(self, start: 'Box', end: 'Box') -> 'FastHeuristic':
+        """
+        'AdditivePatternDatabase'.fast(start: 'Box', end: 'Box') -> 'FastHeuristic'
+
+        快速接口, 每步只重查被移动数字所在的一组 | fast interface, only the group of the moved tile is looked up again
+        """
+        return _Lookup(start, end, self.databases)
+
+    def close(self) -> None:
+        """
+        'AdditivePatternDatabase'.close() -> None
+
+        关闭全部内存映射 | close all memory maps
+        """
+        for database in self.databases:
+            database.close()
+
+
+class _Lookup(FastHeuristic):
+
+    def __init__(self, start: 'Box', end: 'Box', databases: Sequence['PatternDatabase']) -> None:
+        super().__init__(start, end)
+        if databases[0].goal.value != self.goal:
+            raise ValueError('模式数据库的目标与 end 不符 | goal of pattern database does not match end')
+        self.databases = databases
+        # 数字 -> (所在的模式数据库, 在组内的序号) | tile -> (its pattern database, index within the group)
+        self.owner = {tile: (database, i) for database in databases for i, tile in enumerate(database.tiles)}
+        self.shifts = [pos * self.bits for pos in range(self.size * self.size)]
+
+    def _where(self, state: int) -> List[int]:
+        # 一次扫描得到每个数字的位置 | positions of all tiles in one scan
+        where, mask = [0] * len(self.shifts), (1 << self.bits) - 1
+        for pos, shift in enumerate(self.shifts):
+            where[(state >> shift) & mask] = pos
+        return where
+
+    def evaluate(self, state: int) -> int:
+        where = self._where(state)
+        return sum(database._entry([where[tile] for tile in database.tiles]) for database in self.databases)
+
+    def update(self, h: int, state: int, tile: int, src: int, dst: int) -> int:
+        owner = self.owner.get(tile)
+        if owner is None:
+            return h
+        # 只重排被移动数字所在的一组, 父节点与子节点仅差该数字位于 src 还是 dst
+        # re-rank only the group of the moved tile, parent and child differ only in that tile being at src or dst
+        database, i = owner
+        where = self._where(state)
+        positions = [where[t] for t in database.tiles]
+        child = database._entry(positions)
+        positions[i] = src
+        return h - database._entry(positions) + child
+
+
+def build_pattern_database(goal: 'Box', tiles: Sequence[int], path: str,
+                           progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    build_pattern_database(goal: 'Box', tiles: Sequence[int], path: str,
+                           progress: Optional[Callable[[int, int], None]] = None) -> None
+
+    从 goal 出发做 0-1 宽度优先搜索生成模式数据库. 每完成一层只向 path + '.partial' 追加该层新确定的状态序号,
+    中断后重新调用即可回放续建文件并继续. 生成时每个含空格的抽象状态占 1 字节内存,
+    十五数码 7 个数字一组约 0.5 GB, 8 个数字一组约 4 GB.
+    build pattern database by 0-1 breadth first search from goal. after every layer only the ranks settled in that
+    layer are appended to path + '.partial', so an interrupted build replays the partial file and resumes when called
+    again. building takes about one byte per abstract state with the blank, e.g. 0.5 GB for a group of 7 tiles of
+    15-puzzle and 4 GB for a group of 8
+    >> goal: 目标九宫格对象 | goal Box object
+    >> tiles: 组内数字 | pattern tiles
+    >> path: 输出文件路径 | output file path
+    >> progress: 每完成一层时调用 progress(深度, 已访问状态数) | called as progress(depth, states seen) per layer
+    """
+    size, value = goal.size, goal.value
+    cells, k, tiles = size * size, len(tiles), tuple(tiles)
+    if not tiles or 0 in tiles or len(set(tiles)) != k or not set(tiles) <= set(value):
+        raise ValueError('组内数字必须是互不相同的非空格数字 | pattern tiles must be distinct non-blank tiles')
+    moves, radix = _moves(size), cells - k
+    entries, states = _count(cells, k), _count(cells, k + 1)
+    typecode = 'I' if states <= 1 << 32 else 'Q'
+    partial, prefix = path + '.partial', bytes(value) + bytes(tiles)
+
+    # seen: 含空格的抽象状态 -> 代价, table: 不含空格的抽象状态 -> 最小代价
+    # seen: abstract state with blank -> cost, table: abstract state without blank -> least cost
+    seen, table = bytearray([_UNSEEN]) * states, bytearray([_UNSEEN]) * entries
+    # 续建文件在 prefix 之后由若干条记录组成: 深度 d, 第 d - 1 层由零代价移动加入的状态序号, 第 d 层的候选状态序号
+    # after prefix the partial file holds records: depth d, ranks joining layer d - 1 by zero-cost moves and ranks
+    # of candidates of layer d
+    depth, layer = 0, array(typecode)
+    if os.path.exists(partial):
+        with open(partial, 'r+b') as file:
+            if file.read(len(prefix)) != prefix:
+                raise ValueError('续建文件与目标或组内数字不符 | partial file does not match goal or tiles')
+            end = file.tell()
+            while True:
+                record = file.read(_RECORD.size)
+                if len(record) < _RECORD.size:
+                    break
+                cost, joined, candidates = _RECORD.unpack(record)
+                ranks = array(typecode)
+                data = file.read((joined + candidates) * ranks.itemsize)
+                if len(data) < (joined + candidates) * ranks.itemsize:
+                    break
+                ranks.frombytes(data)
+                for i, rank in enumerate(ranks):
+                    c = cost - 1 if i < joined else cost
+                    if seen[rank] > c:
+                        seen[rank] = c
+                        if table[rank // radix] > c:
+                            table[rank // radix] = c
+                depth, layer, end = cost, ranks[joined:], file.tell()
+            # 丢弃中断时写了一半的记录 | drop a record half written when interrupted
+            file.truncate(end)
+        if not layer:
+            raise ValueError('续建文件不完整 | partial file is truncated')
+    else:
+        root = _rank([value.index(tile) for tile in tiles] + [value.index(0)], cells)
+        seen[root], table[root // radix] = 0, 0
+        layer.append(root)
+        with open(partial, 'wb') as file:
+            file.write(prefix)
+            file.write(_RECORD.pack(0, 0, 1))
+            layer.tofile(file)
+
+    total = states - seen.count(_UNSEEN)
+    while layer:
+        following = array(typecode)
+        i, n = 0, len(layer)
+        # 零代价移动加入本层, 组内数字的移动加入下一层 | zero-cost moves join this layer, pattern moves join the next
+        while i < len(layer):
+            rank = layer[i]
+            i += 1
+            if seen[rank] != depth:
+                continue
+            positions = _unrank(rank, k + 1, cells)
+            blank = positions[k]
+            for _, target in moves[blank]:
+                child = positions[:]
+                child[k] = target
+                if target in positions:
+                    child[positions.index(target)] = blank
+                    cost = depth + 1
+                else:
+                    cost = depth
+                child_rank = _rank(child, cells)
+                if seen[child_rank] <= cost:
+                    continue
+                if seen[child_rank] == _UNSEEN:
+                    total += 1
+                seen[child_rank] = cost
+                if table[child_rank // radix] > cost:
+                    table[child_rank // radix] = cost
+                (layer if cost == depth else following).append(child_rank)
+        depth += 1
+        if following:
+            with open(partial, 'ab') as file:
+                file.write(_RECORD.pack(depth, len(layer) - n, len(following)))
+                layer[n:].tofile(file)
+                following.tofile(file)
+        layer = following
+        if progress is not None:
+            progress(depth - 1, total)
+
+    header = _HEADER.pack(_MAGIC, _VERSION, size, k, entries) + bytes(value) + bytes(tiles)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(header)
+        file.write(table)
+    os.replace(path + '.tmp', path)
+    if os.path.exists(partial):
+        os.remove(partial)
+
+
+def build_additive(goal: 'Box', partition: Sequence[Sequence[int]], directory: str,
+                   progress: Optional[Callable[[int, int], None]] = None) -> 'AdditivePatternDatabase':
+    """
+    build_additive(goal: 'Box', partition: Sequence[Sequence[int]], directory: str,
+                   progress: Optional[Callable[[int, int], None]] = None) -> 'AdditivePatternDatabase'
+
+    按划分生成 (或载入已生成的) 各个模式数据库并组合为可加启发函数
+    build (or load already built) pattern databases of a partition and combine them into an additive heuristic
+    >> goal: 目标九宫格对象 | goal Box object
+    >> partition: 数字划分, 如十五数码的 6-6-3 划分 | tile partition, e.g. a 6-6-3 partition of 15-puzzle
+    >> directory: 模式数据库目录 | pattern database directory
+    >> progress: 进度回调 | progress callback
+    << 返回可加模式数据库对象 | return AdditivePatternDatabase object
+    """
+    os.makedirs(directory, exist_ok=True)
+    databases = []
+    for tiles in partition:
+        path = os.path.join(directory, '{}x{}_{}_{}.eppd'.format(
+            goal.size, goal.size, '-'.join(map(str, goal.value)), '-'.join(map(str, tiles))))
+        if not os.path.exists(path):
+            build_pattern_database(goal, tiles, path, progress)
+        databases.append(PatternDatabase(path))
+    return AdditivePatternDatabase(databases)
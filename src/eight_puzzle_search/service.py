@@ -0,0 +1,409 @@
+"""
+求解服务 | solver service
+
+基于 asyncio 的常驻求解服务: 通过本地套接字或标准输入输出逐行接收 JSON 请求, 分发到预热的进程池求解,
+支持逐请求的时限与节点预算, 协作式取消, 以及队列满时的背压 (暂停读取新请求). 每个响应都附带求解统计.
+a long-running asyncio solver service: JSON requests arrive line by line over a local socket or stdin/stdout and are
+dispatched to a warm process pool, with per-request deadlines and node budgets, cooperative cancellation, and
+backpressure once the queue fills (new requests are not read until there is room). every response carries solve stats.
+
+请求 | request:
+    {"id": 1, "start": "283164705", "end": "123804765", "method": "astar", "heuristic": "mhd",
+     "deadline": 5.0, "max_nodes": 1000000}
+    {"cancel": 1}
+响应 | response:
+    {"id": 1, "ok": true, "solvable": true, "moves": "DDRUL", "length": 5, "stats": {...}}
+    {"id": 1, "ok": false, "error": "...", "reason": "deadline" | "budget" | "cancelled" | "invalid", "stats": {...}}
+
+命令行 | command line:
+    python -m eight_puzzle_search.service --port 8765
+    python -m eight_puzzle_search.service --stdio
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import *
+
+from . import (bidirectional_search, breadth_first_search, combine, double_breadth_first_search, is_solvable,
+               iterative_deepening_a_star, lowest_step, manhattan_distance, most_at_place, search)
+from .batch import parse_board
+from .table import lookup_solve
+
+METHODS = ('auto', 'lookup', 'astar', 'ida', 'mm', 'bfs', 'dbfs')
+HEURISTICS = {'mhd': manhattan_distance, 'mp': most_at_place}
+_REASONS = {'nodes': 'budget', 'seconds': 'deadline'}
+_KEYS = (str, int, float)  # 可作为请求 id 的 JSON 类型 | JSON types usable as request id
+
+
+def _board(value: Union[str, List[int]]) -> 'Box':
+    return parse_board(value) if isinstance(value, str) else parse_board(','.join(map(str, value)))
+
+
+def _invalid(request: Dict[str, Any]) -> Optional[str]:
+    """在提交进程池之前检查请求 id 与预算, 有误时返回错误信息 | check the request id and budgets before anything
+    reaches the pool, return the error message if any"""
+    key = request.get('id')
+    if key is not None and not isinstance(key, _KEYS):
+        return '请求 id 必须是字符串或数字 | request id must be a string or number'
+    for name in ('deadline', 'max_nodes'):
+        value = request.get(name)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or not value >= 0):
+            return '{} 必须是非负数 | {} must be a non-negative number'.format(name, name)
+    return None
+
+
+def _solve(request: Dict[str, Any], cancelled: Any, reported: Any, directory: Optional[str]) -> Dict[str, Any]:
+    """在工作进程中求解一个请求 | solve one request in a worker process"""
+    began = perf_counter()
+    response = {'id': request.get('id')}
+    try:
+        start, end = _board(request['start']), _board(request['end'])
+        method = request.get('method', 'auto')
+        if method not in METHODS:
+            raise ValueError('未知的求解方式 | unknown method: {}'.format(method))
+        heuristic = HEURISTICS.get(request.get('heuristic', 'mhd'))
+        if heuristic is None:
+            raise ValueError('未知的启发函数 | unknown heuristic: {}'.format(request.get('heuristic')))
+        response['solvable'] = solvable = is_solvable(start, end)
+    except (KeyError, ValueError) as error:
+        response.update(ok=False, reason='invalid', error=str(error))
+        return response
+    if not solvable:
+        response.update(ok=True, moves=None, length=None, stats={'elapsed': perf_counter() - began})
+        return response
+    if method == 'auto':
+        method = 'lookup' if start.size == 3 else 'ida'
+    if method == 'lookup':
+        try:
+            moves = lookup_solve(start, end, directory)
+        except ValueError as error:
+            response.update(ok=False, reason='invalid', error=str(error))
+            return response
+        response.update(ok=True, moves=moves, length=len(moves), stats={'elapsed': perf_counter() - began})
+        return response
+
+    def _progress(info: Dict[str, Any]) -> bool:
+        # 取消标记与进度跨进程读写, 只每 50 毫秒一次 | the cancel flags and progress live in another process, so they
+        # are read and written every 50 ms only
+        key = request.get('id')
+        if key in cancelled:
+            return False
+        if key is not None:
+            reported[key] = info
+        return True
+
+    kwargs = {'progress': _progress, 'interval': 0.05, 'max_nodes': request.get('max_nodes'),
+              'max_seconds': request.get('deadline')}
+    if method == 'astar':
+        result = search(start, end, combine(lowest_step, heuristic), **kwargs)
+    elif method == 'ida':
+        result = iterative_deepening_a_star(start, end, heuristic, **kwargs)
+    elif method == 'mm':
+        result = bidirectional_search(start, end, heuristic, **kwargs)
+    elif method == 'bfs':
+        result = breadth_first_search(start, end, **kwargs)
+    else:
+        result = double_breadth_first_search(start, end, **kwargs)
+    stats = dict(result.stats, expanded=result.expanded, generated=result.generated, frontier=result.frontier,
+                 elapsed=result.elapsed)
+    reason = 'cancelled' if stats.pop('cancelled', False) else _REASONS.get(stats.pop('exhausted', None), 'failed')
+    if result.solved:
+        response.update(ok=True, moves=result.path, length=result.depth, stats=stats)
+    else:
+        response.update(ok=False, reason=reason, stats=stats, error='搜索已停止 | search stopped: {}'.format(reason))
+    return response
+
+
+def _warm() -> int:
+    return os.getpid()
+
+
+class SolverService:
+    """
+    SolverService(workers: Optional[int] = None, queue_size: int = 64, directory: Optional[str] = None)
+        -> 'SolverService'
+
+    求解服务: 请求队列 + 预热的进程池 | solver service: request queue plus warm process pool
+    >> workers: 工作进程数, 默认为 CPU 核数 | number of worker processes, CPU count by default
+    >> queue_size: 队列容量, 满时 submit() 等待 | queue capacity, submit() waits while full
+    >> directory: 距离表目录 | distance table directory
+    << 求解服务对象, 使用前须 await start() | SolverService object, await start() before use
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 64, directory: Optional[str] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.directory = directory
+        self._queue = asyncio.Queue(queue_size)
+        self._pool = None
+        self._manager = None
+        self._cancelled = None
+        self._reported = None
+        self._waiting = {}
+        self._running = set()
+        self._tasks = []
+
+    async def start(self) -> None:
+        """
+        'SolverService'.start() -> None
+
+        启动并预热进程池 | start and warm up the process pool
+        """
+        loop = asyncio.get_running_loop()
+        self._manager = multiprocessing.Manager()
+        self._cancelled = self._manager.dict()
+        self._reported = self._manager.dict()
+        self._pool = ProcessPoolExecutor(self.workers)
+        await asyncio.gather(*[loop.run_in_executor(self._pool, _warm) for _ in range(self.workers)])
+        self._tasks = [asyncio.ensure_future(self._dispatch()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        """
+        'SolverService'.close() -> None
+
+        停止分发并关闭进程池 | stop dispatching and shut down the process pool
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_result({'ok': False, 'reason': 'cancelled', 'error': '服务已关闭 | service closed'})
+        self._pool.shutdown()
+        self._manager.shutdown()
+        self._cancelled = self._reported = None
+
+    async def __aenter__(self) -> 'SolverService':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """
+        'SolverService'.pending -> int
+
+        排队中的请求数 | number of queued requests
+        """
+        return self._queue.qsize()
+
+    async def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        'SolverService'.submit(request: Dict[str, Any]) -> Dict[str, Any]
+
+        提交请求并等待响应, 队列满时先等待空位 | submit a request and await the response, waiting for room when full
+        >> request: 请求字典 | request dict
+        << 返回响应字典 | return response dict
+        """
+        future = await self._enqueue(request)
+        try:
+            return await future
+        finally:
+            self._forget(request.get('id'), future)
+
+    async def _enqueue(self, request: Dict[str, Any]) -> 'asyncio.Future':
+        # 登记并放入队列, 队列满时等待空位 | register and enqueue, waiting for room while the queue is full
+        future = asyncio.get_running_loop().create_future()
+        key, error = request.get('id'), _invalid(request)
+        if error is not None:
+            future.set_result({'id': key, 'ok': False, 'reason': 'invalid', 'error': error})
+            return future
+        if key is not None:
+            self._waiting[key] = future
+        try:
+            await self._queue.put((request, future))
+        except BaseException:
+            self._forget(key, future)
+            raise
+        return future
+
+    def _forget(self, key: Any, future: 'asyncio.Future') -> None:
+        if isinstance(key, _KEYS) and self._waiting.get(key) is future:
+            del self._waiting[key]
+
+    def cancel(self, key: Any) -> bool:
+        """
+        'SolverService'.cancel(key: Any) -> bool
+
+        取消请求: 排队中的立即得到取消的响应, 求解中的在下一次检查时停止 | cancel a request: queued ones are answered
+        as cancelled at once, running ones stop at their next check
+        >> key: 请求 id | request id
+        << 返回是否找到该请求 | return whether the request was found
+        """
+        future = self._waiting.get(key) if isinstance(key, _KEYS) else None
+        if future is None:
+            return False
+        self._cancelled[key] = True
+        if key not in self._running and not future.done():
+            future.set_result({'id': key, 'ok': False, 'reason': 'cancelled', 'error': '请求已取消 | request cancelled'})
+        return True
+
+    def _release(self, key: Any) -> None:
+        # 求解结束后清除取消标记与进度 | clear the cancel flag and progress once solving ends
+        if self._cancelled is not None:
+            self._cancelled.pop(key, None)
+            self._reported.pop(key, None)
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request, future = await self._queue.get()
+            key, began, solving = request.get('id'), perf_counter(), None
+            try:
+                if key is not None and key in self._cancelled:
+                    response = {'id': key, 'ok': False, 'reason': 'cancelled', 'error': '请求已取消 | request cancelled'}
+                else:
+                    if key is not None:
+                        self._running.add(key)
+                    solving = loop.run_in_executor(self._pool, _solve, request, self._cancelled, self._reported,
+                                                   self.directory)
+                    deadline = request.get('deadline')
+                    try:
+                        # 求解器自行检查时限, 这里只兜底不检查时限的查表求解 | solvers check deadlines themselves,
+                        # this only backs up lookup solving, which does not
+                        response = await asyncio.wait_for(asyncio.shield(solving), None if deadline is None
+                                                          else deadline + 1.0)
+                    except asyncio.TimeoutError:
+                        # 通知仍在求解的进程停下, 并附上它最近一次报告的统计 | tell the worker still solving to stop
+                        # and attach the stats it reported last
+                        stats = {}
+                        if key is not None:
+                            self._cancelled[key] = True
+                            stats.update(self._reported.get(key, {}))
+                        stats['elapsed'] = perf_counter() - began
+                        response = {'id': key, 'ok': False, 'reason': 'deadline', 'stats': stats,
+                                    'error': '搜索已停止 | search stopped: deadline'}
+                if not future.done():
+                    future.set_result(response)
+            except Exception as error:
+                if not future.done():
+                    future.set_result({'id': key, 'ok': False, 'reason': 'error', 'error': repr(error)})
+            finally:
+                if key is not None:
+                    self._running.discard(key)
+                    if solving is None or solving.done():
+                        self._release(key)
+                    else:
+                        # 取消标记须保留到进程真正停下 | the cancel flag must stay until the worker really stops
+                        solving.add_done_callback(lambda _, key=key: self._release(key))
+                self._queue.task_done()
+
+    async def handle(self, reader: 'asyncio.StreamReader', writer: Any) -> None:
+        """
+        'SolverService'.handle(reader: 'asyncio.StreamReader', writer: Any) -> None
+
+        处理一条 JSON Lines 连接, 响应按完成顺序写回 | serve one JSON Lines connection, responses are written back in
+        completion order
+        """
+        lock, running = asyncio.Lock(), set()
+
+        async def _reply(response: Dict[str, Any]) -> None:
+            async with lock:
+                writer.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+                await writer.drain()
+
+        async def _serve(request: Dict[str, Any], future: 'asyncio.Future') -> None:
+            try:
+                await _reply(await future)
+            finally:
+                self._forget(request.get('id'), future)
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('请求必须是 JSON 对象 | request must be a JSON object')
+            except ValueError as error:
+                await _reply({'id': None, 'ok': False, 'reason': 'invalid', 'error': str(error)})
+                continue
+            if 'cancel' in request:
+                await _reply({'id': request['cancel'], 'cancel': self.cancel(request['cancel'])})
+                continue
+            # 队列满时在此等待, 不再读取新请求, 即为背压 | waiting here while the queue is full stops reading, which
+            # is the backpressure
+            future = await self._enqueue(request)
+            task = asyncio.ensure_future(_serve(request, future))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, workers: Optional[int] = None, queue_size: int = 64,
+                directory: Optional[str] = None, ready: Optional[Callable[[int], None]] = None) -> None:
+    """
+    serve(host: str = '127.0.0.1', port: int = 8765, workers: Optional[int] = None, queue_size: int = 64,
+          directory: Optional[str] = None, ready: Optional[Callable[[int], None]] = None) -> None
+
+    在本地套接字上提供求解服务, 直到被取消 | serve on a local socket until cancelled
+    >> host, port: 监听地址, port 为 0 时自动选择 | address to listen on, picked automatically when port is 0
+    >> workers, queue_size, directory: 见 SolverService | see SolverService
+    >> ready: 开始监听后以实际端口调用 | called with the actual port once listening
+    """
+    async with SolverService(workers, queue_size, directory) as service:
+        server = await asyncio.start_server(service.handle, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+
+class _StdoutWriter:
+
+    def write(self, data: bytes) -> None:
+        sys.stdout.buffer.write(data)
+
+    async def drain(self) -> None:
+        sys.stdout.buffer.flush()
+
+    def close(self) -> None:
+        sys.stdout.buffer.flush()
+
+
+async def serve_stdio(workers: Optional[int] = None, queue_size: int = 64, directory: Optional[str] = None) -> None:
+    """
+    serve_stdio(workers: Optional[int] = None, queue_size: int = 64, directory: Optional[str] = None) -> None
+
+    通过标准输入输出提供求解服务, 直到输入结束 | serve over stdin/stdout until end of input
+    >> workers, queue_size, directory: 见 SolverService | see SolverService
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    async with SolverService(workers, queue_size, directory) as service:
+        await service.handle(reader, _StdoutWriter())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m eight_puzzle_search.service',
+                                     description='八数码问题求解服务 | solver service')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 | host')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 | port')
+    parser.add_argument('--stdio', action='store_true', help='使用标准输入输出 | serve over stdin/stdout')
+    parser.add_argument('-w', '--workers', type=int, help='进程数 | number of processes')
+    parser.add_argument('-q', '--queue', type=int, default=64, help='队列容量 | queue capacity')
+    parser.add_argument('-d', '--directory', help='距离表目录 | distance table directory')
+    args = parser.parse_args(argv)
+    try:
+        if args.stdio:
+            asyncio.run(serve_stdio(args.workers, args.queue, args.directory))
+        else:
+            asyncio.run(serve(args.host, args.port, args.workers, args.queue, args.directory))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
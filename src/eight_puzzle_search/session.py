@@ -0,0 +1,391 @@
+"""
+可分步执行并可存档的搜索会话 | steppable and checkpointable search sessions
+
+搜索会话把 A* (与 search() 相同) 或有限深度优先搜索 (与不用置换表的 depth_limited_search() 相同) 的全部状态保存
+在对象中, 每次调用 step() 只推进给定的拓展数或时长, 于是长时间的求解可以与其他工作分时进行. save() 将开放表,
+已见状态表与计数写入紧凑的存档文件, load() 可在另一个进程中载入并继续, 结果与一次性搜索相同.
+a search session keeps the whole state of A* (same as search()) or depth limited search (same as
+depth_limited_search() without a transposition table) in an object, and every step() call only advances by the
+given number of expansions or seconds, so long solves can be time-sliced with other work. save() writes the open
+list, the table of seen states and the counters into a compact checkpoint file that load() may resume in another
+process with the same result as an uninterrupted search.
+
+文件格式 (版本 1) | file format (version 1):
+    header: magic b'EPSS', version (uint16), meta length (uint32), meta (JSON)
+    astar:  seen states (width bytes each), seen codes (uint32, step << 3 | move),
+            open states (width bytes each), open sequence numbers (uint64)
+    dls:    next move index of every frame on the stack (uint8)
+"""
+import json
+import os
+import struct
+from array import array
+from heapq import heapify, heappop, heappush
+from time import perf_counter
+from typing import *
+
+from . import (Box, SearchResult, _Task, _bits, _monitor, _moves, _prologue, _slide, _unpack, combine,
+               lowest_step, manhattan_distance)
+
+_MAGIC = b'EPSS'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHI')
+_CODES = 'UDLR'
+_REVERSE = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+_ROOT = 4  # 起点的移动编码 | move code of the start
+
+
+def _zero(state: int, bits: int) -> int:
+    """紧凑编码中空格的位置 | blank position of a compact encoding"""
+    mask, zero = (1 << bits) - 1, 0
+    while (state >> (zero * bits)) & mask:
+        zero += 1
+    return zero
+
+
+class _Pending:
+    """供估价函数按需读取历史记录的占位节点 | stand-in node whose history is rebuilt only when fn reads it"""
+
+    __slots__ = ('session', 'state')
+
+    def __init__(self, session: 'SearchSession', state: int) -> None:
+        self.session = session
+        self.state = state
+
+    @property
+    def history(self) -> str:
+        return self.session.start.history + self.session._path(self.state)
+
+
+class SearchSession:
+    """
+    SearchSession(start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                  method: str = 'astar', limit: Optional[int] = None) -> 'SearchSession'
+
+    可分步执行并可存档的搜索会话 | steppable and checkpointable search session
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> fn: 'astar' 的估价函数, 见 search(), 默认为 combine(ls, mhd) | heuristic function of 'astar', see search(),
+    >> combine(ls, mhd) by default
+    >> method: 'astar' 或 'dls' | 'astar' or 'dls'
+    >> limit: 'dls' 的搜索深度限制 | search depth limit of 'dls'
+    << 搜索会话对象 | SearchSession object
+    """
+
+    def __init__(self, start: 'Box', end: 'Box', fn: Optional[Callable[[Dict[str, any]], int]] = None,
+                 method: str = 'astar', limit: Optional[int] = None) -> None:
+        if method not in ('astar', 'dls'):
+            raise ValueError("搜索方法只能是 'astar' 或 'dls' | method must be 'astar' or 'dls'")
+        if method == 'dls' and (limit is None or limit < 0):
+            raise ValueError('dls 需要不小于 0 的深度限制 | dls needs a depth limit of at least 0')
+        self.start, self.end, self.method, self.limit = start, end, method, limit
+        self.expanded = self.generated = self.peak = self.duplicates = self.evaluations = 0
+        self.elapsed = 0.0
+        self.result = _prologue(start, end, None)
+        self._setup(fn)
+        if self.result is not None:
+            return
+        if method == 'astar':
+            self._seen = {start.state: _ROOT}
+            self._sequence = 1
+            self.evaluations = 1
+            self._front = [self._entry(start.state, start._zero, 0, 0)]
+        else:
+            self._stack = [[start.state, start._zero, 0, '']] if limit > 0 else []
+            self.expanded = self.peak = len(self._stack)
+
+    def _setup(self, fn: Optional[Callable[[Dict[str, any]], int]]) -> None:
+        self.size, self.bits = self.start.size, _bits(self.start.size)
+        self._moves, self._mask = _moves(self.size), (1 << self.bits) - 1
+        self._seen, self._front, self._stack, self._sequence = {}, [], [], 0
+        if self.method == 'astar':
+            self.fn = combine(lowest_step, manhattan_distance) if fn is None else fn
+            fast = getattr(self.fn, 'fast', None)
+            self._heuristic = None if fast is None else fast(self.start, self.end)
+
+    def _entry(self, state: int, zero: int, step: int, sequence: int) -> tuple:
+        """由完整计算的启发值构造开放表条目 | open list entry with a fully computed heuristic value"""
+        if self._heuristic is None:
+            return self._key(state, zero), sequence, step, 0, state, zero
+        h = self._heuristic.evaluate(state)
+        return self._heuristic.g * step + h, sequence, step, h, state, zero
+
+    def _key(self, state: int, zero: int) -> int:
+        task = _Task(start=self.start.value, end=self.end.value, now=_unpack(state, self.size))
+        task.box = _Pending(self, state)
+        return self.fn(task)
+
+    def _path(self, state: int) -> str:
+        """沿已见状态表中记录的移动回溯到起点 | walk back to the start along the moves kept in the seen table"""
+        moves, seen, bits = [], self._seen, self.bits
+        code = seen[state] & 7
+        while code != _ROOT:
+            move = _CODES[code]
+            zero = _zero(state, bits)
+            for back, to in self._moves[zero]:
+                if back == _REVERSE[move]:
+                    state = _slide(state, zero, to, bits)
+                    break
+            moves.append(move)
+            code = seen[state] & 7
+        moves.reverse()
+        return ''.join(moves)
+
+    @property
+    def done(self) -> bool:
+        """
+        'SearchSession'.done -> bool
+
+        搜索是否已结束 | whether the search is over
+        """
+        return self.result is not None
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        """
+        'SearchSession'.progress -> Dict[str, Any]
+
+        当前的搜索进度 | current progress of the search
+        << 返回 expanded, generated, frontier, duplicates, evaluations, elapsed, done 与 bound: 'astar' 为开放表中最小的
+        << 代价, 'dls' 为当前的搜索深度 | return expanded, generated, frontier, duplicates, evaluations, elapsed, done and
+        << bound: the least cost on the open list for 'astar', the current depth for 'dls'
+        """
+        if self.method == 'astar':
+            frontier, bound = len(self._front), self._front[0][0] if self._front else None
+        else:
+            frontier = bound = len(self._stack)
+        return {'expanded': self.expanded, 'generated': self.generated, 'frontier': frontier,
+                'duplicates': self.duplicates, 'evaluations': self.evaluations, 'elapsed': self.elapsed,
+                'bound': bound, 'done': self.done}
+
+    def step(self, expansions: Optional[int] = 1024, max_seconds: Optional[float] = None,
+             progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+             interval: float = 1.0) -> Optional['SearchResult']:
+        """
+        'SearchSession'.step(expansions: Optional[int] = 1024, max_seconds: Optional[float] = None,
+                             progress: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                             interval: float = 1.0) -> Optional['SearchResult']
+
+        推进搜索, 直到拓展了 expansions 个节点, 用时达到 max_seconds, progress 返回 False 或搜索结束
+        advance the search until expansions nodes are expanded, max_seconds pass, progress returns False or the
+        search is over
+        >> expansions: 本次拓展的节点数, None 为不限 | nodes to expand in this call, None for no limit
+        >> max_seconds: 本次用时的预算 (秒) | budget of seconds for this call
+        >> progress: 见 search(), 返回 False 时暂停而非取消 | see search(), returning False pauses instead of
+        >> cancelling
+        >> interval: 见 search() | see search()
+        << 搜索结束时返回搜索结果, 否则返回 None | return SearchResult object once the search is over, otherwise None
+        """
+        if self.result is not None:
+            return self.result
+        began = perf_counter()
+        monitor = _monitor(progress, interval, began, None, max_seconds)
+        stop = self.expanded + expansions if expansions is not None else None
+        try:
+            if self.method == 'astar':
+                self._astar(stop, monitor)
+            else:
+                self._dls(stop, monitor)
+        finally:
+            self.elapsed += perf_counter() - began
+        if self.result is not None:
+            self.result.elapsed = self.elapsed
+        return self.result
+
+    def _solved(self, state: int, zero: int, path: str) -> None:
+        box = Box._make(state, zero, self.start.history + path, self.size)
+        self.result = SearchResult(box, path, self.expanded, self.generated, self.peak, self.elapsed,
+                                   {'duplicates': self.duplicates, 'evaluations': self.evaluations})
+
+    def _failed(self) -> None:
+        self.result = SearchResult(None, None, self.expanded, self.generated, self.peak, self.elapsed,
+                                   {'duplicates': self.duplicates, 'evaluations': self.evaluations})
+
+    def _astar(self, stop: Optional[int], monitor: Optional[Callable[..., bool]]) -> None:
+        front, seen, moves, bits, mask = self._front, self._seen, self._moves, self.bits, self._mask
+        goal, heuristic = self.end.state, self._heuristic
+        if heuristic is not None:
+            weight, update = heuristic.g, heuristic.update
+        expanded, generated, peak = self.expanded, self.generated, self.peak
+        duplicates, evaluations, sequence = self.duplicates, self.evaluations, self._sequence
+        try:
+            while front:
+                if stop is not None and expanded >= stop:
+                    return
+                if len(front) > peak:
+                    peak = len(front)
+                entry = heappop(front)
+                _, _, step, h, state, zero = entry
+                if seen[state] >> 3 < step:
+                    continue
+                if state == goal:
+                    heappush(front, entry)
+                    self.expanded, self.generated, self.peak = expanded, generated, peak
+                    self._solved(state, zero, self._path(state))
+                    return
+                expanded += 1
+                step += 1
+                for move, to in moves[zero]:
+                    generated += 1
+                    child = _slide(state, zero, to, bits)
+                    known = seen.get(child)
+                    if known is not None and known >> 3 <= step:
+                        duplicates += 1
+                        continue
+                    seen[child] = step << 3 | _CODES.index(move)
+                    evaluations += 1
+                    if heuristic is None:
+                        key, value = self._key(child, to), 0
+                    else:
+                        value = update(h, child, (state >> (to * bits)) & mask, to, zero)
+                        key = weight * step + value
+                    heappush(front, (key, sequence, step, value, child, to))
+                    sequence += 1
+                if monitor is not None and expanded & 255 == 0 and monitor(
+                        expanded, generated, len(front), duplicates, evaluations):
+                    return
+            self.expanded, self.generated, self.peak = expanded, generated, peak
+            self._failed()
+        finally:
+            self.expanded, self.generated, self.peak = expanded, generated, peak
+            self.duplicates, self.evaluations, self._sequence = duplicates, evaluations, sequence
+
+    def _dls(self, stop: Optional[int], monitor: Optional[Callable[..., bool]]) -> None:
+        stack, moves, bits, limit, goal = self._stack, self._moves, self.bits, self.limit, self.end.state
+        expanded, generated, peak, duplicates = self.expanded, self.generated, self.peak, self.duplicates
+        try:
+            while stack:
+                frame = stack[-1]
+                state, zero, index, back = frame
+                if index == len(moves[zero]):
+                    stack.pop()
+                    continue
+                frame[2] += 1
+                move, to = moves[zero][index]
+                if move == back:
+                    duplicates += 1
+                    continue
+                child = _slide(state, zero, to, bits)
+                generated += 1
+                if child == goal:
+                    self.expanded, self.generated, self.peak, self.duplicates = expanded, generated, peak, duplicates
+                    self._solved(child, to, ''.join(moves[frame[1]][frame[2] - 1][0] for frame in stack))
+                    return
+                if len(stack) < limit:
+                    if stop is not None and expanded >= stop:
+                        frame[2] -= 1
+                        generated -= 1
+                        return
+                    stack.append([child, to, 0, _REVERSE[move]])
+                    expanded += 1
+                    if len(stack) > peak:
+                        peak = len(stack)
+                    if monitor is not None and expanded & 255 == 0 and monitor(expanded, generated, len(stack)):
+                        return
+            self.expanded, self.generated, self.peak, self.duplicates = expanded, generated, peak, duplicates
+            self._failed()
+        finally:
+            self.expanded, self.generated, self.peak, self.duplicates = expanded, generated, peak, duplicates
+
+    def save(self, path: str) -> None:
+        """
+        'SearchSession'.save(path: str) -> None
+
+        将搜索状态写入存档文件, 先写临时文件再原子替换 | write the search state into a checkpoint file through a
+        temporary file that atomically replaces path
+        >> path: 存档文件路径 | checkpoint file path
+        """
+        width = (self.size * self.size * self.bits + 7) // 8
+        meta = {'method': self.method, 'limit': self.limit, 'start': self.start.value, 'history': self.start.history,
+                'end': self.end.value, 'width': width, 'expanded': self.expanded, 'generated': self.generated,
+                'peak': self.peak, 'duplicates': self.duplicates, 'evaluations': self.evaluations,
+                'elapsed': self.elapsed, 'sequence': self._sequence, 'done': self.done,
+                'path': None if self.result is None else self.result.path}
+        parts = []
+        if self.method == 'astar' and not self.done:
+            seen = self._seen
+            # 开放表中被更优条目取代的旧条目不必保存 | stale entries superseded by better ones need not be saved
+            front = [(entry[4], entry[1]) for entry in self._front if seen[entry[4]] >> 3 == entry[2]]
+            meta['seen'], meta['open'] = len(seen), len(front)
+            parts.append(b''.join(state.to_bytes(width, 'little') for state in seen))
+            parts.append(array('I', seen.values()).tobytes())
+            parts.append(b''.join(state.to_bytes(width, 'little') for state, _ in front))
+            parts.append(array('Q', [sequence for _, sequence in front]).tobytes())
+        elif not self.done:
+            meta['frames'] = len(self._stack)
+            parts.append(array('B', [frame[2] for frame in self._stack]).tobytes())
+        body = json.dumps(meta).encode('utf-8')
+        with open(path + '.tmp', 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(body)))
+            file.write(body)
+            for part in parts:
+                file.write(part)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str, fn: Optional[Callable[[Dict[str, any]], int]] = None) -> 'SearchSession':
+        """
+        'SearchSession'.load(path: str, fn: Optional[Callable[[Dict[str, any]], int]] = None) -> 'SearchSession'
+
+        从存档文件载入搜索会话, 已结束的会话直接带有存档时的结果, 不再搜索 | load a search session from a checkpoint
+        file, a finished session carries the saved result without searching again
+        >> path: 存档文件路径 | checkpoint file path
+        >> fn: 'astar' 的估价函数, 须与存档时相同 | heuristic function of 'astar', must be the one used when saved
+        << 返回搜索会话对象 | return SearchSession object
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < _HEADER.size:
+            raise ValueError('不是有效的存档文件 | not a valid checkpoint file')
+        magic, version, length = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError('不是有效的存档文件 | not a valid checkpoint file')
+        if version != _VERSION:
+            raise ValueError('不支持的存档版本 | unsupported checkpoint version')
+        meta = json.loads(data[_HEADER.size:_HEADER.size + length].decode('utf-8'))
+        start, end = Box(meta['start'], meta['history']), Box(meta['end'])
+        session = cls.__new__(cls)
+        session.start, session.end, session.method, session.limit = start, end, meta['method'], meta['limit']
+        session.result = None
+        session._setup(fn)
+        for name in ('expanded', 'generated', 'peak', 'duplicates', 'evaluations', 'elapsed'):
+            setattr(session, name, meta[name])
+        session._sequence = meta['sequence']
+        if meta['done']:
+            if meta['path'] is None:
+                session._failed()
+            else:
+                session._solved(end.state, end._zero, meta['path'])
+            return session
+        offset, width, bits = _HEADER.size + length, meta['width'], session.bits
+
+        def _take(nbytes: int) -> bytes:
+            nonlocal offset
+            if offset + nbytes > len(data):
+                raise ValueError('存档文件不完整 | checkpoint file is truncated')
+            offset += nbytes
+            return data[offset - nbytes:offset]
+
+        if session.method == 'astar':
+            seen, opened = meta['seen'], meta['open']
+            states = _take(seen * width)
+            codes = array('I', _take(seen * 4))
+            session._seen = {int.from_bytes(states[i * width:(i + 1) * width], 'little'): code
+                             for i, code in enumerate(codes)}
+            states, sequences = _take(opened * width), array('Q', _take(opened * 8))
+            front = []
+            for i, sequence in enumerate(sequences):
+                state = int.from_bytes(states[i * width:(i + 1) * width], 'little')
+                front.append(session._entry(state, _zero(state, bits), session._seen[state] >> 3, sequence))
+            heapify(front)
+            session._front = front
+        else:
+            indices = array('B', _take(meta['frames']))
+            state, zero, back = start.state, start._zero, ''
+            for depth, index in enumerate(indices):
+                session._stack.append([state, zero, index, back])
+                if depth + 1 < len(indices):
+                    move, to = session._moves[zero][index - 1]
+                    state, zero, back = _slide(state, zero, to, bits), to, _REVERSE[move]
+        return session
+
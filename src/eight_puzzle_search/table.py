@@ -0,0 +1,225 @@
+"""
+八数码问题的全状态距离表 | full state-space distance table for 8-puzzle problem
+
+从目标状态出发做逆向宽度优先搜索, 将每个可达状态的最优步数和最优移动方向写入紧凑的二进制文件,
+之后通过 mmap 载入, 无需搜索即可查表得出最优解.
+a retrograde breadth first search from the goal writes the optimal distance and best move of every reachable state
+into a compact binary file, which is then loaded via mmap to read optimal solutions without any search.
+
+文件格式 (版本 1) | file format (version 1):
+    header: magic b'EPSD', version (uint16), width (uint8), parity (uint8), count (uint32), goal (9 bytes)
+    body:   count bytes, indexed by rank; low 5 bits = distance, bits 5-6 = best move (0 U, 1 D, 2 L, 3 R)
+"""
+import mmap
+import os
+import struct
+from collections import deque
+from typing import *
+
+from . import Box, _MOVES, _slide
+
+_MAGIC = b'EPSD'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHBBI9s')
+_COUNT = 181440
+_CODES = 'UDLR'
+_REVERSE = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+_TARGETS = tuple(dict(moves) for moves in _MOVES)
+
+
+def _tiles(state: int, zero: int) -> List[int]:
+    return [(state >> (i << 2)) & 15 for i in range(9) if i != zero]
+
+
+def _parity(tiles: List[int]) -> int:
+    # 3x3 九宫格中, 去掉空格后数字序列的逆序数奇偶性在移动中保持不变
+    # parity of the tile sequence without blank is invariant under moves on a 3x3 board
+    inversions = 0
+    for i in range(8):
+        for j in range(i + 1, 8):
+            if tiles[i] > tiles[j]:
+                inversions += 1
+    return inversions & 1
+
+
+def _rank(state: int, zero: int) -> int:
+    """
+    状态序号: 空格位置 * 20160 + 数字序列的 Lehmer 编码 // 2
+    rank of state: blank position * 20160 + Lehmer code of tile sequence // 2
+    同一奇偶类中仅交换末两位的两个排列恰好相邻, 故除以 2 后在该类内一一对应.
+    within one parity class, permutations differing only in the last two tiles are adjacent, so // 2 is a bijection.
+    """
+    tiles = _tiles(state, zero)
+    rank = 0
+    for i in range(8):
+        tile, smaller = tiles[i], 0
+        for j in range(i + 1, 8):
+            if tiles[j] < tile:
+                smaller += 1
+        rank = rank * (8 - i) + smaller
+    return zero * 20160 + (rank >> 1)
+
+
+def canonical_goal(zero: int) -> 'Box':
+    """
+    canonical_goal(zero: int) -> 'Box'
+
+    空格位于 zero 处的规范目标: 其余格按顺序填入 1-8 | canonical goal with blank at zero and 1-8 filled in order
+    >> zero: 空格位置 | blank position
+    << 返回规范目标九宫格对象 | return canonical goal Box object
+    """
+    value = list(range(1, 9))
+    value.insert(zero, 0)
+    return Box(value)
+
+
+def build_table(goal: 'Box', path: str) -> None:
+    """
+    build_table(goal: 'Box', path: str) -> None
+
+    从 goal 出发逆向宽度优先搜索, 生成全状态距离表文件 | build distance table file by retrograde BFS from goal
+    >> goal: 目标九宫格对象 | goal Box object
+    >> path: 输出文件路径 | output file path
+    """
+    body = bytearray(_COUNT)
+    seen = {goal.state}
+    layer = deque([(goal.state, goal._zero, 0)])
+    while layer:
+        state, zero, distance = layer.popleft()
+        for move, target in _MOVES[zero]:
+            child = _slide(state, zero, target)
+            if child in seen:
+                continue
+            seen.add(child)
+            # 从子状态返回父状态的移动即为子状态的最优移动 | the move back to the parent is the child's best move
+            body[_rank(child, target)] = (distance + 1) | (_CODES.index(_REVERSE[move]) << 5)
+            layer.append((child, target, distance + 1))
+    value = goal.value
+    header = _HEADER.pack(_MAGIC, _VERSION, 3, _parity(_tiles(goal.state, goal._zero)), _COUNT, bytes(value))
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp, 'wb') as file:
+        file.write(header)
+        file.write(body)
+    os.replace(temp, path)
+
+
+class DistanceTable:
+    """
+    DistanceTable(path: str) -> 'DistanceTable'
+
+    以 mmap 方式载入的全状态距离表 | full state-space distance table loaded via mmap
+    >> path: 距离表文件路径 | distance table file path
+    << 载入的距离表对象 | loaded DistanceTable object
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, parity, count, goal = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise ValueError('不是距离表文件 | not a distance table file')
+        if version != _VERSION or width != 3 or count != _COUNT:
+            raise ValueError('不支持的距离表版本 | unsupported distance table version')
+        if len(self._map) != _HEADER.size + count:
+            raise ValueError('距离表文件不完整 | distance table file is truncated')
+        self._parity = parity
+        self._offset = _HEADER.size
+        self.goal = Box(list(goal))
+
+    def __enter__(self) -> 'DistanceTable':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        'DistanceTable'.close() -> None
+
+        关闭内存映射 | close memory map
+        """
+        self._map.close()
+
+    def _entry(self, state: int, zero: int) -> int:
+        if _parity(_tiles(state, zero)) != self._parity:
+            raise ValueError('该状态无法到达目标状态 | state cannot reach the goal')
+        return self._map[self._offset + _rank(state, zero)]
+
+    def distance(self, box: 'Box') -> int:
+        """
+        'DistanceTable'.distance(box: 'Box') -> int
+
+        查询到目标状态的最优步数 | query optimal distance to goal
+        >> box: 查询的九宫格对象 | Box object to query
+        << 返回最优步数 | return optimal distance
+        """
+        return self._entry(box.state, box._zero) & 31
+
+    def solve(self, box: 'Box') -> str:
+        """
+        'DistanceTable'.solve(box: 'Box') -> str
+
+        沿距离表走到目标状态 | walk the table to the goal
+        >> box: 起始九宫格对象 | start Box object
+        << 返回最优移动序列 | return optimal move sequence
+        """
+        state, zero = box.state, box._zero
+        entry = self._entry(state, zero)
+        moves = []
+        while entry & 31:
+            move = _CODES[entry >> 5]
+            target = _TARGETS[zero][move]
+            state, zero = _slide(state, zero, target), target
+            moves.append(move)
+            entry = self._map[self._offset + _rank(state, zero)]
+        return ''.join(moves)
+
+
+_TABLES = {}
+
+
+def default_directory() -> str:
+    """
+    default_directory() -> str
+
+    距离表的默认存放目录 | default directory of distance tables
+    """
+    return os.path.join(os.path.expanduser('~'), '.eight_puzzle_search')
+
+
+def load_table(zero: int, directory: Optional[str] = None) -> 'DistanceTable':
+    """
+    load_table(zero: int, directory: Optional[str] = None) -> 'DistanceTable'
+
+    载入空格位于 zero 处的规范目标的距离表, 文件不存在时自动生成
+    load distance table of the canonical goal with blank at zero, building the file when missing
+    >> zero: 空格位置 | blank position
+    >> directory: 距离表目录 | table directory
+    << 返回距离表对象 | return DistanceTable object
+    """
+    path = os.path.join(directory or default_directory(), 'eight_puzzle_{}.epsd'.format(zero))
+    table = _TABLES.get(path)
+    if table is None:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            build_table(canonical_goal(zero), path)
+        table = _TABLES[path] = DistanceTable(path)
+    return table
+
+
+def lookup_solve(start: 'Box', end: 'Box', directory: Optional[str] = None) -> str:
+    """
+    lookup_solve(start: 'Box', end: 'Box', directory: Optional[str] = None) -> str
+
+    查表求最优解: 将数字重新编号使 end 成为规范目标后沿距离表行走
+    optimal solving by lookup: relabel tiles so that end becomes a canonical goal, then walk the table
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> directory: 距离表目录 | table directory
+    << 返回最优移动序列 | return optimal move sequence
+    """
+    if start.size != 3 or end.size != 3:
+        raise ValueError('距离表仅支持 3x3 九宫格 | distance tables only support 3x3 boards')
+    table = load_table(end._zero, directory)
+    relabel = dict(zip(end.value, table.goal.value))
+    return table.solve(Box([relabel[i] for i in start.value]))
@@ -0,0 +1,288 @@
+"""
+NumPy 向量化后端 | NumPy vectorized backend
+
+将整层前沿表示为二维 uint8 数组 (每行一个九宫格), 借助预先计算的空格移动下标表一次生成全部子节点,
+以紧凑编码为键排序去重, 并对整批节点计算曼哈顿距离或不在位数. 需要另行安装 numpy.
+a whole frontier layer is a 2-D uint8 array (one board per row); all children are generated at once with
+precomputed blank move index tables, deduplicated by sorting on packed keys, and whole batches are scored
+by vectorized manhattan distance or misplaced tiles. numpy must be installed separately.
+
+    pip install eight_puzzle_search[numpy]
+
+仅支持紧凑编码不超过 64 位的九宫格, 即 3x3 与 4x4 | only boards whose compact encoding fits 64 bits, i.e. 3x3 and 4x4
+"""
+from time import perf_counter
+from typing import *
+
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError('向量化后端需要 numpy | the vectorized backend requires numpy: '
+                      'pip install eight_puzzle_search[numpy]') from error
+
+from . import Box, SearchResult, _finish, _moves, _prologue
+
+_CODES = 'UDLR'
+_REVERSE = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+_TABLES = {}
+_COSTS = {}
+
+
+def _table(size: int) -> 'np.ndarray':
+    """空格位于各位置时按 UDLR 顺序的新位置, 不可移动为 -1 | new blank position per move in UDLR order, -1 if illegal"""
+    table = _TABLES.get(size)
+    if table is None:
+        table = np.full((4, size * size), -1, dtype=np.intp)
+        for zero, moves in enumerate(_moves(size)):
+            for move, target in moves:
+                table[_CODES.index(move), zero] = target
+        table = _TABLES[size] = table
+    return table
+
+
+def _size(boards: 'np.ndarray') -> int:
+    size = int(boards.shape[1] ** 0.5 + 0.5)
+    if size * size != boards.shape[1] or size > 4:
+        raise ValueError('向量化后端仅支持 3x3 与 4x4 九宫格 | the vectorized backend only supports 3x3 and 4x4 boards')
+    return size
+
+
+def to_array(boxes: Iterable['Box']) -> 'np.ndarray':
+    """
+    to_array(boxes: Iterable['Box']) -> 'np.ndarray'
+
+    将九宫格对象转换为二维数组 | convert Box objects into a 2-D array
+    >> boxes: 九宫格对象 | Box objects
+    << 返回每行一个九宫格的 uint8 数组 | return uint8 array with one board per row
+    """
+    boards = np.array([box.value for box in boxes], dtype=np.uint8)
+    _size(boards)
+    return boards
+
+
+def keys(boards: 'np.ndarray') -> 'np.ndarray':
+    """
+    keys(boards: 'np.ndarray') -> 'np.ndarray'
+
+    逐行计算紧凑编码, 与 Box.state 相同 | packed key of every row, equal to Box.state
+    >> boards: 九宫格数组 | board array
+    << 返回 uint64 数组 | return uint64 array
+    """
+    _size(boards)
+    packed = np.zeros(len(boards), dtype=np.uint64)
+    for i in range(boards.shape[1]):
+        packed |= boards[:, i].astype(np.uint64) << np.uint64(i * 4)
+    return packed
+
+
+def expand(boards: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """
+    expand(boards: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']
+
+    一次生成整层的全部子节点 | generate all children of a whole layer at once
+    >> boards: 九宫格数组 | board array
+    << 返回 (子节点数组, 父节点行号, 移动编号 0-3 对应 UDLR) | return (children, parent rows, move codes 0-3 for UDLR)
+    """
+    table = _table(_size(boards))
+    zeros = np.argmin(boards, axis=1)
+    children, parents, codes = [], [], []
+    for code in range(4):
+        targets = table[code, zeros]
+        rows = np.flatnonzero(targets >= 0)
+        child = boards[rows]
+        index = np.arange(len(rows))
+        child[index, zeros[rows]] = child[index, targets[rows]]
+        child[index, targets[rows]] = 0
+        children.append(child)
+        parents.append(rows)
+        codes.append(np.full(len(rows), code, dtype=np.uint8))
+    return np.concatenate(children), np.concatenate(parents), np.concatenate(codes)
+
+
+def manhattan(boards: 'np.ndarray', end: 'Box') -> 'np.ndarray':
+    """
+    manhattan(boards: 'np.ndarray', end: 'Box') -> 'np.ndarray'
+
+    整批计算到 end 的曼哈顿距离 | manhattan distance to end of a whole batch
+    >> boards: 九宫格数组 | board array
+    >> end: 目标九宫格对象 | end Box object
+    << 返回逐行的启发值 | return heuristic value of every row
+    """
+    cost = _COSTS.get(end.state)
+    if cost is None:
+        size, cells = end.size, len(end.value)
+        cost = np.zeros((cells, cells), dtype=np.uint8)
+        for goal, tile in enumerate(end.value):
+            if tile:
+                cost[tile] = [abs(pos // size - goal // size) + abs(pos % size - goal % size) for pos in range(cells)]
+        cost = _COSTS[end.state] = cost
+    return cost[boards, np.arange(boards.shape[1])].sum(axis=1, dtype=np.int32)
+
+
+def misplaced(boards: 'np.ndarray', end: 'Box') -> 'np.ndarray':
+    """
+    misplaced(boards: 'np.ndarray', end: 'Box') -> 'np.ndarray'
+
+    整批计算不在目标位置的数字个数, 不计空格, 因而满足一致性 | number of tiles off their place in end, the blank
+    is not counted so the heuristic stays consistent
+    >> boards: 九宫格数组 | board array
+    >> end: 目标九宫格对象 | end Box object
+    << 返回逐行的启发值 | return heuristic value of every row
+    """
+    goal = np.array(end.value, dtype=np.uint8)
+    return ((boards != goal) & (goal != 0)).sum(axis=1, dtype=np.int32)
+
+
+def _contains(ordered: 'np.ndarray', values: 'np.ndarray') -> 'np.ndarray':
+    """values 中各项是否在已排序的 ordered 中 | whether each of values is in sorted ordered"""
+    if not len(ordered):
+        return np.zeros(len(values), dtype=bool)
+    index = np.searchsorted(ordered, values)
+    index[index == len(ordered)] = 0
+    return ordered[index] == values
+
+
+def layers(start: 'Box') -> Iterator['np.ndarray']:
+    """
+    layers(start: 'Box') -> Iterator['np.ndarray']
+
+    从 start 出发逐层产出宽度优先搜索的前沿 | yield the breadth first search frontier layer by layer from start
+    >> start: 起始九宫格对象 | start Box object
+    << 逐层产出九宫格数组, 第 d 个即距离为 d 的全部状态 | yield board arrays, the d-th holds all states at distance d
+    """
+    boards = to_array([start])
+    previous, current = np.zeros(0, dtype=np.uint64), keys(boards)
+    while len(boards):
+        yield boards
+        boards, previous, current, _ = _advance(boards, previous, current)
+
+
+def _advance(boards: 'np.ndarray', previous: 'np.ndarray',
+             current: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray', int]:
+    # 无向图中子节点只可能落在上一层, 本层或下一层 | on an undirected graph children fall in the previous, current or
+    # next layer, so deduplicating against the two sorted layers is enough
+    children = expand(boards)[0]
+    unique, index = np.unique(keys(children), return_index=True)
+    fresh = ~(_contains(previous, unique) | _contains(current, unique))
+    return children[index[fresh]], current, unique[fresh], len(children)
+
+
+def _trace_back(end: 'Box', found: Callable[['Box'], bool]) -> str:
+    """从 end 逐步退回到 found 为真的相邻状态, 还原移动序列 | walk back from end through neighbours accepted by found"""
+    moves, now = [], Box._make(end.state, end._zero, '', end.size)
+    while True:
+        for check in now.expand():
+            if found(check):
+                moves.append(_REVERSE[check.history[-1]])
+                now = Box._make(check.state, check._zero, '', end.size)
+                break
+        else:
+            moves.reverse()
+            return ''.join(moves)
+
+
+def breadth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None) -> 'SearchResult':
+    """
+    breadth_first_search(start: 'Box', end: 'Box', trace: Optional[Callable[[str, Any], None]] = None) -> 'SearchResult'
+
+    向量化的逐层宽度优先搜索 | vectorized layered breadth first search
+    只保存各层排序后的紧凑编码, 找到目标后沿相邻层退回还原路径.
+    only the sorted keys of every layer are kept; the path is recovered by walking back through adjacent layers.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> trace: 事件接收器, 仅报告开始与结束 | event sink, reports start and finish only
+    << 返回搜索结果 | return SearchResult object
+    """
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, goal = perf_counter(), np.uint64(end.state)
+    boards = to_array([start])
+    seen = [keys(boards)]
+    expanded = generated = peak = 0
+    while len(boards):
+        peak = max(peak, len(boards))
+        expanded += len(boards)
+        boards, _, current, children = _advance(boards, seen[-2] if len(seen) > 1 else seen[-1][:0], seen[-1])
+        generated += children
+        seen.append(current)
+        if _contains(current, np.array([goal]))[0]:
+            # 第 d 层的状态应在第 d - 1 层找到邻居 | a state of layer d has a neighbour in layer d - 1
+            depth = [len(seen) - 2]
+
+            def _found(check: 'Box') -> bool:
+                if depth[0] < 0 or not _contains(seen[depth[0]], np.array([check.state], dtype=np.uint64))[0]:
+                    return False
+                depth[0] -= 1
+                return True
+
+            path = _trace_back(end, _found)
+            return _finish(start, Box(end.value, start.history + path), expanded, generated, peak, began, trace)
+    return _finish(start, None, expanded, generated, peak, began, trace)
+
+
+def search(start: 'Box', end: 'Box', heuristic: Callable[['np.ndarray', 'Box'], 'np.ndarray'] = manhattan,
+           trace: Optional[Callable[[str, Any], None]] = None) -> 'SearchResult':
+    """
+    search(start: 'Box', end: 'Box', heuristic: Callable[['np.ndarray', 'Box'], 'np.ndarray'] = manhattan,
+           trace: Optional[Callable[[str, Any], None]] = None) -> 'SearchResult'
+
+    向量化的 A* 搜索: 每次取出 f 值最小的一整批节点同时拓展和评估
+    vectorized A* search: the whole batch of nodes with the least f is expanded and scored at once
+    启发函数须满足一致性, 此时同一批节点的已走步数均已最优.
+    the heuristic must be consistent, so every node of a batch already has its optimal cost.
+    >> start: 起始九宫格对象 | start Box object
+    >> end: 目标九宫格对象 | end Box object
+    >> heuristic: 整批启发函数, 如 manhattan 或 misplaced | batch heuristic such as manhattan or misplaced
+    >> trace: 事件接收器, 仅报告开始与结束 | event sink, reports start and finish only
+    << 返回搜索结果 | return SearchResult object
+    """
+    result = _prologue(start, end, trace)
+    if result is not None:
+        return result
+    began, goal = perf_counter(), np.uint64(end.state)
+    boards = to_array([start])
+    front = {int(heuristic(boards, end)[0]): [(boards, np.zeros(1, dtype=np.int32))]}
+    closed, closed_g = np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int32)
+    expanded = generated = peak = 0
+    while front:
+        peak = max(peak, sum(len(g) for batch in front.values() for _, g in batch))
+        batch = front.pop(min(front))
+        boards = np.concatenate([boards for boards, _ in batch])
+        g = np.concatenate([g for _, g in batch])
+        unique, index = np.unique(keys(boards), return_index=True)
+        fresh = ~_contains(closed, unique)
+        unique, index = unique[fresh], index[fresh]
+        if not len(unique):
+            continue
+        boards, g = boards[index], g[index]
+        order = np.argsort(np.concatenate([closed, unique]), kind='stable')
+        closed, closed_g = np.concatenate([closed, unique])[order], np.concatenate([closed_g, g])[order]
+        if _contains(unique, np.array([goal]))[0]:
+            step = [int(g[np.searchsorted(unique, goal)])]
+
+            def _found(check: 'Box') -> bool:
+                key = np.array([check.state], dtype=np.uint64)
+                i = np.searchsorted(closed, key)[0]
+                if i == len(closed) or closed[i] != key[0] or closed_g[i] != step[0] - 1:
+                    return False
+                step[0] -= 1
+                return True
+
+            path = _trace_back(end, _found)
+            return _finish(start, Box(end.value, start.history + path), expanded, generated, peak, began, trace)
+        expanded += len(boards)
+        children, parents, _ = expand(boards)
+        generated += len(children)
+        fresh = ~_contains(closed, keys(children))
+        children, child_g = children[fresh], g[parents[fresh]] + 1
+        f = child_g + heuristic(children, end)
+        for value in np.unique(f):
+            rows = f == value
+            front.setdefault(int(value), []).append((children[rows], child_g[rows]))
+    return _finish(start, None, expanded, generated, peak, began, trace)
+
+
+bfs = breadth_first_search
+mhd = manhattan
+mp = misplaced